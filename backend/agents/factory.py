@@ -0,0 +1,31 @@
+"""Construction of the configured LLM adapters."""
+
+from backend.agents.base_adapter import BaseAdapter
+from backend.agents.fake import FakeAdapter
+from backend.agents.vanilla import VanillaAdapter
+from backend.models import AdapterType
+from backend.settings import AppSettings
+
+
+def build_adapter(adapter_type: AdapterType, settings: AppSettings) -> BaseAdapter:
+    """
+    Build the adapter a run selected.
+
+    Raises:
+        ValueError: If the adapter is disabled or missing credentials.
+    """
+    if adapter_type == "fake":
+        if not settings.fake_adapter_enabled:
+            msg = "The fake adapter is disabled; set FAKE_ADAPTER_ENABLED=true."
+            raise ValueError(msg)
+        return FakeAdapter(latency_seconds=settings.fake_adapter_latency_ms / 1000)
+    return VanillaAdapter(
+        adapter_type=adapter_type,
+        openai_api_key=settings.openai_api_key,
+        google_api_key=settings.google_api_key,
+        openai_model=settings.openai_model,
+        google_model=settings.google_model,
+        temperature=settings.default_temperature,
+        max_output_tokens=settings.max_output_tokens,
+        request_timeout_seconds=settings.request_timeout_seconds,
+    )
@@ -0,0 +1,55 @@
+"""Deterministic adapter for load tests and benchmarks, without any LLM calls."""
+
+import asyncio
+from time import perf_counter
+
+from backend.agents.base_adapter import BaseAdapter
+from backend.metrics import observe_llm_call
+from backend.pipelines.pipeline_runner import APPROVAL_PHRASE
+from backend.pipelines.prompts import CRITIQUE_PROMPT
+
+_CRITIQUE_PREFIX = CRITIQUE_PROMPT[: CRITIQUE_PROMPT.index("{")]
+_SECTIONS = (
+    "Executive Summary",
+    "Problem Statement & User Personas",
+    "Goals & Success Metrics",
+    "Functional Requirements",
+    "Non-Functional Requirements",
+    "Out-of-Scope Items",
+    "Risks & Mitigations",
+)
+
+
+class FakeAdapter(BaseAdapter):
+    """
+    Implements the BaseAdapter protocol with canned Markdown responses.
+
+    Every critique approves the draft, so a run takes exactly three calls.
+    An optional fixed latency stands in for provider round trips.
+    """
+
+    def __init__(
+        self, *, latency_seconds: float = 0.0, paragraphs_per_section: int = 3
+    ) -> None:
+        self.adapter_type = "fake"
+        self.latency_seconds = latency_seconds
+        self._paragraphs_per_section = paragraphs_per_section
+        self._calls = 0
+
+    async def call_llm(self, prompt: str) -> str:
+        """
+        Returns an approval for critique prompts and a PRD body otherwise.
+        """
+        started = perf_counter()
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        self._calls += 1
+        observe_llm_call("fake", "fake", perf_counter() - started)
+        if prompt.startswith(_CRITIQUE_PREFIX):
+            return APPROVAL_PHRASE
+        paragraph = (
+            f"Response {self._calls}: the system shall meet this requirement "
+            "with measurable acceptance criteria."
+        )
+        body = "\n\n".join([paragraph] * self._paragraphs_per_section)
+        return "\n\n".join(f"## {section}\n\n{body}" for section in _SECTIONS)
@@ -0,0 +1,55 @@
+"""Adapter wrapper that schedules LLM calls through the fair-share scheduler."""
+
+from time import perf_counter
+
+from backend.agents.base_adapter import BaseAdapter
+from backend.models import PriorityClass
+from backend.services.scheduler import LLMScheduler
+from backend.tracing import set_span_attributes, start_span
+
+
+class ScheduledAdapter(BaseAdapter):
+    """
+    Implements the BaseAdapter protocol by queueing calls to another adapter.
+
+    Every call waits for a slot of the shared `LLMScheduler`, tagged with the
+    run's tenant and priority class.
+    """
+
+    def __init__(
+        self,
+        inner: BaseAdapter,
+        scheduler: LLMScheduler,
+        *,
+        tenant: str,
+        priority: PriorityClass,
+    ) -> None:
+        self.adapter_type = inner.adapter_type
+        self.tenant = tenant
+        self.priority = priority
+        self._inner = inner
+        self._scheduler = scheduler
+
+    async def call_llm(self, prompt: str) -> str:
+        """
+        Calls the wrapped adapter once the scheduler grants a slot.
+
+        The traced `llm.call` span includes the time spent waiting for it.
+        """
+        with start_span(
+            "llm.call",
+            {
+                "prd.adapter": self.adapter_type,
+                "prd.tenant": self.tenant,
+                "prd.priority": self.priority,
+                "prd.prompt.chars": len(prompt),
+            },
+        ) as span:
+            queued_at = perf_counter()
+            async with self._scheduler.slot(self.tenant, self.priority):
+                set_span_attributes(
+                    span, {"prd.scheduler.wait_seconds": perf_counter() - queued_at}
+                )
+                response = await self._inner.call_llm(prompt)
+            set_span_attributes(span, {"prd.response.chars": len(response)})
+            return response
@@ -8,9 +8,14 @@ from typing import Literal
 import structlog
 
 from backend.agents.base_adapter import AdapterError, BaseAdapter
+from backend.metrics import observe_llm_call
+from backend.tracing import set_span_attributes, start_span
 
 logger = structlog.get_logger(__name__)
 
+# Prompt and completion tokens, when the provider reports them.
+_TokenUsage = tuple[int | None, int | None]
+
 
 class VanillaAdapter(BaseAdapter):
     """
@@ -35,6 +40,7 @@ class VanillaAdapter(BaseAdapter):
         self.request_timeout_seconds = request_timeout_seconds
         self._openai_api_key = openai_api_key
         self._google_api_key = google_api_key
+        self.provider = "openai" if adapter_type == "vanilla_openai" else "google"
 
         if self.adapter_type == "vanilla_openai":
             self.model_name = openai_model
@@ -51,37 +57,68 @@ class VanillaAdapter(BaseAdapter):
         """
         Calls the underlying language model with a given prompt.
         """
-        started_at = perf_counter()
-        try:
-            if self.adapter_type == "vanilla_openai":
-                response = await self._call_openai(prompt)
-            else:
-                response = await self._call_google(prompt)
-
-            logger.info(
-                "llm_call_succeeded",
-                adapter=self.adapter_type,
-                model=self.model_name,
-                duration_seconds=round(perf_counter() - started_at, 3),
-            )
-            return response
-        except AdapterError:
-            logger.warning(
-                "llm_call_failed",
-                adapter=self.adapter_type,
-                model=self.model_name,
-                duration_seconds=round(perf_counter() - started_at, 3),
-                exc_info=True,
-            )
-            raise
-
-    async def _call_openai(self, prompt: str) -> str:
+        with start_span(
+            f"llm.{self.provider}",
+            {
+                "gen_ai.system": self.provider,
+                "gen_ai.request.model": self.model_name,
+                "gen_ai.request.max_tokens": self.max_output_tokens,
+                "gen_ai.request.temperature": self.temperature,
+                "prd.prompt.chars": len(prompt),
+            },
+        ) as span:
+            started_at = perf_counter()
+            try:
+                if self.adapter_type == "vanilla_openai":
+                    response, usage = await self._call_openai(prompt)
+                else:
+                    response, usage = await self._call_google(prompt)
+
+                duration_seconds = perf_counter() - started_at
+                set_span_attributes(
+                    span,
+                    {
+                        "gen_ai.usage.input_tokens": usage[0],
+                        "gen_ai.usage.output_tokens": usage[1],
+                        "prd.response.chars": len(response),
+                    },
+                )
+                observe_llm_call(
+                    self.provider,
+                    self.model_name,
+                    duration_seconds,
+                    prompt_tokens=usage[0],
+                    completion_tokens=usage[1],
+                )
+                logger.info(
+                    "llm_call_succeeded",
+                    adapter=self.adapter_type,
+                    model=self.model_name,
+                    duration_seconds=round(duration_seconds, 3),
+                )
+                return response
+            except AdapterError:
+                duration_seconds = perf_counter() - started_at
+                observe_llm_call(
+                    self.provider, self.model_name, duration_seconds, outcome="error"
+                )
+                logger.warning(
+                    "llm_call_failed",
+                    adapter=self.adapter_type,
+                    model=self.model_name,
+                    duration_seconds=round(duration_seconds, 3),
+                    exc_info=True,
+                )
+                raise
+
+    async def _call_openai(self, prompt: str) -> tuple[str, _TokenUsage]:
         """Call the OpenAI Chat Completions API."""
         try:
             openai_module = import_module("openai")
             async_openai_cls = openai_module.AsyncOpenAI
         except ModuleNotFoundError as exc:
-            raise AdapterError("openai", "The OpenAI SDK is not installed.") from exc
+            msg = "The OpenAI SDK is not installed; install the `openai` extra."
+            raise AdapterError("openai", msg) from exc
 
         client = async_openai_cls(
             api_key=self._openai_api_key,
@@ -95,6 +132,7 @@ class VanillaAdapter(BaseAdapter):
                 max_tokens=self.max_output_tokens,
             )
             openai_content: str = openai_response.choices[0].message.content or ""
+            openai_usage = getattr(openai_response, "usage", None)
         except Exception as exc:
             raise AdapterError("openai", f"OpenAI request failed: {exc}") from exc
         finally:
@@ -102,17 +140,19 @@ class VanillaAdapter(BaseAdapter):
 
         if not openai_content.strip():
             raise AdapterError("openai", "OpenAI returned an empty response.")
-        return openai_content
+        return openai_content, (
+            getattr(openai_usage, "prompt_tokens", None),
+            getattr(openai_usage, "completion_tokens", None),
+        )
 
-    async def _call_google(self, prompt: str) -> str:
+    async def _call_google(self, prompt: str) -> tuple[str, _TokenUsage]:
         """Call the Google GenAI API using the supported SDK."""
         try:
             genai_module = import_module("google.genai")
             types_module = import_module("google.genai.types")
         except ModuleNotFoundError as exc:
-            raise AdapterError(
-                "google", "The Google GenAI SDK is not installed."
-            ) from exc
+            msg = "The Google GenAI SDK is not installed; install the `google` extra."
+            raise AdapterError("google", msg) from exc
 
         client = genai_module.Client(api_key=self._google_api_key)
         try:
@@ -135,4 +175,8 @@ class VanillaAdapter(BaseAdapter):
         google_content = getattr(response, "text", "") or ""
         if not google_content.strip():
             raise AdapterError("google", "Google returned an empty response.")
-        return google_content
+        google_usage = getattr(response, "usage_metadata", None)
+        return google_content, (
+            getattr(google_usage, "prompt_token_count", None),
+            getattr(google_usage, "candidates_token_count", None),
+        )
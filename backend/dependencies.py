@@ -1,14 +1,21 @@
 """FastAPI dependency providers backed by shared app runtime state."""
 
+from hashlib import sha256
 from typing import Annotated, cast
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Header, HTTPException, Request, status
 
 from backend.agents.base_adapter import BaseAdapter
-from backend.agents.vanilla import VanillaAdapter
+from backend.agents.factory import build_adapter
+from backend.agents.scheduled import ScheduledAdapter
 from backend.models import GeneratePRDRequest
 from backend.runtime import AppRuntime
+from backend.services.admission import AdmissionController
+from backend.services.profiler import ProfilerService
+from backend.services.renderer import MarkdownRenderer
+from backend.services.scheduler import LLMScheduler
 from backend.services.streamer import StreamerService
+from backend.services.supervisor import PipelineSupervisor
 from backend.settings import AppSettings
 from backend.state.base import StateStore
 
@@ -37,24 +44,74 @@ def get_streamer_service(
     return runtime.streamer
 
 
+def get_admission_controller(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+) -> AdmissionController:
+    """Return the shared admission controller."""
+    return runtime.admission
+
+
+def get_llm_scheduler(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+) -> LLMScheduler:
+    """Return the shared LLM call scheduler."""
+    return runtime.scheduler
+
+
+def get_renderer(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+) -> MarkdownRenderer:
+    """Return the shared Markdown renderer."""
+    return runtime.renderer
+
+
+def get_pipeline_supervisor(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+) -> PipelineSupervisor:
+    """Return the supervisor of this process's pipeline tasks."""
+    return runtime.pipelines
+
+
+def get_profiler(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+) -> ProfilerService | None:
+    """Return the profiler, or None when profiling is disabled."""
+    return runtime.profiler
+
+
+def get_tenant(
+    tenant_id: Annotated[
+        str | None, Header(alias="X-Tenant-ID", min_length=1, max_length=100)
+    ] = None,
+    api_key: Annotated[str | None, Header(alias="X-API-Key", min_length=1)] = None,
+) -> str:
+    """
+    Identify the tenant a request is scheduled for.
+
+    An explicit `X-Tenant-ID` wins; otherwise the tenant is derived from a
+    hash of the `X-API-Key`, so the key itself never appears in stats or logs.
+    """
+    if tenant_id is not None:
+        return tenant_id
+    if api_key is not None:
+        return f"key-{sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+    return "anonymous"
+
+
 def get_agent_adapter(
     request: GeneratePRDRequest,
     settings: Annotated[AppSettings, Depends(get_settings)],
+    scheduler: Annotated[LLMScheduler, Depends(get_llm_scheduler)],
+    tenant: Annotated[str, Depends(get_tenant)],
 ) -> BaseAdapter:
-    """Instantiate the selected LLM adapter."""
+    """Instantiate the selected LLM adapter behind the fair-share scheduler."""
     try:
-        return VanillaAdapter(
-            adapter_type=request.adapter,
-            openai_api_key=settings.openai_api_key,
-            google_api_key=settings.google_api_key,
-            openai_model=settings.openai_model,
-            google_model=settings.google_model,
-            temperature=settings.default_temperature,
-            max_output_tokens=settings.max_output_tokens,
-            request_timeout_seconds=settings.request_timeout_seconds,
-        )
+        adapter = build_adapter(request.adapter, settings)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(exc),
         ) from exc
+    return ScheduledAdapter(
+        adapter, scheduler, tenant=tenant, priority=request.priority_class
+    )
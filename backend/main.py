@@ -3,26 +3,38 @@
 import argparse
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from typing import Any
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from backend.routes.admin import router as admin_router
 from backend.routes.generation import router as generation_router
 from backend.routes.health import router as health_router
-from backend.runtime import build_runtime, close_runtime
+from backend.routes.runs import router as runs_router
+from backend.routes.websocket import router as websocket_router
+from backend.runtime import build_runtime, close_runtime, install_drain_signal_handler
 from backend.settings import AppSettings
 
 
 def create_app(settings: AppSettings | None = None) -> FastAPI:
-    """Create a configured FastAPI application."""
+    """
+    Create a configured FastAPI application.
+
+    Servers load the app through this factory (`uvicorn --factory
+    backend.main:create_app`), so importing the module neither reads settings
+    nor builds an app.
+    """
     app_settings = settings or AppSettings()
 
     @asynccontextmanager
     async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         runtime = await build_runtime(app_settings)
         app.state.runtime = runtime
+        restore_signal_handler = install_drain_signal_handler(runtime.pipelines)
         yield
+        restore_signal_handler()
         await close_runtime(runtime)
 
     app = FastAPI(
@@ -42,29 +54,103 @@ def create_app(settings: AppSettings | None = None) -> FastAPI:
     )
     app.include_router(health_router, prefix="", tags=["health"])
     app.include_router(generation_router, prefix="/api/v1", tags=["generation"])
+    app.include_router(runs_router, prefix="/api/v1", tags=["runs"])
+    app.include_router(websocket_router, prefix="/api/v1", tags=["streaming"])
+    app.include_router(admin_router, prefix="/admin", tags=["admin"])
     return app
 
 
-DEFAULT_SETTINGS = AppSettings()
-app = create_app(DEFAULT_SETTINGS)
+def __getattr__(name: str) -> Any:
+    """Build the default `app` on first access, for `uvicorn backend.main:app`."""
+    if name != "app":
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    application = create_app()
+    globals()["app"] = application
+    return application
+
+
+SERVING_PRESETS: dict[str, dict[str, Any]] = {
+    "development": {
+        "loop": "auto",
+        "http": "auto",
+        "timeout_keep_alive": 5,
+        "backlog": 2048,
+        "access_log": True,
+        "proxy_headers": False,
+    },
+    "production": {
+        "reload": False,
+        "loop": "uvloop",
+        "http": "httptools",
+        # Longer than the idle timeout of common load balancers, so they never
+        # reuse a connection the server has just closed.
+        "timeout_keep_alive": 75,
+        "backlog": 4096,
+        "access_log": False,
+        "proxy_headers": True,
+    },
+}
 
 
 def cli(argv: list[str] | None = None) -> int:
     """Run the API server from the installed console script."""
+    settings = AppSettings()
     parser = argparse.ArgumentParser(description="Run the Agentic PRD API server.")
-    parser.add_argument("--host", default=DEFAULT_SETTINGS.api_host)
-    parser.add_argument("--port", type=int, default=DEFAULT_SETTINGS.api_port)
+    parser.add_argument("--host", default=settings.api_host)
+    parser.add_argument("--port", type=int, default=settings.api_port)
+    parser.add_argument(
+        "--preset",
+        choices=sorted(SERVING_PRESETS),
+        default=(
+            "production" if settings.environment == "production" else "development"
+        ),
+        help="Defaults for the serving options below.",
+    )
     parser.add_argument(
         "--reload",
         action=argparse.BooleanOptionalAction,
-        default=DEFAULT_SETTINGS.environment == "development",
+        default=None,
     )
+    parser.add_argument("--workers", type=int, default=settings.api_workers)
+    parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"])
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"])
+    parser.add_argument("--timeout-keep-alive", type=int, metavar="SECONDS")
+    parser.add_argument("--backlog", type=int)
     args = parser.parse_args(argv)
+
+    options = {
+        "reload": settings.environment == "development",
+        **SERVING_PRESETS[args.preset],
+    }
+    for name in ("reload", "loop", "http", "timeout_keep_alive", "backlog"):
+        value = getattr(args, name)
+        if value is not None:
+            options[name] = value
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.workers > 1:
+        if options["reload"]:
+            parser.error("--reload cannot be combined with more than one worker.")
+        if args.preset == "production" and settings.state_backend in (
+            "memory",
+            "auto",
+        ):
+            parser.error(
+                "The production preset needs STATE_BACKEND=redis or sqlite with "
+                "more than one worker: in-memory state and stream subscribers "
+                "are per process."
+            )
+
     uvicorn.run(
-        "backend.main:app",
+        "backend.main:create_app",
+        factory=True,
         host=args.host,  # nosec B104
         port=args.port,
-        reload=args.reload,
+        workers=args.workers,
+        ws_per_message_deflate=settings.ws_per_message_deflate,
+        **options,
     )
     return 0
 
@@ -0,0 +1,279 @@
+"""
+Prometheus metrics for the pipeline, adapter, state store and streamer.
+
+Metrics need the `prometheus-client` package from the `observability` extra,
+which is imported only by `enable_metrics`. Until then, and whenever the
+package is missing, the recording functions return immediately, so hot paths
+pay a single attribute lookup.
+"""
+
+from dataclasses import dataclass
+import importlib.util
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    from prometheus_client import CollectorRegistry, Counter, Histogram
+    from prometheus_client.core import Metric
+
+    from backend.services.admission import AdmissionStats
+    from backend.services.scheduler import SchedulerStats
+    from backend.services.streamer import ConnectionCounts, SubscriberStats
+    from backend.services.supervisor import SupervisorStats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# LLM calls and pipeline steps take seconds to minutes.
+STEP_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+# State store operations and diffs take microseconds to milliseconds.
+FAST_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1,
+)
+REVISION_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 24)
+
+
+@dataclass(frozen=True, slots=True)
+class _Metrics:
+    """The process-wide metric objects recorded on hot paths."""
+
+    step_seconds: "Histogram"
+    llm_call_seconds: "Histogram"
+    llm_tokens: "Counter"
+    store_seconds: "Histogram"
+    diff_seconds: "Histogram"
+    run_revisions: "Histogram"
+
+
+class _Registry:
+    """Holds the metrics once `enable_metrics` has created them."""
+
+    metrics: _Metrics | None = None
+
+
+def metrics_available() -> bool:
+    """Return whether the optional Prometheus client is installed."""
+    return importlib.util.find_spec("prometheus_client") is not None
+
+
+def enable_metrics() -> bool:
+    """
+    Create the process-wide metrics on first call.
+
+    Returns:
+        Whether metrics are recorded, which requires `prometheus-client`.
+    """
+    if _Registry.metrics is None and metrics_available():
+        from prometheus_client import Counter, Histogram
+
+        _Registry.metrics = _Metrics(
+            step_seconds=Histogram(
+                "prd_pipeline_step_duration_seconds",
+                "Pipeline step latency by outcome, including the LLM call and the save.",
+                ["step", "outcome"],
+                buckets=STEP_BUCKETS,
+            ),
+            llm_call_seconds=Histogram(
+                "prd_llm_call_duration_seconds",
+                "LLM call latency by provider, model and outcome.",
+                ["provider", "model", "outcome"],
+                buckets=STEP_BUCKETS,
+            ),
+            llm_tokens=Counter(
+                "prd_llm_tokens",
+                "Tokens reported by LLM providers.",
+                ["provider", "model", "kind"],
+            ),
+            store_seconds=Histogram(
+                "prd_state_store_operation_duration_seconds",
+                "State store operation latency.",
+                ["backend", "operation"],
+                buckets=FAST_BUCKETS,
+            ),
+            diff_seconds=Histogram(
+                "prd_diff_duration_seconds",
+                "Time spent computing revision diffs.",
+                buckets=FAST_BUCKETS,
+            ),
+            run_revisions=Histogram(
+                "prd_run_revisions",
+                "Revisions per finished run.",
+                ["outcome"],
+                buckets=REVISION_BUCKETS,
+            ),
+        )
+    return _Registry.metrics is not None
+
+
+def observe_step(step: str, seconds: float, *, outcome: str = "success") -> None:
+    """Record the latency of one pipeline step, whether or not it succeeded."""
+    if (metrics := _Registry.metrics) is not None:
+        metrics.step_seconds.labels(step, outcome).observe(seconds)
+
+
+def observe_llm_call(
+    provider: str,
+    model: str,
+    seconds: float,
+    *,
+    outcome: str = "success",
+    prompt_tokens: int | None = None,
+    completion_tokens: int | None = None,
+) -> None:
+    """Record an LLM call's latency and the tokens its provider reported."""
+    if (metrics := _Registry.metrics) is None:
+        return
+    metrics.llm_call_seconds.labels(provider, model, outcome).observe(seconds)
+    if prompt_tokens:
+        metrics.llm_tokens.labels(provider, model, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        metrics.llm_tokens.labels(provider, model, "completion").inc(completion_tokens)
+
+
+def observe_store(backend: str, operation: str, seconds: float) -> None:
+    """Record the latency of one state store operation."""
+    if (metrics := _Registry.metrics) is not None:
+        metrics.store_seconds.labels(backend, operation).observe(seconds)
+
+
+def observe_diff(seconds: float) -> None:
+    """Record the time spent computing one diff."""
+    if (metrics := _Registry.metrics) is not None:
+        metrics.diff_seconds.observe(seconds)
+
+
+def observe_run_revisions(outcome: str, revisions: int) -> None:
+    """Record how many revisions a finished run took."""
+    if (metrics := _Registry.metrics) is not None:
+        metrics.run_revisions.labels(outcome).observe(revisions)
+
+
+@dataclass(frozen=True, slots=True)
+class RuntimeSources:
+    """Callables returning the runtime stats exported as gauges."""
+
+    connections: "Callable[[], ConnectionCounts]"
+    subscribers: "Callable[[], list[SubscriberStats]]"
+    admission: "Callable[[], AdmissionStats]"
+    scheduler: "Callable[[], SchedulerStats]"
+    pipelines: "Callable[[], SupervisorStats]"
+
+
+class RuntimeCollector:
+    """
+    Exports runtime gauges, read from the stats of each service at scrape time.
+
+    Subscriber counts and queue depths already exist as stats, so reading them
+    on scrape costs the hot paths nothing.
+    """
+
+    def __init__(self, sources: RuntimeSources) -> None:
+        self._sources = sources
+
+    def collect(self) -> "Iterator[Metric]":
+        """Yield the current gauge and counter values."""
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+        connections = self._sources.connections()
+        lags = [subscriber.lag for subscriber in self._sources.subscribers()]
+        admission = self._sources.admission()
+        scheduler = self._sources.scheduler()
+        pipelines = self._sources.pipelines()
+
+        yield GaugeMetricFamily(
+            "prd_stream_subscribers",
+            "Open stream subscribers.",
+            value=connections.subscribers,
+        )
+        yield GaugeMetricFamily(
+            "prd_stream_runs", "Runs with stream subscribers.", value=connections.runs
+        )
+        yield GaugeMetricFamily(
+            "prd_stream_queued_events",
+            "Events waiting in subscriber queues.",
+            value=sum(lags),
+        )
+        yield GaugeMetricFamily(
+            "prd_stream_max_subscriber_lag",
+            "Events waiting in the fullest subscriber queue.",
+            value=max(lags, default=0),
+        )
+        yield CounterMetricFamily(
+            "prd_stream_rejected_subscribers",
+            "Subscribers rejected by the subscriber caps.",
+            value=connections.rejected,
+        )
+        yield CounterMetricFamily(
+            "prd_stream_reaped_subscribers",
+            "Stalled subscribers removed by the streamer.",
+            value=connections.reaped,
+        )
+
+        active_runs = GaugeMetricFamily(
+            "prd_admission_active_runs", "Admitted pipeline runs.", labels=["adapter"]
+        )
+        for adapter, active in admission.active_by_adapter.items():
+            active_runs.add_metric([adapter], active)
+        yield active_runs
+        yield GaugeMetricFamily(
+            "prd_admission_queued_runs",
+            "Runs waiting in the admission queue.",
+            value=admission.queued,
+        )
+        yield CounterMetricFamily(
+            "prd_admission_rejected_runs",
+            "Runs rejected because the admission queue was full.",
+            value=admission.rejected,
+        )
+
+        yield GaugeMetricFamily(
+            "prd_llm_calls_active",
+            "LLM calls holding a scheduler slot.",
+            value=scheduler.active,
+        )
+        yield GaugeMetricFamily(
+            "prd_llm_calls_queued",
+            "LLM calls waiting for a scheduler slot.",
+            value=scheduler.queued,
+        )
+        yield GaugeMetricFamily(
+            "prd_pipelines_active",
+            "Pipeline tasks running in this process.",
+            value=pipelines.active_pipelines,
+        )
+        yield GaugeMetricFamily(
+            "prd_draining",
+            "Whether this process is draining for shutdown.",
+            value=int(pipelines.draining),
+        )
+
+
+def create_runtime_registry(sources: RuntimeSources) -> "CollectorRegistry":
+    """Build a registry exporting one runtime's gauges."""
+    from prometheus_client import CollectorRegistry
+
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(RuntimeCollector(sources))
+    return registry
+
+
+def render_metrics(runtime_registry: "CollectorRegistry") -> bytes:
+    """
+    Render the process-wide metrics and one runtime's gauges.
+
+    The default registry also carries the client's process and GC collectors.
+    """
+    from prometheus_client import REGISTRY, generate_latest
+
+    return generate_latest(REGISTRY) + generate_latest(runtime_registry)
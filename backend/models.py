@@ -1,12 +1,50 @@
 """Pydantic models for the Agentic PRD Generation platform."""
 
+from collections.abc import Mapping
 from datetime import UTC, datetime
-from typing import Any, Literal
+from functools import cached_property
+from hashlib import sha256
+from typing import Any, Literal, Self
 
+import orjson
 from pydantic import BaseModel, Field
 
 WorkflowStep = Literal["Outline", "Draft", "Critique", "Revise", "Complete", "Error"]
-AdapterType = Literal["vanilla_openai", "vanilla_google"]
+AdapterType = Literal["vanilla_openai", "vanilla_google", "fake"]
+StreamMode = Literal["snapshot", "delta"]
+PayloadFormat = Literal["json", "msgpack"]
+StreamScope = Literal["runs", "batch", "active"]
+PriorityClass = Literal["interactive", "batch"]
+ExportFormat = Literal["html", "md"]
+ProfileFormat = Literal["speedscope", "pstats", "tracemalloc"]
+TERMINAL_STEPS: frozenset[str] = frozenset({"Complete", "Error"})
+MAX_STREAM_RUN_IDS = 100
+
+EVENT_PAYLOAD_FIELDS: set[str] = {
+    "run_id",
+    "batch_id",
+    "step",
+    "adapter",
+    "content",
+    "revision",
+    "diff",
+    "error",
+    "queue_position",
+    "created_at",
+}
+_ENCODED_FIELDS = (
+    "event_json",
+    "storage_json",
+    "content_checksum",
+    "delta_event_json",
+    "progress_json",
+)
+
+
+def hash_idea(idea: str) -> str:
+    """Return a stable hash of an idea, ignoring case and whitespace differences."""
+    normalized = " ".join(idea.lower().split())
+    return sha256(normalized.encode("utf-8")).hexdigest()
 
 
 class PRDState(BaseModel, frozen=True):
@@ -18,7 +56,13 @@ class PRDState(BaseModel, frozen=True):
 
     run_id: str = Field(..., description="Unique identifier for the generation run.")
     idea: str = Field(..., description="The original product idea for the run.")
+    batch_id: str | None = Field(
+        None, description="Optional caller-chosen batch the run belongs to."
+    )
     step: WorkflowStep = Field(..., description="The current step in the workflow.")
+    adapter: AdapterType | None = Field(
+        None, description="The agent adapter generating the run."
+    )
     content: str = Field(..., description="The full Markdown content of the PRD.")
     revision: int = Field(..., description="The revision number, starting from 0.")
     diff: str | None = Field(
@@ -28,25 +72,97 @@ class PRDState(BaseModel, frozen=True):
         None,
         description="Terminal error details when the run ends in an error state.",
     )
+    queue_position: int | None = Field(
+        None,
+        description="1-based position in the admission queue while the run waits.",
+    )
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(UTC),
         description="Timestamp when this state was created (UTC).",
     )
 
-    def to_event_payload(self) -> dict[str, Any]:
-        """Return the public SSE payload for this run state."""
-        return self.model_dump(
-            mode="json",
+    @classmethod
+    def from_json(cls, data: str | bytes) -> Self:
+        """Decode a state previously encoded with `storage_json`."""
+        return cls.model_validate(orjson.loads(data))
+
+    @cached_property
+    def event_json(self) -> str:
+        """
+        The public SSE payload as JSON, encoded once per state.
+
+        Every subscriber, and the storage encoding, reuse this string.
+        """
+        payload = self.model_dump(include=EVENT_PAYLOAD_FIELDS)
+        return orjson.dumps(payload, option=orjson.OPT_UTC_Z).decode()
+
+    @cached_property
+    def storage_json(self) -> str:
+        """
+        The full state as JSON, built by extending the encoded event payload.
+
+        Only the private `idea` field is encoded here; the potentially large
+        content is reused from `event_json` instead of being encoded again.
+        """
+        idea_json = orjson.dumps(self.idea).decode()
+        return f'{self.event_json[:-1]},"idea":{idea_json}}}'
+
+    @cached_property
+    def content_checksum(self) -> str:
+        """SHA-256 hex digest of the content, used to verify applied patches."""
+        return sha256(self.content.encode("utf-8")).hexdigest()
+
+    @cached_property
+    def delta_event_json(self) -> str:
+        """
+        The SSE payload for delta streams, encoded once per state.
+
+        Instead of the full content it carries `patch`, the diff-match-patch
+        patch from the previous revision, and the checksum of the patched
+        content. States without a diff carry an empty patch.
+        """
+        payload = self.model_dump(include=EVENT_PAYLOAD_FIELDS - {"content", "diff"})
+        payload["base_revision"] = self.revision - 1
+        payload["patch"] = self.diff or ""
+        payload["checksum"] = self.content_checksum
+        return orjson.dumps(payload, option=orjson.OPT_UTC_Z).decode()
+
+    @cached_property
+    def progress_json(self) -> str:
+        """
+        A compact progress payload without content, encoded once per state.
+
+        Multi-run streams send this instead of the content, reporting only the
+        step, revision and content and diff sizes in characters.
+        """
+        payload = self.model_dump(
             include={
                 "run_id",
+                "batch_id",
                 "step",
-                "content",
                 "revision",
-                "diff",
                 "error",
+                "queue_position",
                 "created_at",
-            },
+            }
         )
+        payload["content_length"] = len(self.content)
+        payload["diff_length"] = len(self.diff or "")
+        return orjson.dumps(payload, option=orjson.OPT_UTC_Z).decode()
+
+    def to_event_payload(self) -> dict[str, Any]:
+        """Return the public SSE payload for this run state."""
+        payload: dict[str, Any] = orjson.loads(self.event_json)
+        return payload
+
+    def model_copy(
+        self, *, update: Mapping[str, Any] | None = None, deep: bool = False
+    ) -> Self:
+        """Copy the state, dropping cached encodings of the original."""
+        copied = super().model_copy(update=update, deep=deep)
+        for name in _ENCODED_FIELDS:
+            copied.__dict__.pop(name, None)
+        return copied
 
 
 class GeneratePRDRequest(BaseModel):
@@ -59,6 +175,33 @@ class GeneratePRDRequest(BaseModel):
         "vanilla_openai",
         description="The implemented agent adapter to use for the run.",
     )
+    batch_id: str | None = Field(
+        None,
+        description="Optional batch to group the run under for batch streams.",
+        min_length=1,
+        max_length=100,
+    )
+    priority: PriorityClass | None = Field(
+        None,
+        description=(
+            "Scheduling class of the run's LLM calls; defaults to `batch` for "
+            "runs with a batch_id and `interactive` otherwise."
+        ),
+    )
+    profile: bool = Field(
+        False,
+        description=(
+            "Capture a CPU profile and allocation snapshot of the run; only "
+            "accepted when profiling is enabled on the instance."
+        ),
+    )
+
+    @property
+    def priority_class(self) -> PriorityClass:
+        """The requested priority, or the default for the run's batch_id."""
+        if self.priority is not None:
+            return self.priority
+        return "batch" if self.batch_id is not None else "interactive"
 
 
 class GeneratePRDResponse(BaseModel):
@@ -67,3 +210,65 @@ class GeneratePRDResponse(BaseModel):
     """
 
     run_id: str = Field(..., description="The unique identifier for the new run.")
+
+
+class StreamCommand(BaseModel):
+    """
+    A WebSocket client command to start or stop streaming runs.
+    """
+
+    action: Literal["subscribe", "unsubscribe"] = Field(
+        ..., description="Whether to start or stop streaming the runs."
+    )
+    run_ids: list[str] = Field(
+        ...,
+        description="The runs to subscribe to or unsubscribe from.",
+        min_length=1,
+        max_length=MAX_STREAM_RUN_IDS,
+    )
+
+
+class RunSummary(BaseModel):
+    """
+    Lightweight description of a run's latest state, without its content.
+    """
+
+    run_id: str = Field(..., description="Unique identifier for the generation run.")
+    batch_id: str | None = Field(None, description="The batch the run belongs to.")
+    step: WorkflowStep = Field(..., description="The current step in the workflow.")
+    adapter: AdapterType | None = Field(
+        None, description="The agent adapter generating the run."
+    )
+    revision: int = Field(..., description="The latest revision number.")
+    error: str | None = Field(None, description="Terminal error details, if any.")
+    created_at: datetime = Field(
+        ..., description="Timestamp when the latest state was created (UTC)."
+    )
+
+    @classmethod
+    def from_state(cls, state: PRDState) -> "RunSummary":
+        """Summarize a full run state."""
+        return cls.model_validate(
+            state.model_dump(
+                include={
+                    "run_id",
+                    "batch_id",
+                    "step",
+                    "adapter",
+                    "revision",
+                    "error",
+                    "created_at",
+                }
+            )
+        )
+
+
+class RunListResponse(BaseModel):
+    """
+    Defines one page of the run listing.
+    """
+
+    runs: list[RunSummary] = Field(..., description="Runs, newest first.")
+    next_cursor: str | None = Field(
+        None, description="Opaque cursor for the next page, if there is one."
+    )
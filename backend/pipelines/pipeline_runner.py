@@ -1,11 +1,14 @@
 """Functional async pipeline for running the agentic workflow."""
 
-from collections.abc import Awaitable, Callable
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from time import perf_counter
 
-from diff_match_patch import diff_match_patch
 import structlog
 
 from backend.agents.base_adapter import AdapterError, BaseAdapter
+from backend.metrics import observe_diff, observe_run_revisions, observe_step
 from backend.models import PRDState
 from backend.pipelines.prompts import (
     CRITIQUE_PROMPT,
@@ -13,24 +16,55 @@ from backend.pipelines.prompts import (
     OUTLINE_PROMPT,
     REVISE_PROMPT,
 )
+from backend.services.admission import AdmissionTicket
 from backend.services.streamer import StreamerService
 from backend.state.base import StateStore
+from backend.tracing import start_span
 
 logger = structlog.get_logger(__name__)
 
 MAX_REVISIONS = 3
 APPROVAL_PHRASE = "No issues found."
 AUTO_DIFF = object()
+POST_DRAFT_STEPS = frozenset({"Draft", "Critique", "Revise"})
 
 
 def create_diff(text1: str, text2: str) -> str:
     """Generates a unified diff between two texts."""
+    # Imported on first use to keep the diff engine out of API start-up.
+    from diff_match_patch import diff_match_patch
+
+    started = perf_counter()
     dmp = diff_match_patch()
     patches = dmp.patch_make(text1, text2)
     diff_text: str = dmp.patch_toText(patches)
+    observe_diff(perf_counter() - started)
     return diff_text
 
 
+@contextmanager
+def _instrument_step(state: PRDState, step: str) -> Iterator[None]:
+    """Trace a pipeline step and record its latency, even when it fails."""
+    started = perf_counter()
+    outcome = "error"
+    try:
+        with start_span(
+            f"pipeline.{step.lower()}",
+            {
+                "prd.run_id": state.run_id,
+                "prd.step": step,
+                "prd.revision": state.revision,
+            },
+        ):
+            yield
+        outcome = "success"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        observe_step(step, perf_counter() - started, outcome=outcome)
+
+
 async def outline_step(
     current_state: PRDState,
     state_store: StateStore,
@@ -39,10 +73,11 @@ async def outline_step(
 ) -> PRDState:
     """Generate the outline for the PRD."""
     logger.info("pipeline_step_started", run_id=current_state.run_id, step="Outline")
-    prompt = OUTLINE_PROMPT.format(idea=current_state.idea)
-    new_content: str = await adapter.call_llm(prompt)
-    new_state = _next_state(current_state, step="Outline", content=new_content)
-    await _persist_state(new_state, state_store, streamer)
+    with _instrument_step(current_state, "Outline"):
+        prompt = OUTLINE_PROMPT.format(idea=current_state.idea)
+        new_content: str = await adapter.call_llm(prompt)
+        new_state = _next_state(current_state, step="Outline", content=new_content)
+        await _persist_state(new_state, state_store, streamer)
     return new_state
 
 
@@ -54,10 +89,11 @@ async def draft_step(
 ) -> PRDState:
     """Generate the draft for the PRD."""
     logger.info("pipeline_step_started", run_id=current_state.run_id, step="Draft")
-    prompt = DRAFT_PROMPT.format(outline=current_state.content)
-    new_content: str = await adapter.call_llm(prompt)
-    new_state = _next_state(current_state, step="Draft", content=new_content)
-    await _persist_state(new_state, state_store, streamer)
+    with _instrument_step(current_state, "Draft"):
+        prompt = DRAFT_PROMPT.format(outline=current_state.content)
+        new_content: str = await adapter.call_llm(prompt)
+        new_state = _next_state(current_state, step="Draft", content=new_content)
+        await _persist_state(new_state, state_store, streamer)
     return new_state
 
 
@@ -75,15 +111,16 @@ async def critique_and_revise_loop(
             step="Critique",
             revision_attempt=i + 1,
         )
-        critique_prompt = CRITIQUE_PROMPT.format(draft=current_state.content)
-        critique: str = await adapter.call_llm(critique_prompt)
-        critique_state = _next_state(
-            current_state,
-            step="Critique",
-            content=current_state.content,
-            diff=None,
-        )
-        await _persist_state(critique_state, state_store, streamer)
+        with _instrument_step(current_state, "Critique"):
+            critique_prompt = CRITIQUE_PROMPT.format(draft=current_state.content)
+            critique: str = await adapter.call_llm(critique_prompt)
+            critique_state = _next_state(
+                current_state,
+                step="Critique",
+                content=current_state.content,
+                diff=None,
+            )
+            await _persist_state(critique_state, state_store, streamer)
         current_state = critique_state
 
         if APPROVAL_PHRASE in critique:
@@ -96,27 +133,28 @@ async def critique_and_revise_loop(
             step="Revise",
             revision_attempt=i + 1,
         )
-        revise_prompt = REVISE_PROMPT.format(
-            draft=current_state.content, critique=critique
-        )
-        new_content: str = await adapter.call_llm(revise_prompt)
-        revised_state = _next_state(
-            current_state,
-            step="Revise",
-            content=new_content,
-        )
-        await _persist_state(revised_state, state_store, streamer)
+        with _instrument_step(current_state, "Revise"):
+            revise_prompt = REVISE_PROMPT.format(
+                draft=current_state.content, critique=critique
+            )
+            new_content: str = await adapter.call_llm(revise_prompt)
+            revised_state = _next_state(
+                current_state,
+                step="Revise",
+                content=new_content,
+            )
+            await _persist_state(revised_state, state_store, streamer)
         current_state = revised_state
 
     return current_state
 
 
-PIPELINE_STAGES: list[
-    Callable[
-        [PRDState, StateStore, BaseAdapter, StreamerService | None],
-        Awaitable[PRDState],
-    ]
-] = [outline_step, draft_step]
+PipelineStage = Callable[
+    [PRDState, StateStore, BaseAdapter, StreamerService | None],
+    Awaitable[PRDState],
+]
+
+PIPELINE_STAGES: list[PipelineStage] = [outline_step, draft_step]
 
 
 async def run_pipeline(
@@ -124,58 +162,125 @@ async def run_pipeline(
     state_store: StateStore,
     adapter: BaseAdapter,
     streamer: StreamerService | None = None,
+    ticket: AdmissionTicket | None = None,
 ) -> None:
     """
     Runs the full agentic pipeline from outline to completion.
+
+    With an admission `ticket`, the run first waits until it is admitted,
+    publishing a new revision whenever its queue position changes, and frees
+    its slot when it finishes.
+
+    Every stage persists its result, so `initial_state` may also be the
+    checkpoint of a run handed off by a draining worker; stages it already
+    completed are skipped.
     """
     current_state = initial_state
+    with start_span(
+        "run_pipeline",
+        {
+            "prd.run_id": initial_state.run_id,
+            "prd.adapter": initial_state.adapter,
+            "prd.start_step": initial_state.step,
+            "prd.start_revision": initial_state.revision,
+        },
+    ):
+        try:
+            if ticket is not None:
+                current_state = await _wait_for_admission(
+                    current_state, ticket, state_store, streamer
+                )
 
-    try:
-        for step_func in PIPELINE_STAGES:
-            current_state = await step_func(
+            for step_func in _remaining_stages(current_state):
+                current_state = await step_func(
+                    current_state,
+                    state_store,
+                    adapter,
+                    streamer,
+                )
+
+            current_state = await critique_and_revise_loop(
+                current_state, state_store, adapter, streamer
+            )
+
+            final_state = _next_state(
                 current_state,
-                state_store,
-                adapter,
-                streamer,
+                step="Complete",
+                content=current_state.content,
+                diff=None,
             )
+            await _persist_state(final_state, state_store, streamer)
+            observe_run_revisions("complete", final_state.revision)
+            logger.info("pipeline_completed", run_id=current_state.run_id)
 
-        current_state = await critique_and_revise_loop(
-            current_state, state_store, adapter, streamer
-        )
+        except AdapterError as exc:
+            logger.warning(
+                "pipeline_failed",
+                run_id=current_state.run_id,
+                provider=exc.provider,
+                exc_info=True,
+            )
+            await _persist_terminal_error(
+                current_state=current_state,
+                state_store=state_store,
+                streamer=streamer,
+                error_message=str(exc),
+            )
+        except Exception as exc:
+            logger.exception(
+                "pipeline_failed_unexpectedly",
+                run_id=current_state.run_id,
+            )
+            await _persist_terminal_error(
+                current_state=current_state,
+                state_store=state_store,
+                streamer=streamer,
+                error_message=f"Unexpected pipeline error: {exc}",
+            )
+        finally:
+            if ticket is not None:
+                ticket.release()
 
-        final_state = _next_state(
-            current_state,
-            step="Complete",
-            content=current_state.content,
-            diff=None,
-        )
-        await _persist_state(final_state, state_store, streamer)
-        logger.info("pipeline_completed", run_id=current_state.run_id)
 
-    except AdapterError as exc:
-        logger.warning(
-            "pipeline_failed",
-            run_id=current_state.run_id,
-            provider=exc.provider,
-            exc_info=True,
-        )
-        await _persist_terminal_error(
-            current_state=current_state,
-            state_store=state_store,
-            streamer=streamer,
-            error_message=str(exc),
-        )
-    except Exception as exc:
-        logger.exception(
-            "pipeline_failed_unexpectedly",
-            run_id=current_state.run_id,
-        )
-        await _persist_terminal_error(
-            current_state=current_state,
-            state_store=state_store,
-            streamer=streamer,
-            error_message=f"Unexpected pipeline error: {exc}",
-        )
+def _remaining_stages(state: PRDState) -> list[PipelineStage]:
+    """
+    Return the pipeline stages a run has not completed yet.
+
+    Only the outline stage saves an `Outline` state with a diff; the initial
+    state and queue position updates carry none.
+    """
+    if state.step in POST_DRAFT_STEPS:
+        return []
+    if state.step == "Outline" and state.diff is not None:
+        return PIPELINE_STAGES[1:]
+    return PIPELINE_STAGES
+
+
+async def _wait_for_admission(
+    current_state: PRDState,
+    ticket: AdmissionTicket,
+    state_store: StateStore,
+    streamer: StreamerService | None,
+) -> PRDState:
+    """Wait for admission, persisting every change of the run's queue position."""
+    with start_span(
+        "pipeline.admission_wait",
+        {"prd.run_id": current_state.run_id, "prd.queue_position": ticket.position},
+    ):
+        while True:
+            queue_position = None if ticket.admitted else ticket.position
+            if queue_position != current_state.queue_position:
+                current_state = _next_state(
+                    current_state,
+                    step=current_state.step,
+                    content=current_state.content,
+                    diff=None,
+                    queue_position=queue_position,
+                )
+                await _persist_state(current_state, state_store, streamer)
+            if ticket.admitted:
+                return current_state
+            await ticket.wait_for_change()
 
 
 def _next_state(
@@ -185,6 +290,7 @@ def _next_state(
     content: str,
     diff: str | None | object = AUTO_DIFF,
     error: str | None = None,
+    queue_position: int | None = None,
 ) -> PRDState:
     """Build the next immutable PRD state."""
     next_diff = (
@@ -193,11 +299,14 @@ def _next_state(
     return PRDState(
         run_id=current_state.run_id,
         idea=current_state.idea,
+        batch_id=current_state.batch_id,
         step=step,
+        adapter=current_state.adapter,
         content=content,
         revision=current_state.revision + 1,
         diff=next_diff,
         error=error,
+        queue_position=queue_position,
     )
 
 
@@ -209,7 +318,7 @@ async def _persist_state(
     """Persist a state update and publish it to subscribers."""
     await state_store.save(state)
     if streamer:
-        await streamer.publish(state.run_id, state.to_event_payload())
+        await streamer.publish(state.run_id, state)
 
 
 async def _persist_terminal_error(
@@ -227,6 +336,7 @@ async def _persist_terminal_error(
         diff=None,
         error=error_message,
     )
+    observe_run_revisions("error", error_state.revision)
     try:
         await _persist_state(error_state, state_store, streamer)
     except Exception:
@@ -0,0 +1,98 @@
+"""Admin endpoints for on-demand profiling."""
+
+from dataclasses import asdict
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from backend.dependencies import get_profiler, get_settings
+from backend.models import ProfileFormat
+from backend.services.profiler import PROFILE_FILES, ProfileBusyError, ProfilerService
+from backend.settings import AppSettings
+
+
+def _require_admin(
+    settings: Annotated[AppSettings, Depends(get_settings)],
+    admin_token: Annotated[str | None, Header(alias="X-Admin-Token")] = None,
+) -> None:
+    """
+    Allow the request only for admins.
+
+    With `ADMIN_TOKEN` set, callers must send it in `X-Admin-Token`; without
+    it, the admin routes are only open on instances running with `DEBUG`.
+    """
+    if settings.admin_token is not None:
+        if admin_token is None or not secrets.compare_digest(
+            admin_token.encode("utf-8"), settings.admin_token.encode("utf-8")
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="A valid X-Admin-Token header is required.",
+            )
+    elif not settings.debug:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints require ADMIN_TOKEN or DEBUG to be set.",
+        )
+
+
+router = APIRouter(dependencies=[Depends(_require_admin)], include_in_schema=False)
+
+
+def _require_profiler(
+    profiler: Annotated[ProfilerService | None, Depends(get_profiler)],
+) -> ProfilerService:
+    """Return the profiler, or answer 404 when profiling is disabled."""
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is not enabled on this instance.",
+        )
+    return profiler
+
+
+@router.post("/profile", summary="Profile the whole process for a while")
+async def profile_process(
+    profiler: Annotated[ProfilerService, Depends(_require_profiler)],
+    seconds: Annotated[float, Query(gt=0)] = 10.0,
+) -> dict[str, object]:
+    """
+    Sample everything the event loop runs for `seconds` and save the profile.
+
+    The response arrives when the capture is saved; `seconds` is capped at
+    `PROFILING_MAX_SECONDS`. Only one process capture runs at a time, so a
+    second request gets 409.
+    """
+    try:
+        capture = await profiler.profile_process(seconds)
+    except ProfileBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=str(exc)
+        ) from exc
+    return asdict(capture)
+
+
+@router.get("/profiles/{profile_id}", summary="Download a saved profile")
+async def download_profile(
+    profile_id: str,
+    profiler: Annotated[ProfilerService, Depends(_require_profiler)],
+    profile_format: Annotated[ProfileFormat, Query(alias="format")] = "speedscope",
+) -> FileResponse:
+    """
+    Download a run or process profile.
+
+    Run profiles are saved under their run id when the run finishes.
+    `speedscope` opens in https://www.speedscope.app, `pstats` loads with
+    `pstats.Stats` or snakeviz, and `tracemalloc` lists the source lines whose
+    allocations grew the most during the capture.
+    """
+    path = profiler.path(profile_id, profile_format)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found."
+        )
+    return FileResponse(
+        path, media_type=PROFILE_FILES[profile_format][1], filename=path.name
+    )
@@ -1,26 +1,61 @@
 """API routes for PRD and Tech Spec generation workflows."""
 
-from collections.abc import AsyncIterator
-import json
-from typing import Annotated
+from collections.abc import AsyncIterator, Awaitable, Callable, MutableMapping
+from typing import Annotated, Any
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sse_starlette.sse import EventSourceResponse
+import structlog
 
 from backend.agents.base_adapter import BaseAdapter
 from backend.dependencies import (
+    get_admission_controller,
     get_agent_adapter,
+    get_pipeline_supervisor,
+    get_profiler,
+    get_settings,
     get_state_store,
     get_streamer_service,
+    get_tenant,
+)
+from backend.models import (
+    MAX_STREAM_RUN_IDS,
+    TERMINAL_STEPS,
+    GeneratePRDRequest,
+    GeneratePRDResponse,
+    PRDState,
+    StreamMode,
+    StreamScope,
+    hash_idea,
 )
-from backend.models import GeneratePRDRequest, GeneratePRDResponse, PRDState
 from backend.pipelines.pipeline_runner import run_pipeline
-from backend.services.streamer import StreamerService
+from backend.services.admission import AdmissionController, AdmissionRejectedError
+from backend.services.profiler import ProfilerService
+from backend.services.streamer import (
+    ALL_RUNS,
+    StreamerService,
+    StreamEvent,
+    SubscriberLimitError,
+    SubscriptionClosedError,
+)
+from backend.services.supervisor import PipelineSupervisor
+from backend.settings import AppSettings
 from backend.state.base import StateStore
+from backend.tracing import extract_context, start_span
+
+logger = structlog.get_logger(__name__)
 
 router = APIRouter()
-TERMINAL_STEPS = {"Complete", "Error"}
 
 
 @router.post(
@@ -28,38 +63,147 @@ TERMINAL_STEPS = {"Complete", "Error"}
     response_model=GeneratePRDResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Start a new PRD generation run",
+    responses={
+        status.HTTP_200_OK: {
+            "model": GeneratePRDResponse,
+            "description": "An earlier run with the same idempotency key.",
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Too many active and queued runs; see `Retry-After`.",
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "This instance is draining for shutdown.",
+        },
+    },
 )
 async def generate_prd(
     request: GeneratePRDRequest,
-    background_tasks: BackgroundTasks,
+    http_request: Request,
+    response: Response,
+    settings: Annotated[AppSettings, Depends(get_settings)],
     state_store: Annotated[StateStore, Depends(get_state_store)],
     streamer_service: Annotated[StreamerService, Depends(get_streamer_service)],
     agent_adapter: Annotated[BaseAdapter, Depends(get_agent_adapter)],
+    admission: Annotated[AdmissionController, Depends(get_admission_controller)],
+    pipelines: Annotated[PipelineSupervisor, Depends(get_pipeline_supervisor)],
+    profiler: Annotated[ProfilerService | None, Depends(get_profiler)],
+    tenant: Annotated[str, Depends(get_tenant)],
+    idempotency_key: Annotated[
+        str | None, Header(alias="Idempotency-Key", min_length=1, max_length=255)
+    ] = None,
 ) -> GeneratePRDResponse:
     """
     Initiates a new agentic workflow to generate a PRD.
+
+    A request with an `Idempotency-Key` header, or any request when
+    `IDEMPOTENCY_AUTO_KEY` derives a key from the normalized idea and adapter,
+    claims that key in the state store for `IDEMPOTENCY_TTL_SECONDS`. Repeats
+    within the TTL return the original run_id with status 200 instead of
+    starting another pipeline.
+
+    Runs beyond `MAX_ACTIVE_RUNS`, or `MAX_ACTIVE_RUNS_PER_ADAPTER` for the
+    selected adapter, wait in an admission queue and report their
+    `queue_position` in streamed states until they start. When the queue
+    already holds `MAX_QUEUED_RUNS`, the request is rejected with 429 and a
+    `Retry-After` estimated from recent run durations.
+
+    While the instance drains for shutdown, new runs are refused with 503 so
+    the client retries on another instance.
+
+    With tracing enabled, the request's span is the root of the run's trace,
+    continuing an incoming `traceparent`, and the pipeline's spans are its
+    children.
+
+    With `profile` set, the run is captured by the profiler and its profile is
+    downloadable from `/admin/profiles/{run_id}` once it finishes. Instances
+    without `PROFILING_ENABLED` reject such requests with 400.
     """
+    if pipelines.draining:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="This instance is shutting down; retry on another instance.",
+        )
+    if request.profile and profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profiling is not enabled on this instance.",
+        )
     run_id = str(uuid.uuid4())
-    initial_state = PRDState(
-        run_id=run_id,
-        idea=request.idea,
-        step="Outline",
-        content=f"# PRD for {request.idea}\n\n_Starting outline generation..._",
-        revision=0,
-        error=None,
-    )
-    await state_store.save(initial_state)
-
-    # Kick off the actual generation pipeline in the background.
-    background_tasks.add_task(
-        run_pipeline,
-        initial_state=initial_state,
-        state_store=state_store,
-        adapter=agent_adapter,
-        streamer=streamer_service,
-    )
+    with start_span(
+        "generate_prd",
+        {
+            "prd.run_id": run_id,
+            "prd.adapter": request.adapter,
+            "prd.priority": request.priority_class,
+            "prd.batch_id": request.batch_id,
+            "prd.idea.chars": len(request.idea),
+        },
+        context=extract_context(http_request.headers),
+    ):
+        # Replays are answered before admission, so a retry of an admitted run
+        # gets its run_id back even when the queue is full.
+        key = _idempotency_key(
+            request, idempotency_key, tenant, auto=settings.idempotency_auto_key
+        )
+        if key is not None:
+            claimed_run_id = await state_store.claim_idempotency_key(
+                key, run_id, settings.idempotency_ttl_seconds
+            )
+            if claimed_run_id != run_id:
+                logger.info(
+                    "generate_prd_deduplicated",
+                    run_id=claimed_run_id,
+                    explicit_key=idempotency_key is not None,
+                )
+                response.status_code = status.HTTP_200_OK
+                response.headers["Idempotent-Replayed"] = "true"
+                return GeneratePRDResponse(run_id=claimed_run_id)
+
+        try:
+            ticket = admission.admit(run_id, request.adapter)
+        except AdmissionRejectedError as exc:
+            if key is not None:
+                await _release_idempotency_key(state_store, key, run_id)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(exc),
+                headers={"Retry-After": str(exc.retry_after_seconds)},
+            ) from exc
+
+        initial_state = PRDState(
+            run_id=run_id,
+            idea=request.idea,
+            batch_id=request.batch_id,
+            step="Outline",
+            adapter=request.adapter,
+            content=f"# PRD for {request.idea}\n\n_Starting outline generation..._",
+            revision=0,
+            error=None,
+            queue_position=None if ticket.admitted else ticket.position,
+        )
+        try:
+            await state_store.save(initial_state)
+        except BaseException:
+            ticket.release()
+            if key is not None:
+                # Retries must start a new run, not replay one that never existed.
+                await _release_idempotency_key(state_store, key, run_id)
+            raise
+        await streamer_service.publish(run_id, initial_state)
+
+        # Kick off the actual generation pipeline as a tracked task.
+        pipeline = run_pipeline(
+            initial_state=initial_state,
+            state_store=state_store,
+            adapter=agent_adapter,
+            streamer=streamer_service,
+            ticket=ticket,
+        )
+        if request.profile and profiler is not None:
+            pipeline = profiler.profile_run(run_id, pipeline)
+        await pipelines.start(run_id, pipeline, tenant=tenant)
 
-    return GeneratePRDResponse(run_id=run_id)
+        return GeneratePRDResponse(run_id=run_id)
 
 
 @router.get(
@@ -70,9 +214,33 @@ async def stream_prd(
     run_id: str,
     state_store: Annotated[StateStore, Depends(get_state_store)],
     streamer_service: Annotated[StreamerService, Depends(get_streamer_service)],
+    mode: Annotated[StreamMode, Query()] = "snapshot",
+    last_event_id: Annotated[str | None, Header(alias="Last-Event-ID")] = None,
 ) -> EventSourceResponse:
-    """Establish an SSE connection for the given run ID."""
-    queue = await streamer_service.add_subscriber(run_id)
+    """
+    Establish an SSE connection for the given run ID.
+
+    Every event's `id` is its revision. In `snapshot` mode every event is a
+    full `message`. In `delta` mode the first event is a full `snapshot` and
+    each following consecutive revision is a `delta` carrying only a patch; a
+    `snapshot` is sent again whenever the subscriber missed a revision.
+
+    A reconnecting client that sends `Last-Event-ID` is replayed only the
+    events it missed, from the streamer's per-run replay buffer, instead of
+    the latest snapshot. If the buffer no longer covers the gap, the latest
+    snapshot is sent as usual.
+
+    Heartbeat comments keep idle connections alive through proxies, and the
+    subscriber is removed as soon as the client disconnects or a send stalls.
+    Connections beyond the streamer's subscriber caps are rejected with 503.
+    """
+    try:
+        queue = await streamer_service.add_subscriber(run_id)
+    except SubscriberLimitError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+        ) from exc
     latest_state = await state_store.get(run_id)
     if latest_state is None:
         await streamer_service.remove_subscriber(run_id, queue)
@@ -81,28 +249,230 @@ async def stream_prd(
             detail=f"No PRD run found for run_id '{run_id}'.",
         )
 
-    async def event_publisher() -> AsyncIterator[dict[str, str]]:
-        last_revision = latest_state.revision
+    resume_revision = _parse_revision(last_event_id)
+    replay = None
+    if resume_revision is not None:
+        replay = streamer_service.replay_since(run_id, resume_revision)
+
+    async def event_publisher() -> AsyncIterator[bytes]:
         try:
-            latest_payload = latest_state.to_event_payload()
-            yield _to_sse_message(latest_payload)
-            if latest_payload["step"] in TERMINAL_STEPS:
+            if replay is None or resume_revision is None:
+                last_revision = latest_state.revision
+                yield _to_sse_message(StreamEvent(latest_state), mode)
+            else:
+                last_revision = resume_revision
+                for event in replay:
+                    yield _to_sse_message(event, mode, previous_revision=last_revision)
+                    last_revision = event.revision
+            if latest_state.step in TERMINAL_STEPS and (
+                last_revision >= latest_state.revision
+            ):
                 return
             while True:
-                payload = await queue.get()
-                revision = int(payload.get("revision", last_revision))
-                if revision <= last_revision:
+                try:
+                    event = await queue.get()
+                except SubscriptionClosedError:
+                    return
+                if event.revision <= last_revision:
                     continue
-                last_revision = revision
-                yield _to_sse_message(payload)
-                if payload["step"] in TERMINAL_STEPS:
+                yield _to_sse_message(event, mode, previous_revision=last_revision)
+                last_revision = event.revision
+                if event.state.step in TERMINAL_STEPS:
                     return
         finally:
             await streamer_service.remove_subscriber(run_id, queue)
 
-    return EventSourceResponse(event_publisher())
+    async def unsubscribe() -> None:
+        await streamer_service.remove_subscriber(run_id, queue)
+
+    return _event_source_response(event_publisher(), streamer_service, unsubscribe)
+
+
+@router.get(
+    "/stream",
+    summary="Stream progress for many runs over one SSE connection",
+)
+async def stream_runs(
+    state_store: Annotated[StateStore, Depends(get_state_store)],
+    streamer_service: Annotated[StreamerService, Depends(get_streamer_service)],
+    run_ids: Annotated[list[str] | None, Query()] = None,
+    scope: Annotated[StreamScope, Query()] = "runs",
+    batch_id: Annotated[str | None, Query()] = None,
+) -> EventSourceResponse:
+    """
+    Establish one SSE connection streaming the progress of many runs.
+
+    With `scope=runs`, the given `run_ids` (repeated or comma-separated) are
+    streamed and the stream ends once all of them have finished. With
+    `scope=active`, every run active in this process is streamed, including
+    runs started after connecting; `scope=batch` does the same for the runs of
+    `batch_id` only. Those two scopes stay open.
+
+    Every event is a `progress` event tagged with its `run_id` and carrying
+    the step, revision and content and diff sizes, never the content. All
+    runs share a single subscriber queue, which coalesces each run's unread
+    events and never drops a terminal one, so every run's end is seen.
+    """
+    requested = _split_run_ids(run_ids)
+    if scope == "runs" and not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="run_ids is required when scope is 'runs'.",
+        )
+    if len(requested) > MAX_STREAM_RUN_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_STREAM_RUN_IDS} run_ids can be streamed at once.",
+        )
+    if scope == "batch" and batch_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="batch_id is required when scope is 'batch'.",
+        )
+
+    queue = streamer_service.new_subscription(scope)
+    topics = requested if scope == "runs" else [ALL_RUNS]
+    subscribed: list[str] = []
+
+    async def unsubscribe() -> None:
+        for topic in subscribed:
+            await streamer_service.remove_subscriber(topic, queue)
+
+    try:
+        for topic in topics:
+            await streamer_service.add_subscriber(topic, queue)
+            subscribed.append(topic)
+    except SubscriberLimitError as exc:
+        await unsubscribe()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+        ) from exc
+
+    if scope == "runs":
+        states = await state_store.get_many(requested)
+        initial = [StreamEvent(state) for state in states if state is not None]
+        if not initial:
+            await unsubscribe()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="None of the requested PRD runs were found.",
+            )
+    else:
+        initial = streamer_service.active_runs()
+    if batch_id is not None:
+        initial = [event for event in initial if event.state.batch_id == batch_id]
+    pending = {
+        event.state.run_id
+        for event in initial
+        if event.state.step not in TERMINAL_STEPS
+    }
+
+    async def event_publisher() -> AsyncIterator[bytes]:
+        last_revisions: dict[str, int] = {}
+        try:
+            for event in initial:
+                last_revisions[event.state.run_id] = event.revision
+                yield event.wire("progress")
+            if scope == "runs" and not pending:
+                return
+            while True:
+                try:
+                    event = await queue.get()
+                except SubscriptionClosedError:
+                    return
+                state = event.state
+                if batch_id is not None and state.batch_id != batch_id:
+                    continue
+                if event.revision <= last_revisions.get(state.run_id, -1):
+                    continue
+                yield event.wire("progress")
+                if state.step not in TERMINAL_STEPS:
+                    last_revisions[state.run_id] = event.revision
+                    continue
+                last_revisions.pop(state.run_id, None)
+                pending.discard(state.run_id)
+                if scope == "runs" and not pending:
+                    return
+        finally:
+            await unsubscribe()
+
+    return _event_source_response(event_publisher(), streamer_service, unsubscribe)
+
+
+def _idempotency_key(
+    request: GeneratePRDRequest,
+    header_value: str | None,
+    tenant: str,
+    *,
+    auto: bool,
+) -> str | None:
+    """
+    Return the tenant-scoped idempotency key for a request, if it has one.
+
+    Keys are prefixed with the tenant, so tenants that happen to send the same
+    key or idea never replay each other's runs.
+    """
+    if header_value is not None:
+        return f"key:{tenant}:{header_value}"
+    if auto:
+        return f"idea:{tenant}:{request.adapter}:{hash_idea(request.idea)}"
+    return None
+
+
+async def _release_idempotency_key(
+    state_store: StateStore, key: str, run_id: str
+) -> None:
+    """Drop a run's idempotency claim, logging rather than raising on failure."""
+    try:
+        await state_store.release_idempotency_key(key, run_id)
+    except Exception:
+        logger.exception("idempotency_key_release_failed", run_id=run_id)
+
+
+def _event_source_response(
+    events: AsyncIterator[bytes],
+    streamer_service: StreamerService,
+    unsubscribe: Callable[[], Awaitable[None]],
+) -> EventSourceResponse:
+    """
+    Wrap an event iterator in an SSE response with heartbeats.
+
+    The subscriber is removed as soon as the client disconnects, and sends
+    that stall longer than the streamer's send timeout end the stream.
+    """
+
+    async def on_client_close(_message: MutableMapping[str, Any]) -> None:
+        await unsubscribe()
+
+    return EventSourceResponse(
+        events,
+        ping=streamer_service.heartbeat_seconds,
+        send_timeout=streamer_service.send_timeout_seconds,
+        client_close_handler_callable=on_client_close,
+    )
+
+
+def _split_run_ids(values: list[str] | None) -> list[str]:
+    """Flatten repeated and comma-separated run ids, dropping duplicates."""
+    run_ids = (part.strip() for value in values or [] for part in value.split(","))
+    return list(dict.fromkeys(run_id for run_id in run_ids if run_id))
+
+
+def _to_sse_message(
+    event: StreamEvent,
+    mode: StreamMode = "snapshot",
+    previous_revision: int | None = None,
+) -> bytes:
+    """Pick the shared SSE wire encoding of an event for this subscriber."""
+    return event.wire(event.kind_for(mode, previous_revision))
 
 
-def _to_sse_message(payload: dict[str, object]) -> dict[str, str]:
-    """Serialize a state payload into an SSE message."""
-    return {"event": "message", "data": json.dumps(payload)}
+def _parse_revision(last_event_id: str | None) -> int | None:
+    """Parse a `Last-Event-ID` header into a revision, ignoring bad values."""
+    if last_event_id is None:
+        return None
+    try:
+        return int(last_event_id)
+    except ValueError:
+        return None
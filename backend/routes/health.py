@@ -1,9 +1,12 @@
 """Health and readiness endpoints."""
 
-from fastapi import APIRouter, Depends, Request, status
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse
 
 from backend.dependencies import get_runtime
+from backend.metrics import CONTENT_TYPE, render_metrics
 from backend.runtime import AppRuntime
 
 router = APIRouter()
@@ -25,16 +28,73 @@ async def health_check(
 async def readiness_check(
     runtime: AppRuntime = Depends(get_runtime),
 ) -> JSONResponse:
-    """Readiness check for the selected state backend."""
-    ready = await runtime.state_store.ping()
+    """
+    Readiness check for the selected state backend.
+
+    Reports `draining` from the moment shutdown starts, so load balancers stop
+    routing new work here while in-flight runs finish.
+    """
+    draining = runtime.pipelines.draining
+    ready = not draining and await runtime.readiness.check()
     status_code = status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
     payload = {
-        "status": "ready" if ready else "not_ready",
+        "status": "ready" if ready else "draining" if draining else "not_ready",
         "state_backend": runtime.state_store.backend_name,
     }
     return JSONResponse(content=payload, status_code=status_code)
 
 
+@router.get("/connections")
+async def connection_counts(
+    runtime: AppRuntime = Depends(get_runtime),
+) -> dict[str, int | None]:
+    """Stream subscriber counts and limits for this process."""
+    return asdict(runtime.streamer.connection_counts())
+
+
+@router.get("/admission")
+async def admission_stats(
+    runtime: AppRuntime = Depends(get_runtime),
+) -> dict[str, object]:
+    """Active and queued pipeline runs for this process."""
+    return asdict(runtime.admission.stats())
+
+
+@router.get("/pipelines")
+async def pipeline_stats(
+    runtime: AppRuntime = Depends(get_runtime),
+) -> dict[str, object]:
+    """Pipeline tasks running in this process and whether it is draining."""
+    return asdict(runtime.pipelines.stats())
+
+
+@router.get("/scheduler")
+async def scheduler_stats(
+    runtime: AppRuntime = Depends(get_runtime),
+) -> dict[str, object]:
+    """LLM call slots in use and queue wait times per tenant and priority."""
+    return asdict(runtime.scheduler.stats())
+
+
+@router.get("/metrics")
+async def metrics(
+    runtime: AppRuntime = Depends(get_runtime),
+) -> Response:
+    """
+    Prometheus metrics for this process.
+
+    Needs `METRICS_ENABLED` and the `observability` extra; otherwise 404.
+    """
+    if runtime.metrics_registry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Metrics are disabled or prometheus-client is not installed.",
+        )
+    return Response(
+        content=render_metrics(runtime.metrics_registry), media_type=CONTENT_TYPE
+    )
+
+
 @router.get("/")
 async def root(request: Request) -> dict[str, str]:
     """Root endpoint with API information."""
@@ -0,0 +1,247 @@
+"""API routes for listing and inspecting PRD runs."""
+
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+import orjson
+
+from backend.dependencies import get_renderer, get_state_store
+from backend.models import (
+    EVENT_PAYLOAD_FIELDS,
+    AdapterType,
+    ExportFormat,
+    RunListResponse,
+    RunSummary,
+    WorkflowStep,
+)
+from backend.services.renderer import MarkdownRenderer
+from backend.state.base import StateStore
+
+router = APIRouter()
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "html": "text/html; charset=utf-8",
+    "md": "text/markdown; charset=utf-8",
+}
+
+
+@router.get(
+    "/runs",
+    response_model=RunListResponse,
+    summary="List runs, newest first",
+)
+async def list_runs(
+    state_store: Annotated[StateStore, Depends(get_state_store)],
+    step: WorkflowStep | None = None,
+    adapter: AdapterType | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: str | None = None,
+) -> RunListResponse:
+    """
+    Lists the latest state of each run with cursor pagination.
+    """
+    try:
+        page = await state_store.list_runs(
+            step=step,
+            adapter=adapter,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    return RunListResponse(
+        runs=[RunSummary.from_state(state) for state in page.states],
+        next_cursor=page.next_cursor,
+    )
+
+
+@router.get(
+    "/runs/{run_id}",
+    summary="Get the latest state of a run",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "The run's latest state, or the requested fields of it.",
+            "content": {"application/json": {}},
+        },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The run has not changed since the given `ETag`.",
+        },
+    },
+)
+async def get_run(
+    run_id: str,
+    state_store: Annotated[StateStore, Depends(get_state_store)],
+    fields: Annotated[
+        str | None,
+        Query(description="Comma-separated payload fields to return, e.g. `step`."),
+    ] = None,
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
+) -> Response:
+    """
+    Returns the same payload as a stream event, for clients that poll.
+
+    The `ETag` is derived from the run ID and revision. A request whose
+    `If-None-Match` still matches is answered with 304 from the store's
+    revision lookup, without loading or decoding the run's state.
+    """
+    projection = _parse_fields(fields)
+    if if_none_match is not None:
+        revision = await state_store.get_revision(run_id)
+        if revision is not None and _etag_matches(
+            if_none_match, _run_etag(run_id, revision)
+        ):
+            return _not_modified(run_id, revision)
+
+    state = await state_store.get(run_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No PRD run found for run_id '{run_id}'.",
+        )
+    if if_none_match is not None and _etag_matches(
+        if_none_match, _run_etag(run_id, state.revision)
+    ):
+        return _not_modified(run_id, state.revision)
+
+    if projection is None:
+        content: str | bytes = state.event_json
+    else:
+        content = orjson.dumps(
+            state.model_dump(include=projection), option=orjson.OPT_UTC_Z
+        )
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers=_cache_headers(run_id, state.revision),
+    )
+
+
+@router.get(
+    "/runs/{run_id}/export",
+    summary="Export a finished PRD as HTML or Markdown",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"text/html": {}, "text/markdown": {}},
+            "description": "The rendered PRD.",
+        },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The export has not changed since the given `ETag`.",
+        },
+        status.HTTP_409_CONFLICT: {"description": "The run has not completed."},
+    },
+)
+async def export_run(
+    run_id: str,
+    state_store: Annotated[StateStore, Depends(get_state_store)],
+    renderer: Annotated[MarkdownRenderer, Depends(get_renderer)],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "html",
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
+) -> Response:
+    """
+    Streams a completed run's PRD as a standalone HTML page or raw Markdown.
+
+    HTML is rendered once per distinct content and served from the renderer's
+    LRU cache afterwards. The strong `ETag` is derived from the content's
+    SHA-256 checksum, so readers revalidating a shared link get a 304.
+    """
+    state = await state_store.get(run_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No PRD run found for run_id '{run_id}'.",
+        )
+    if state.step != "Complete":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Run '{run_id}' has not completed; it is at step {state.step}.",
+        )
+
+    etag = f'"{state.content_checksum}.{export_format}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, no-cache",
+        "Content-Disposition": f'inline; filename="prd-{run_id}.{export_format}"',
+    }
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if export_format == "html":
+        body = await renderer.render_html(state.content, state.content_checksum)
+        headers["Content-Security-Policy"] = (
+            "default-src 'none'; style-src 'unsafe-inline'; img-src https: data:"
+        )
+    else:
+        body = state.content.encode("utf-8")
+    headers["Content-Length"] = str(len(body))
+    return StreamingResponse(
+        _chunks(body),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
+def _chunks(body: bytes) -> Iterator[bytes]:
+    """Yield a response body in fixed-size chunks."""
+    for start in range(0, len(body), EXPORT_CHUNK_SIZE):
+        yield body[start : start + EXPORT_CHUNK_SIZE]
+
+
+def _parse_fields(fields: str | None) -> set[str] | None:
+    """
+    Parse a `fields` projection, or return None for the full payload.
+
+    Raises:
+        HTTPException: If a field is not part of the run payload.
+    """
+    if fields is None:
+        return None
+    projection = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = projection - EVENT_PAYLOAD_FIELDS
+    if unknown or not projection:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Unknown fields: {', '.join(sorted(unknown)) or fields!r}. "
+                f"Choose from: {', '.join(sorted(EVENT_PAYLOAD_FIELDS))}."
+            ),
+        )
+    return projection
+
+
+def _run_etag(run_id: str, revision: int) -> str:
+    """Return the strong ETag of a run revision."""
+    return f'"{run_id}.{revision}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Return whether an `If-None-Match` header matches an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _cache_headers(run_id: str, revision: int) -> dict[str, str]:
+    """Headers that make clients revalidate with the run's ETag."""
+    return {"ETag": _run_etag(run_id, revision), "Cache-Control": "no-cache"}
+
+
+def _not_modified(run_id: str, revision: int) -> Response:
+    """Return an empty 304 response for an unchanged run."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=_cache_headers(run_id, revision),
+    )
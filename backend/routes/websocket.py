@@ -0,0 +1,211 @@
+"""WebSocket transport that streams many runs over one connection."""
+
+import asyncio
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Annotated, Any, cast
+
+import anyio
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+import orjson
+
+from backend.models import (
+    TERMINAL_STEPS,
+    PayloadFormat,
+    StreamCommand,
+    StreamMode,
+)
+from backend.services.streamer import (
+    StreamerService,
+    StreamEvent,
+    SubscriberLimitError,
+    SubscriptionClosedError,
+    load_msgpack,
+    msgpack_available,
+)
+from backend.state.base import StateStore
+
+if TYPE_CHECKING:
+    from backend.runtime import AppRuntime
+
+router = APIRouter()
+
+
+@router.websocket("/ws")
+async def stream_runs(
+    websocket: WebSocket,
+    mode: Annotated[StreamMode, Query()] = "snapshot",
+    payload_format: Annotated[PayloadFormat, Query(alias="format")] = "json",
+) -> None:
+    """
+    Stream state updates for any number of runs over a single WebSocket.
+
+    Clients send `{"action": "subscribe", "run_ids": [...]}` and
+    `{"action": "unsubscribe", "run_ids": [...]}` commands. Each subscribed
+    run first receives its latest state, then its updates, using the same
+    event kinds as the SSE endpoint; a run is unsubscribed automatically after
+    its terminal event. Frames are JSON text, or binary msgpack with
+    `format=msgpack`, and are compressed with permessage-deflate when the
+    client negotiates it.
+    """
+    if payload_format == "msgpack" and not msgpack_available():
+        await websocket.close(
+            code=status.WS_1003_UNSUPPORTED_DATA,
+            reason="The msgpack payload format is not installed.",
+        )
+        return
+
+    runtime = cast("AppRuntime", websocket.app.state.runtime)
+    await websocket.accept()
+    session = _StreamSession(
+        websocket,
+        state_store=runtime.state_store,
+        streamer=runtime.streamer,
+        mode=mode,
+        payload_format=payload_format,
+    )
+    await session.serve()
+
+
+class _StreamSession:
+    """
+    Multiplexes the runs a WebSocket subscribes to onto one subscriber queue.
+
+    The queue applies the overflow policy per run and never drops terminal
+    events, so a busy run cannot hide another run's end. Latest states are
+    queued behind any live events already received, so each run's frames
+    always reach the client in revision order.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        state_store: StateStore,
+        streamer: StreamerService,
+        mode: StreamMode,
+        payload_format: PayloadFormat,
+    ) -> None:
+        self._websocket = websocket
+        self._state_store = state_store
+        self._streamer = streamer
+        self._mode = mode
+        self._payload_format = payload_format
+        self._queue = streamer.new_subscription("websocket")
+        self._last_revisions: dict[str, int | None] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def serve(self) -> None:
+        """Handle commands and send events until either side stops."""
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(self._send_events, task_group.cancel_scope)
+                await self._receive_commands()
+                task_group.cancel_scope.cancel()
+        finally:
+            for run_id in list(self._last_revisions):
+                await self._unsubscribe(run_id)
+            self._queue.close()
+
+    async def _receive_commands(self) -> None:
+        """Apply subscribe and unsubscribe commands until the client leaves."""
+        while True:
+            message = await self._websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                command = self._parse_command(message)
+            except ValueError as exc:
+                await self._send_error(None, str(exc))
+                continue
+            for run_id in command.run_ids:
+                if command.action == "subscribe":
+                    await self._subscribe(run_id)
+                else:
+                    await self._unsubscribe(run_id)
+
+    async def _send_events(self, cancel_scope: anyio.CancelScope) -> None:
+        """
+        Send queued events, skipping revisions each run has already seen.
+
+        Stops the session when the streamer closes the queue or the client
+        can no longer be written to.
+        """
+        try:
+            await self._send_queued_events()
+        except SubscriptionClosedError:
+            await self._websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except WebSocketDisconnect:
+            pass
+        cancel_scope.cancel()
+
+    async def _send_queued_events(self) -> None:
+        """Send events from the queue until it is closed."""
+        while True:
+            event = await self._queue.get()
+            run_id = event.state.run_id
+            if run_id not in self._last_revisions:
+                continue
+            last_revision = self._last_revisions[run_id]
+            if last_revision is not None and event.revision <= last_revision:
+                continue
+            self._last_revisions[run_id] = event.revision
+            kind = event.kind_for(self._mode, last_revision)
+            await self._send(event.frame(kind, self._payload_format))
+            if event.state.step in TERMINAL_STEPS:
+                await self._unsubscribe(run_id)
+
+    async def _subscribe(self, run_id: str) -> None:
+        """Register the queue for a run and queue the run's latest state."""
+        if run_id in self._last_revisions:
+            return
+        try:
+            await self._streamer.add_subscriber(run_id, self._queue)
+        except SubscriberLimitError as exc:
+            await self._send_error(run_id, str(exc))
+            return
+        latest_state = await self._state_store.get(run_id)
+        if latest_state is None:
+            await self._streamer.remove_subscriber(run_id, self._queue)
+            await self._send_error(run_id, f"No PRD run found for run_id '{run_id}'.")
+            return
+        self._last_revisions[run_id] = None
+        self._queue.put_nowait(StreamEvent(latest_state))
+
+    async def _unsubscribe(self, run_id: str) -> None:
+        """Stop streaming a run."""
+        if run_id not in self._last_revisions:
+            return
+        del self._last_revisions[run_id]
+        await self._streamer.remove_subscriber(run_id, self._queue)
+
+    def _parse_command(self, message: Mapping[str, Any]) -> StreamCommand:
+        """
+        Parse a client command frame.
+
+        Raises:
+            ValueError: If the frame is not a valid command.
+        """
+        text = message.get("text")
+        if text is not None:
+            return StreamCommand.model_validate_json(text)
+        data = message.get("bytes")
+        if data is not None and self._payload_format == "msgpack":
+            return StreamCommand.model_validate(load_msgpack().unpackb(data))
+        msg = "Commands must be JSON text frames."
+        raise ValueError(msg)
+
+    async def _send_error(self, run_id: str | None, detail: str) -> None:
+        """Send an `error` event in the connection's payload format."""
+        envelope = {"event": "error", "data": {"run_id": run_id, "detail": detail}}
+        if self._payload_format == "msgpack":
+            await self._send(load_msgpack().packb(envelope))
+        else:
+            await self._send(orjson.dumps(envelope).decode())
+
+    async def _send(self, frame: str | bytes) -> None:
+        """Send one frame; the lock keeps both tasks from interleaving writes."""
+        async with self._send_lock:
+            if isinstance(frame, bytes):
+                await self._websocket.send_bytes(frame)
+            else:
+                await self._websocket.send_text(frame)
@@ -1,18 +1,51 @@
 """Application runtime resources and lifecycle helpers."""
 
+import asyncio
+from collections.abc import Callable
 from dataclasses import dataclass
+from importlib import import_module
+from pathlib import Path
+import signal
+import threading
+from types import FrameType
+from typing import TYPE_CHECKING
 
 import structlog
 
+from backend.agents.factory import build_adapter
+from backend.agents.scheduled import ScheduledAdapter
 from backend.logging import configure_logging
+from backend.metrics import RuntimeSources, create_runtime_registry, enable_metrics
+from backend.models import TERMINAL_STEPS
+from backend.pipelines.pipeline_runner import run_pipeline
+from backend.services.admission import AdmissionController, AdmissionRejectedError
+from backend.services.profiler import ProfilerService, profiling_available
+from backend.services.readiness import ReadinessProbe
+from backend.services.renderer import MarkdownRenderer
+from backend.services.scheduler import LLMScheduler
 from backend.services.streamer import StreamerService
+from backend.services.supervisor import PipelineSupervisor
 from backend.settings import AppSettings
 from backend.state.base import StateStore
 from backend.state.in_memory_store import InMemoryStore
-from backend.state.redis_store import RedisStore
+from backend.state.instrumented import InstrumentedStore
+from backend.state.write_behind import WriteBehindStore
+from backend.tracing import configure_tracing, shutdown_tracing
+
+if TYPE_CHECKING:
+    from prometheus_client import CollectorRegistry
 
 logger = structlog.get_logger(__name__)
 
+WARM_IMPORTS = (
+    "diff_match_patch",
+    "markdown",
+    "openai",
+    "google.genai",
+    "google.genai.types",
+)
+HANDOFF_CLAIM_BATCH_SIZE = 16
+
 
 @dataclass(slots=True)
 class AppRuntime:
@@ -21,35 +54,285 @@ class AppRuntime:
     settings: AppSettings
     state_store: StateStore
     streamer: StreamerService
+    admission: AdmissionController
+    scheduler: LLMScheduler
+    renderer: MarkdownRenderer
+    readiness: ReadinessProbe
+    pipelines: PipelineSupervisor
+    handoff_task: asyncio.Task[None] | None = None
+    metrics_registry: "CollectorRegistry | None" = None
+    profiler: ProfilerService | None = None
 
 
 async def build_runtime(settings: AppSettings) -> AppRuntime:
     """Create shared process-level resources."""
     configure_logging(settings.debug)
+    if settings.warm_imports:
+        warmed = await asyncio.to_thread(warm_imports)
+        logger.info("imports_warmed", modules=warmed)
+    metrics_enabled = settings.metrics_enabled and enable_metrics()
+    tracing_enabled = configure_tracing(settings)
     state_store = await _build_state_store(settings)
-    streamer = StreamerService()
+    if metrics_enabled or tracing_enabled:
+        state_store = InstrumentedStore(state_store)
+    streamer = StreamerService(
+        max_queue_size=settings.stream_queue_size,
+        overflow_policy=settings.stream_overflow_policy,
+        replay_buffer_size=settings.stream_replay_buffer_size,
+        replay_max_runs=settings.stream_replay_max_runs,
+        max_subscribers=settings.stream_max_subscribers,
+        max_subscribers_per_run=settings.stream_max_subscribers_per_run,
+        stall_timeout_seconds=settings.stream_stall_timeout_seconds,
+        heartbeat_seconds=settings.stream_heartbeat_seconds,
+        send_timeout_seconds=settings.stream_send_timeout_seconds,
+    )
+    streamer.start()
+    admission = AdmissionController(
+        max_active_runs=settings.max_active_runs,
+        max_active_runs_per_adapter=settings.max_active_runs_per_adapter,
+        max_queued_runs=settings.max_queued_runs,
+        initial_run_seconds=settings.admission_initial_run_seconds,
+    )
+    scheduler = LLMScheduler(
+        max_concurrent_calls=settings.llm_max_concurrent_calls,
+        priority_weights={
+            "interactive": settings.llm_interactive_weight,
+            "batch": settings.llm_batch_weight,
+        },
+        tenant_weights=settings.llm_tenant_weights,
+    )
     logger.info(
         "app_runtime_initialized",
         environment=settings.environment,
         state_backend=state_store.backend_name,
     )
-    return AppRuntime(settings=settings, state_store=state_store, streamer=streamer)
+    readiness = ReadinessProbe(
+        state_store=state_store, cache_seconds=settings.ready_cache_seconds
+    )
+    runtime = AppRuntime(
+        settings=settings,
+        state_store=state_store,
+        streamer=streamer,
+        admission=admission,
+        scheduler=scheduler,
+        renderer=MarkdownRenderer(max_entries=settings.export_cache_size),
+        readiness=readiness,
+        pipelines=PipelineSupervisor(grace_seconds=settings.drain_grace_seconds),
+    )
+    if metrics_enabled:
+        runtime.metrics_registry = create_runtime_registry(
+            RuntimeSources(
+                connections=streamer.connection_counts,
+                subscribers=streamer.subscriber_stats,
+                admission=admission.stats,
+                scheduler=scheduler.stats,
+                pipelines=runtime.pipelines.stats,
+            )
+        )
+    if settings.profiling_enabled:
+        runtime.profiler = _build_profiler(settings)
+    if settings.handoff_poll_seconds > 0:
+        runtime.handoff_task = asyncio.create_task(_poll_handoffs(runtime))
+    return runtime
+
+
+def _build_profiler(settings: AppSettings) -> ProfilerService | None:
+    """Create the profiler, if its optional dependency is installed."""
+    if not profiling_available():
+        logger.warning(
+            "profiling_unavailable",
+            reason="pyinstrument is not installed; install the `observability` extra.",
+        )
+        return None
+    logger.warning("profiling_enabled", profiling_dir=settings.profiling_dir)
+    return ProfilerService(
+        Path(settings.profiling_dir),
+        interval_seconds=settings.profiling_interval_seconds,
+        max_seconds=settings.profiling_max_seconds,
+    )
 
 
 async def close_runtime(runtime: AppRuntime) -> None:
-    """Release shared resources on shutdown."""
+    """
+    Drain pipelines and release shared resources on shutdown.
+
+    Pipelines still running when the drain grace period ends are cancelled
+    and handed off from their last saved state, before the store is closed.
+    """
+    runtime.pipelines.begin_drain()
+    if runtime.handoff_task is not None:
+        runtime.handoff_task.cancel()
+        await asyncio.gather(runtime.handoff_task, return_exceptions=True)
+    for run_id, tenant in (await runtime.pipelines.drain()).items():
+        try:
+            await runtime.state_store.enqueue_handoff(run_id, tenant)
+        except Exception:
+            logger.exception("pipeline_handoff_failed", run_id=run_id)
+        else:
+            logger.info("pipeline_handed_off", run_id=run_id)
+    await runtime.streamer.close()
     await runtime.state_store.close()
+    shutdown_tracing()
     logger.info("app_runtime_closed", state_backend=runtime.state_store.backend_name)
 
 
+def install_drain_signal_handler(
+    supervisor: PipelineSupervisor,
+) -> Callable[[], None]:
+    """
+    Start draining as soon as the server receives SIGTERM.
+
+    The handler chains onto the one the server installed, so readiness fails
+    while the server is still finishing open requests. Does nothing outside
+    the main thread or when no server handler is installed.
+
+    Returns:
+        A callable restoring the previous handler.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    if threading.current_thread() is not threading.main_thread() or not callable(
+        previous
+    ):
+        return lambda: None
+
+    def handle_sigterm(signum: int, frame: FrameType | None) -> None:
+        supervisor.begin_drain()
+        previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    def restore() -> None:
+        if signal.getsignal(signal.SIGTERM) is handle_sigterm:
+            signal.signal(signal.SIGTERM, previous)
+
+    return restore
+
+
+async def resume_handoffs(runtime: AppRuntime) -> int:
+    """
+    Claim runs handed off by draining workers and continue them here.
+
+    Claims at most one batch, and stops early when admission sheds load, in
+    which case the run is handed off again. Each run is scheduled for the
+    tenant it was admitted for on the draining worker.
+
+    Returns:
+        The number of runs resumed.
+    """
+    settings = runtime.settings
+    resumed = 0
+    for handoff in await runtime.state_store.claim_handoffs(HANDOFF_CLAIM_BATCH_SIZE):
+        run_id = handoff.run_id
+        state = await runtime.state_store.get(run_id)
+        if state is None or state.step in TERMINAL_STEPS or state.adapter is None:
+            continue
+        try:
+            adapter = build_adapter(state.adapter, settings)
+        except ValueError:
+            logger.warning("pipeline_resume_skipped", run_id=run_id, exc_info=True)
+            continue
+        try:
+            ticket = runtime.admission.admit(run_id, state.adapter)
+        except AdmissionRejectedError:
+            await runtime.state_store.enqueue_handoff(run_id, handoff.tenant)
+            break
+        scheduled = ScheduledAdapter(
+            adapter,
+            runtime.scheduler,
+            tenant=handoff.tenant,
+            priority="batch" if state.batch_id is not None else "interactive",
+        )
+        await runtime.pipelines.start(
+            run_id,
+            run_pipeline(
+                initial_state=state,
+                state_store=runtime.state_store,
+                adapter=scheduled,
+                streamer=runtime.streamer,
+                ticket=ticket,
+            ),
+            tenant=handoff.tenant,
+        )
+        logger.info(
+            "pipeline_resumed", run_id=run_id, step=state.step, tenant=handoff.tenant
+        )
+        resumed += 1
+    return resumed
+
+
+async def _poll_handoffs(runtime: AppRuntime) -> None:
+    """Resume handed-off runs every poll interval until draining starts."""
+    while not runtime.pipelines.draining:
+        try:
+            await resume_handoffs(runtime)
+        except Exception:
+            logger.exception("pipeline_handoff_poll_failed")
+        await asyncio.sleep(runtime.settings.handoff_poll_seconds)
+
+
+def warm_imports(modules: tuple[str, ...] = WARM_IMPORTS) -> list[str]:
+    """
+    Import lazily loaded modules ahead of the first request.
+
+    Provider SDKs, the diff engine and the Markdown renderer are otherwise
+    imported on first use.
+    Modules that are not installed are skipped; the rest are returned.
+    """
+    warmed = []
+    for name in modules:
+        try:
+            import_module(name)
+        except ImportError:
+            continue
+        warmed.append(name)
+    return warmed
+
+
 async def _build_state_store(settings: AppSettings) -> StateStore:
+    """Build the configured state store, with write-behind buffering if enabled."""
+    state_store = await _select_state_store(settings)
+    if not settings.state_write_behind:
+        return state_store
+    return WriteBehindStore(
+        state_store,
+        flush_interval_seconds=settings.state_write_behind_interval_ms / 1000,
+        max_batch_size=settings.state_write_behind_max_batch_size,
+    )
+
+
+async def _select_state_store(settings: AppSettings) -> StateStore:
     """Select a concrete state store based on configuration and availability."""
     if settings.state_backend == "memory":
         return InMemoryStore()
 
+    # Store modules are imported on demand, so only the selected backend's
+    # client library is loaded.
+    if settings.state_backend == "sqlite":
+        from backend.state.sqlite_store import SQLiteStore
+
+        sqlite_store = SQLiteStore(
+            path=settings.sqlite_path,
+            max_batch_size=settings.sqlite_max_batch_size,
+        )
+        if not await sqlite_store.ping():
+            await sqlite_store.close()
+            msg = f"SQLite database at '{settings.sqlite_path}' could not be opened."
+            raise RuntimeError(msg)
+        return sqlite_store
+
+    from backend.state.redis_store import RedisStore
+
     redis_store = RedisStore(
         redis_url=settings.redis_url,
         ttl_seconds=settings.redis_ttl_seconds,
+        max_connections=settings.redis_max_connections,
+        pool_timeout_seconds=settings.redis_pool_timeout_seconds,
+        socket_timeout_seconds=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout_seconds=settings.redis_socket_connect_timeout_seconds,
+        health_check_interval_seconds=settings.redis_health_check_interval_seconds,
+        retry_attempts=settings.redis_retry_attempts,
+        retry_backoff_base_seconds=settings.redis_retry_backoff_base_seconds,
+        retry_backoff_cap_seconds=settings.redis_retry_backoff_cap_seconds,
     )
     redis_ready = await redis_store.ping()
     if redis_ready:
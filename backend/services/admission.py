@@ -0,0 +1,191 @@
+"""Admission control for new pipeline runs."""
+
+import asyncio
+from collections import Counter, deque
+from dataclasses import dataclass
+import math
+import time
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a run can neither start nor wait in the admission queue."""
+
+    def __init__(self, retry_after_seconds: int):
+        super().__init__(
+            f"Too many active runs; retry in {retry_after_seconds} seconds."
+        )
+        self.retry_after_seconds = retry_after_seconds
+
+
+@dataclass(frozen=True, slots=True)
+class AdmissionStats:
+    """Point-in-time admission counters."""
+
+    active: int
+    queued: int
+    active_by_adapter: dict[str, int]
+    rejected: int
+    run_seconds_by_adapter: dict[str, float]
+
+
+class AdmissionTicket:
+    """
+    A run's place in admission control.
+
+    A ticket is either queued, with a 1-based `position`, or admitted, with
+    position 0. Every change wakes `wait_for_change`.
+    """
+
+    def __init__(self, controller: "AdmissionController", run_id: str, adapter: str):
+        self.run_id = run_id
+        self.adapter = adapter
+        self.position = 0
+        self.admitted_at: float | None = None
+        self.released = False
+        self._controller = controller
+        self._changed = asyncio.Event()
+
+    @property
+    def admitted(self) -> bool:
+        """Whether the run may start."""
+        return self.admitted_at is not None
+
+    async def wait_for_change(self) -> None:
+        """Wait until the ticket is admitted or its queue position moves."""
+        await self._changed.wait()
+        self._changed.clear()
+
+    def release(self) -> None:
+        """Free the ticket's slot, or its queue place if it never started."""
+        self._controller.release(self)
+
+    def _notify(self) -> None:
+        """Wake the ticket's waiter."""
+        self._changed.set()
+
+
+class AdmissionController:
+    """
+    Caps concurrently active runs, globally and per adapter.
+
+    Runs beyond the caps wait in a bounded FIFO queue and start as soon as a
+    slot for their adapter frees up. When the queue is full, new runs are
+    rejected with a retry delay estimated from the observed run durations,
+    so an overload sheds excess work instead of slowing every run down.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_active_runs: int = 32,
+        max_active_runs_per_adapter: int = 16,
+        max_queued_runs: int = 100,
+        initial_run_seconds: float = 60.0,
+        duration_smoothing: float = 0.2,
+    ) -> None:
+        self._max_active_runs = max_active_runs
+        self._max_active_runs_per_adapter = max_active_runs_per_adapter
+        self._max_queued_runs = max_queued_runs
+        self._initial_run_seconds = initial_run_seconds
+        self._duration_smoothing = duration_smoothing
+        self._active: Counter[str] = Counter()
+        self._queue: deque[AdmissionTicket] = deque()
+        self._run_seconds: dict[str, float] = {}
+        self._rejected = 0
+
+    def admit(self, run_id: str, adapter: str) -> AdmissionTicket:
+        """
+        Admit a run, or queue it behind earlier runs.
+
+        Raises:
+            AdmissionRejectedError: If the run cannot start and the queue is full.
+        """
+        ticket = AdmissionTicket(self, run_id, adapter)
+        self._queue.append(ticket)
+        self._dispatch()
+        if ticket.admitted:
+            return ticket
+        if len(self._queue) > self._max_queued_runs:
+            self._queue.pop()
+            self._rejected += 1
+            retry_after_seconds = self.retry_after_seconds(adapter)
+            logger.warning(
+                "admission_rejected",
+                run_id=run_id,
+                adapter=adapter,
+                active=self._active.total(),
+                queued=len(self._queue),
+                retry_after_seconds=retry_after_seconds,
+            )
+            raise AdmissionRejectedError(retry_after_seconds)
+        logger.info(
+            "admission_queued", run_id=run_id, adapter=adapter, position=ticket.position
+        )
+        return ticket
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Free a finished run's slot, or drop a queued run, and admit waiters."""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted_at is None:
+            self._queue.remove(ticket)
+        else:
+            self._active[ticket.adapter] -= 1
+            self._record_duration(ticket.adapter, time.monotonic() - ticket.admitted_at)
+        self._dispatch()
+
+    def retry_after_seconds(self, adapter: str) -> int:
+        """Estimate when a new run for `adapter` could start, in whole seconds."""
+        run_seconds = self._run_seconds.get(adapter, self._initial_run_seconds)
+        slots = min(self._max_active_runs, self._max_active_runs_per_adapter)
+        waiting = len(self._queue) + 1
+        return max(1, math.ceil(run_seconds * waiting / slots))
+
+    def stats(self) -> AdmissionStats:
+        """Return the current admission counters."""
+        return AdmissionStats(
+            active=self._active.total(),
+            queued=len(self._queue),
+            active_by_adapter={
+                adapter: count for adapter, count in self._active.items() if count
+            },
+            rejected=self._rejected,
+            run_seconds_by_adapter=dict(self._run_seconds),
+        )
+
+    def _has_capacity(self, adapter: str) -> bool:
+        """Return whether a run for `adapter` may start now."""
+        return (
+            self._active.total() < self._max_active_runs
+            and self._active[adapter] < self._max_active_runs_per_adapter
+        )
+
+    def _dispatch(self) -> None:
+        """Admit queued runs in order where capacity allows and renumber the rest."""
+        waiting: deque[AdmissionTicket] = deque()
+        for ticket in self._queue:
+            if self._has_capacity(ticket.adapter):
+                self._active[ticket.adapter] += 1
+                ticket.admitted_at = time.monotonic()
+                ticket.position = 0
+                ticket._notify()
+                continue
+            waiting.append(ticket)
+            if ticket.position != len(waiting):
+                ticket.position = len(waiting)
+                ticket._notify()
+        self._queue = waiting
+
+    def _record_duration(self, adapter: str, seconds: float) -> None:
+        """Fold a run duration into the adapter's moving average."""
+        previous = self._run_seconds.get(adapter)
+        if previous is None:
+            self._run_seconds[adapter] = seconds
+            return
+        smoothing = self._duration_smoothing
+        self._run_seconds[adapter] = smoothing * seconds + (1 - smoothing) * previous
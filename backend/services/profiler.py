@@ -0,0 +1,232 @@
+"""On-demand CPU and allocation profiling of runs and of the whole process."""
+
+import asyncio
+from collections.abc import Coroutine
+from dataclasses import dataclass
+import importlib.util
+from pathlib import Path
+import re
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Any, Literal
+import uuid
+
+import orjson
+import structlog
+
+from backend.models import ProfileFormat
+
+if TYPE_CHECKING:
+    from pyinstrument.session import Session
+
+logger = structlog.get_logger(__name__)
+
+ProfileScope = Literal["run", "process"]
+
+# File suffix and media type of each downloadable format.
+PROFILE_FILES: dict[ProfileFormat, tuple[str, str]] = {
+    "speedscope": (".speedscope.json", "application/json"),
+    "pstats": (".pstats", "application/octet-stream"),
+    "tracemalloc": (".tracemalloc.txt", "text/plain; charset=utf-8"),
+}
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP_LINES = 50
+_PROFILE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,100}")
+
+
+class ProfileBusyError(RuntimeError):
+    """Raised when a process capture is requested while another is running."""
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileCapture:
+    """A finished profile and the formats it can be downloaded in."""
+
+    profile_id: str
+    scope: ProfileScope
+    duration_seconds: float
+    formats: list[ProfileFormat]
+
+
+def profiling_available() -> bool:
+    """Return whether the optional sampling profiler is installed."""
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+class ProfilerService:
+    """
+    Captures sampling CPU profiles and tracemalloc snapshots on request.
+
+    A run capture samples only the pipeline task's own call stacks, so
+    concurrent runs do not show up in it; a process capture samples the event
+    loop thread for a fixed time. Both also trace allocations while they run
+    and save the allocations that grew, so nothing is traced between captures.
+
+    Profiles are written to `directory`, named by run id or capture id, and
+    can be downloaded as speedscope JSON, pstats or tracemalloc text.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        interval_seconds: float = 0.001,
+        max_seconds: float = 120.0,
+    ) -> None:
+        self.directory = directory
+        self.max_seconds = max_seconds
+        self._interval_seconds = interval_seconds
+        self._tracemalloc_users = 0
+        self._process_capture_running = False
+
+    async def profile_run(
+        self, run_id: str, pipeline: Coroutine[Any, Any, None]
+    ) -> None:
+        """Run a pipeline under the profiler and save its profile as `run_id`."""
+        await self._capture(run_id, "run", pipeline, async_mode="enabled")
+
+    async def profile_process(self, seconds: float) -> ProfileCapture:
+        """
+        Profile everything the event loop runs for `seconds`.
+
+        Raises:
+            ProfileBusyError: If another process capture is still running.
+        """
+        if self._process_capture_running:
+            raise ProfileBusyError("A process profile is already being captured.")
+        self._process_capture_running = True
+        profile_id = f"process-{uuid.uuid4().hex}"
+        try:
+            return await self._capture(
+                profile_id,
+                "process",
+                asyncio.sleep(min(seconds, self.max_seconds)),
+                async_mode="disabled",
+            )
+        finally:
+            self._process_capture_running = False
+
+    def describe(self, profile_id: str) -> ProfileCapture | None:
+        """Return a saved profile, or None if there is none under `profile_id`."""
+        if not _PROFILE_ID_PATTERN.fullmatch(profile_id):
+            return None
+        try:
+            saved = orjson.loads(self._path(profile_id, ".json").read_bytes())
+        except FileNotFoundError:
+            return None
+        return ProfileCapture(
+            profile_id=profile_id,
+            scope=saved["scope"],
+            duration_seconds=saved["duration_seconds"],
+            formats=list(PROFILE_FILES),
+        )
+
+    def path(self, profile_id: str, profile_format: ProfileFormat) -> Path | None:
+        """
+        Return the file of a saved profile, or None if it is not saved yet.
+
+        A profile counts as saved once its description is written, after all
+        of its formats.
+        """
+        if self.describe(profile_id) is None:
+            return None
+        return self._path(profile_id, PROFILE_FILES[profile_format][0])
+
+    def _path(self, profile_id: str, suffix: str) -> Path:
+        """Return the file for one artifact of a profile."""
+        return self.directory / f"{profile_id}{suffix}"
+
+    async def _capture(
+        self,
+        profile_id: str,
+        scope: ProfileScope,
+        work: Coroutine[Any, Any, None],
+        *,
+        async_mode: Literal["enabled", "disabled"],
+    ) -> ProfileCapture:
+        """Await `work` under the profiler and save the result, even if it fails."""
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=self._interval_seconds, async_mode=async_mode)
+        self._start_tracemalloc()
+        baseline = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await work
+        finally:
+            session = profiler.stop()
+            snapshot = tracemalloc.take_snapshot()
+            self._stop_tracemalloc()
+            duration = time.perf_counter() - started
+            capture = ProfileCapture(
+                profile_id=profile_id,
+                scope=scope,
+                duration_seconds=duration,
+                formats=list(PROFILE_FILES),
+            )
+            await asyncio.to_thread(self._save, capture, session, baseline, snapshot)
+            logger.info(
+                "profile_saved",
+                profile_id=profile_id,
+                scope=scope,
+                duration_seconds=round(duration, 3),
+            )
+        return capture
+
+    def _start_tracemalloc(self) -> None:
+        """Trace allocations while at least one capture runs."""
+        if self._tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._tracemalloc_users = 1
+        elif self._tracemalloc_users:
+            self._tracemalloc_users += 1
+
+    def _stop_tracemalloc(self) -> None:
+        """Stop tracing allocations after the last capture, if this started it."""
+        if self._tracemalloc_users:
+            self._tracemalloc_users -= 1
+            if self._tracemalloc_users == 0:
+                tracemalloc.stop()
+
+    def _save(
+        self,
+        capture: ProfileCapture,
+        session: "Session",
+        baseline: tracemalloc.Snapshot,
+        snapshot: tracemalloc.Snapshot,
+    ) -> None:
+        """Write every format of a finished capture, then its description."""
+        from pyinstrument.renderers import PstatsRenderer, SpeedscopeRenderer
+
+        profile_id = capture.profile_id
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path(profile_id, PROFILE_FILES["speedscope"][0]).write_text(
+            SpeedscopeRenderer().render(session), encoding="utf-8"
+        )
+        # The pstats renderer returns marshalled bytes decoded as text.
+        self._path(profile_id, PROFILE_FILES["pstats"][0]).write_bytes(
+            PstatsRenderer().render(session).encode("utf-8", errors="surrogateescape")
+        )
+        self._path(profile_id, PROFILE_FILES["tracemalloc"][0]).write_text(
+            _format_allocations(baseline, snapshot), encoding="utf-8"
+        )
+        self._path(profile_id, ".json").write_bytes(
+            orjson.dumps(
+                {"scope": capture.scope, "duration_seconds": capture.duration_seconds}
+            )
+        )
+
+
+def _format_allocations(
+    baseline: tracemalloc.Snapshot, snapshot: tracemalloc.Snapshot
+) -> str:
+    """List the source lines whose allocations grew the most during a capture."""
+    growth = snapshot.compare_to(baseline, "lineno")
+    lines = [
+        f"# Allocation growth during the capture: "
+        f"{sum(stat.size_diff for stat in growth)} bytes",
+        f"# Top {TRACEMALLOC_TOP_LINES} source lines by growth:",
+    ]
+    lines.extend(str(stat) for stat in growth[:TRACEMALLOC_TOP_LINES])
+    return "\n".join(lines) + "\n"
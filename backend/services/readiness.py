@@ -0,0 +1,39 @@
+"""Cached readiness checks for the shared state store."""
+
+import asyncio
+from time import monotonic
+
+from backend.state.base import StateStore
+
+
+class ReadinessProbe:
+    """
+    Answers readiness checks from a short-lived cache of the last store ping.
+
+    Probes arriving while a ping is in flight wait for that ping instead of
+    starting their own, so the store sees at most one ping per cache window.
+    """
+
+    def __init__(self, state_store: StateStore, cache_seconds: float = 2.0) -> None:
+        self._state_store = state_store
+        self._cache_seconds = cache_seconds
+        self._ready = False
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> bool:
+        """Return whether the state store is ready, pinging it when stale."""
+        if self._is_fresh():
+            return self._ready
+        async with self._lock:
+            if not self._is_fresh():
+                self._ready = await self._state_store.ping()
+                self._checked_at = monotonic()
+        return self._ready
+
+    def _is_fresh(self) -> bool:
+        """Return whether the cached result is still inside its window."""
+        return (
+            self._checked_at is not None
+            and monotonic() - self._checked_at < self._cache_seconds
+        )
@@ -0,0 +1,122 @@
+"""Server-side Markdown to HTML rendering with a content-addressed cache."""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import html
+
+MARKDOWN_EXTENSIONS = ["extra", "sane_lists"]
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ max-width: 48rem; margin: 2rem auto; padding: 0 1rem;
+  font-family: system-ui, sans-serif; line-height: 1.6; }}
+pre, code {{ background: #f5f5f5; }}
+pre {{ padding: 0.75rem; overflow-x: auto; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 0.25rem 0.5rem; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class RendererStats:
+    """Render cache counters."""
+
+    entries: int
+    max_entries: int
+    renders: int
+    hits: int
+
+
+def render_document(content: str) -> bytes:
+    """
+    Render Markdown into a standalone HTML page.
+
+    Raw HTML in the Markdown is escaped rather than passed through, so shared
+    exports cannot carry markup injected into the generated content.
+    """
+    # Imported on first use to keep the renderer out of API start-up.
+    import markdown
+
+    converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    converter.preprocessors.deregister("html_block")
+    converter.inlinePatterns.deregister("html")
+    body = converter.convert(content)
+    title = next(
+        (
+            line.lstrip("#").strip()
+            for line in content.splitlines()
+            if line.startswith("#")
+        ),
+        "Product Requirements Document",
+    )
+    page = _HTML_TEMPLATE.format(title=html.escape(title), body=body)
+    return page.encode("utf-8")
+
+
+class MarkdownRenderer:
+    """
+    Renders PRD content to HTML once per distinct content.
+
+    Rendered pages are kept in an LRU cache keyed by the content's SHA-256
+    checksum, and concurrent requests for content that is still rendering
+    share the same render, so a finished PRD viewed by many readers costs a
+    single render. Rendering runs in a worker thread to keep the event loop
+    responsive for large documents.
+    """
+
+    def __init__(self, max_entries: int = 128) -> None:
+        self._max_entries = max_entries
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task[bytes]] = {}
+        self._renders = 0
+        self._hits = 0
+
+    async def render_html(self, content: str, checksum: str) -> bytes:
+        """Return the HTML page for `content`, rendering it only on a cache miss."""
+        cached = self._cache.get(checksum)
+        if cached is not None:
+            self._cache.move_to_end(checksum)
+            self._hits += 1
+            return cached
+
+        task = self._in_flight.get(checksum)
+        if task is None:
+            self._renders += 1
+            task = asyncio.create_task(asyncio.to_thread(render_document, content))
+            self._in_flight[checksum] = task
+            task.add_done_callback(lambda done: self._store(checksum, done))
+        else:
+            self._hits += 1
+        # Shielded so a disconnecting reader does not cancel the shared render.
+        return await asyncio.shield(task)
+
+    def stats(self) -> RendererStats:
+        """Return the current cache counters."""
+        return RendererStats(
+            entries=len(self._cache),
+            max_entries=self._max_entries,
+            renders=self._renders,
+            hits=self._hits,
+        )
+
+    def _store(self, checksum: str, task: asyncio.Task[bytes]) -> None:
+        """Cache a finished render and evict the least recently used pages."""
+        self._in_flight.pop(checksum, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._cache[checksum] = task.result()
+        self._cache.move_to_end(checksum)
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
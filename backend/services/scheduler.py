@@ -0,0 +1,212 @@
+"""Weighted fair queuing of LLM calls across tenants and priority classes."""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import heapq
+import itertools
+import time
+
+from backend.models import PriorityClass
+
+Flow = tuple[str, PriorityClass]
+
+DEFAULT_PRIORITY_WEIGHTS: dict[PriorityClass, float] = {
+    "interactive": 8.0,
+    "batch": 1.0,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class WaitStats:
+    """Queue wait times of one tenant or priority class."""
+
+    calls: int
+    queued: int
+    mean_wait_seconds: float
+    p95_wait_seconds: float
+    max_wait_seconds: float
+
+
+@dataclass(frozen=True, slots=True)
+class SchedulerStats:
+    """Point-in-time scheduler counters."""
+
+    active: int
+    queued: int
+    max_concurrent_calls: int
+    tenants: dict[str, WaitStats]
+    priorities: dict[str, WaitStats]
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    """A queued call, ordered by virtual finish tag and then arrival."""
+
+    finish_tag: float
+    sequence: int
+    flow: Flow = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+class _WaitRecorder:
+    """Counts calls and keeps a window of recent wait times."""
+
+    def __init__(self, window: int) -> None:
+        self.calls = 0
+        self.queued = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def record(self, wait_seconds: float) -> None:
+        """Record the wait of a call that has just been dispatched."""
+        self.calls += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self._recent.append(wait_seconds)
+
+    def stats(self) -> WaitStats:
+        """Summarize the recorded waits."""
+        recent = sorted(self._recent)
+        p95 = recent[min(len(recent) - 1, int(0.95 * len(recent)))] if recent else 0.0
+        return WaitStats(
+            calls=self.calls,
+            queued=self.queued,
+            mean_wait_seconds=self.total_wait_seconds / self.calls
+            if self.calls
+            else 0.0,
+            p95_wait_seconds=p95,
+            max_wait_seconds=self.max_wait_seconds,
+        )
+
+
+class LLMScheduler:
+    """
+    Shares a fixed number of concurrent LLM calls by weighted fair queuing.
+
+    Every call belongs to a flow, its tenant and priority class, weighted by
+    the priority's weight times the tenant's weight. When all slots are busy,
+    calls queue with a virtual finish tag that advances by `1 / weight` per
+    call of the flow, and a freed slot goes to the smallest tag. Each flow
+    therefore receives capacity in proportion to its weight: a tenant
+    submitting hundreds of batch runs cannot starve interactive users, yet
+    batch calls use every slot interactive work leaves idle.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent_calls: int = 16,
+        priority_weights: Mapping[PriorityClass, float] | None = None,
+        tenant_weights: Mapping[str, float] | None = None,
+        stats_window: int = 256,
+    ) -> None:
+        self._max_concurrent_calls = max_concurrent_calls
+        self._priority_weights = dict(priority_weights or DEFAULT_PRIORITY_WEIGHTS)
+        self._tenant_weights = dict(tenant_weights or {})
+        self._stats_window = stats_window
+        self._active = 0
+        self._queue: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: dict[Flow, float] = {}
+        self._tenants: dict[str, _WaitRecorder] = {}
+        self._priorities: dict[str, _WaitRecorder] = {}
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, priority: PriorityClass) -> AsyncIterator[None]:
+        """Hold one LLM call slot, waiting for the flow's fair turn if needed."""
+        await self._acquire((tenant, priority))
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> SchedulerStats:
+        """Return the current scheduler counters and wait times."""
+        return SchedulerStats(
+            active=self._active,
+            queued=sum(not waiter.future.done() for waiter in self._queue),
+            max_concurrent_calls=self._max_concurrent_calls,
+            tenants={
+                tenant: recorder.stats() for tenant, recorder in self._tenants.items()
+            },
+            priorities={
+                priority: recorder.stats()
+                for priority, recorder in self._priorities.items()
+            },
+        )
+
+    async def _acquire(self, flow: Flow) -> None:
+        """Take a slot now, or queue by finish tag until one is handed over."""
+        recorders = self._recorders(flow)
+        # Slots are handed straight to queued calls, so a free slot means no
+        # call is waiting.
+        if self._active < self._max_concurrent_calls:
+            self._active += 1
+            for recorder in recorders:
+                recorder.record(0.0)
+            return
+
+        start_tag = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish_tag = start_tag + 1 / self._weight(flow)
+        self._last_finish[flow] = finish_tag
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._queue,
+            _Waiter(
+                finish_tag=finish_tag,
+                sequence=next(self._sequence),
+                flow=flow,
+                enqueued_at=time.monotonic(),
+                future=future,
+            ),
+        )
+        for recorder in recorders:
+            recorder.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                future.cancel()
+                for recorder in recorders:
+                    recorder.queued -= 1
+            raise
+
+    def _release(self) -> None:
+        """Hand the freed slot to the queued call with the smallest finish tag."""
+        while self._queue:
+            waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                continue
+            self._virtual_time = max(
+                self._virtual_time, waiter.finish_tag - 1 / self._weight(waiter.flow)
+            )
+            wait_seconds = time.monotonic() - waiter.enqueued_at
+            for recorder in self._recorders(waiter.flow):
+                recorder.queued -= 1
+                recorder.record(wait_seconds)
+            waiter.future.set_result(None)
+            return
+        self._active -= 1
+        self._last_finish.clear()
+
+    def _weight(self, flow: Flow) -> float:
+        """Return a flow's share weight."""
+        tenant, priority = flow
+        return self._priority_weights[priority] * self._tenant_weights.get(tenant, 1.0)
+
+    def _recorders(self, flow: Flow) -> tuple[_WaitRecorder, _WaitRecorder]:
+        """Return the wait recorders of a flow's tenant and priority class."""
+        tenant, priority = flow
+        if tenant not in self._tenants:
+            self._tenants[tenant] = _WaitRecorder(self._stats_window)
+        if priority not in self._priorities:
+            self._priorities[priority] = _WaitRecorder(self._stats_window)
+        return self._tenants[tenant], self._priorities[priority]
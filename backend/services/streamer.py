@@ -1,43 +1,617 @@
 """Service for streaming state updates to the frontend via SSE."""
 
 import asyncio
-from collections import defaultdict
-from typing import Any
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+import importlib
+import importlib.util
+import time
+from types import ModuleType
+from typing import Literal
+
+import orjson
+from sse_starlette.event import ServerSentEvent
+import structlog
+
+from backend.models import TERMINAL_STEPS, PayloadFormat, PRDState, StreamMode
+from backend.tracing import start_span
+
+logger = structlog.get_logger(__name__)
+
+OverflowPolicy = Literal["drop_oldest", "keep_latest"]
+SSEEventKind = Literal["message", "snapshot", "delta", "progress"]
+ALL_RUNS = "*"
+
+
+class SubscriberLimitError(RuntimeError):
+    """Raised when a subscriber would exceed a per-run or global cap."""
+
+
+class SubscriptionClosedError(Exception):
+    """Raised when reading from a subscription the streamer has closed."""
+
+
+def msgpack_available() -> bool:
+    """Return whether the optional msgpack payload format can be used."""
+    return importlib.util.find_spec("msgpack") is not None
+
+
+def load_msgpack() -> ModuleType:
+    """Import msgpack, which is only installed with the `msgpack` extra."""
+    try:
+        return importlib.import_module("msgpack")
+    except ImportError as exc:
+        msg = "The msgpack payload format requires the 'msgpack' extra."
+        raise RuntimeError(msg) from exc
+
+
+class StreamEvent:
+    """
+    A published state together with its wire encodings.
+
+    One instance is created per publish and shared by every subscriber queue
+    and the replay buffer, so each event kind is encoded into SSE wire bytes,
+    or into a WebSocket frame per payload format, at most once per state,
+    however many subscribers receive it.
+    """
+
+    __slots__ = ("_frames", "_wire", "state")
+
+    def __init__(self, state: PRDState) -> None:
+        self.state = state
+        self._wire: dict[SSEEventKind, bytes] = {}
+        self._frames: dict[tuple[PayloadFormat, SSEEventKind], str | bytes] = {}
+
+    @property
+    def revision(self) -> int:
+        """Revision of the published state."""
+        return self.state.revision
+
+    def kind_for(
+        self, mode: StreamMode, previous_revision: int | None = None
+    ) -> SSEEventKind:
+        """
+        Pick the event kind for a subscriber that last saw `previous_revision`.
+
+        Snapshot mode always sends a full `message`. Delta mode sends a `delta`
+        for the next consecutive revision and a full `snapshot` otherwise.
+        """
+        if mode == "snapshot":
+            return "message"
+        if previous_revision == self.revision - 1:
+            return "delta"
+        return "snapshot"
+
+    def _data(self, kind: SSEEventKind) -> str:
+        """Return the JSON event payload for an event kind."""
+        if kind == "delta":
+            return self.state.delta_event_json
+        if kind == "progress":
+            return self.state.progress_json
+        return self.state.event_json
+
+    def wire(self, kind: SSEEventKind) -> bytes:
+        """
+        Return the state encoded as an SSE event of the given kind.
+
+        `progress` events come from multi-run streams, where a revision alone
+        does not identify an event, so they carry no `id`.
+        """
+        encoded = self._wire.get(kind)
+        if encoded is None:
+            event_id = None if kind == "progress" else str(self.revision)
+            encoded = ServerSentEvent(
+                data=self._data(kind), event=kind, id=event_id
+            ).encode()
+            self._wire[kind] = encoded
+        return encoded
+
+    def frame(self, kind: SSEEventKind, payload_format: PayloadFormat) -> str | bytes:
+        """
+        Return the state encoded as a WebSocket frame of the given kind.
+
+        JSON frames are text and splice the cached event JSON into an envelope
+        without re-encoding it. msgpack frames are binary.
+        """
+        key = (payload_format, kind)
+        encoded = self._frames.get(key)
+        if encoded is None:
+            data = self._data(kind)
+            if payload_format == "msgpack":
+                envelope = {
+                    "event": kind,
+                    "id": str(self.revision),
+                    "data": orjson.loads(data),
+                }
+                encoded = load_msgpack().packb(envelope)
+            else:
+                encoded = f'{{"event":"{kind}","id":"{self.revision}","data":{data}}}'
+            self._frames[key] = encoded
+        return encoded
+
+
+@dataclass(frozen=True, slots=True)
+class SubscriberStats:
+    """Point-in-time delivery counters for one subscriber."""
+
+    run_id: str
+    lag: int
+    max_lag: int
+    delivered: int
+    dropped: int
+
+
+@dataclass(frozen=True, slots=True)
+class ConnectionCounts:
+    """Point-in-time subscriber counts for this process."""
+
+    subscribers: int
+    runs: int
+    max_subscribers: int | None
+    max_subscribers_per_run: int | None
+    rejected: int
+    reaped: int
+
+
+class Subscription:
+    """
+    A bounded subscriber queue that never blocks the publisher.
+
+    When the queue is full, `drop_oldest` discards the oldest queued state.
+    `keep_latest` holds at most one state, replacing it on every publish, which
+    suits consumers that only care about the newest snapshot. Once closed,
+    `get` raises `SubscriptionClosedError` so the consumer can stop.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        max_size: int = 100,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+    ) -> None:
+        self.run_id = run_id
+        self.overflow_policy = overflow_policy
+        self._max_size = 1 if overflow_policy == "keep_latest" else max_size
+        self._buffer: deque[StreamEvent] = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+        # When the consumer last had to catch up: the time the oldest unread
+        # event was queued, or of the latest read if events are still unread.
+        self.unread_since: float | None = None
+        self.max_lag = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def lag(self) -> int:
+        """Number of published states the consumer has not read yet."""
+        return len(self._buffer)
+
+    def put_nowait(self, event: StreamEvent) -> None:
+        """Queue an event, applying the overflow policy instead of waiting."""
+        while len(self._buffer) >= self._max_size:
+            self._buffer.popleft()
+            self.dropped += 1
+        if not self._buffer:
+            self.unread_since = time.monotonic()
+        self._buffer.append(event)
+        self.max_lag = max(self.max_lag, len(self._buffer))
+        self._ready.set()
+
+    async def get(self) -> StreamEvent:
+        """
+        Wait for and return the next queued event.
+
+        Raises:
+            SubscriptionClosedError: If the subscription was closed.
+        """
+        while not self._buffer and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+        if self.closed:
+            raise SubscriptionClosedError(self.run_id)
+        self.delivered += 1
+        event = self._take()
+        self.unread_since = time.monotonic() if self._buffer else None
+        return event
+
+    def _take(self) -> StreamEvent:
+        """Remove and return the oldest queued event."""
+        return self._buffer.popleft()
+
+    def close(self) -> None:
+        """Discard queued events and wake the consumer so it can stop."""
+        self.closed = True
+        self._buffer.clear()
+        self.unread_since = None
+        self._ready.set()
+
+    def is_stalled(self, now: float, timeout_seconds: float) -> bool:
+        """
+        Return whether the consumer has made no progress for `timeout_seconds`.
+
+        The clock starts when an event is queued for an idle consumer and
+        restarts on every read, so subscribers that are merely idle between
+        events are never stalled.
+        """
+        return (
+            self.unread_since is not None and now - self.unread_since >= timeout_seconds
+        )
+
+    def stats(self) -> SubscriberStats:
+        """Return the current delivery counters."""
+        return SubscriberStats(
+            run_id=self.run_id,
+            lag=self.lag,
+            max_lag=self.max_lag,
+            delivered=self.delivered,
+            dropped=self.dropped,
+        )
+
+
+class MultiplexedSubscription(Subscription):
+    """
+    A subscriber queue shared by many runs that coalesces per run.
+
+    The overflow policy applies to each run rather than to the whole queue,
+    so a busy run can never push a quiet run's events out. `keep_latest`
+    holds the newest unread event of every run. `drop_oldest` keeps up to
+    `max_size` events and, once full, discards the oldest event that a newer
+    event of the same run has superseded; a run's newest event is never
+    discarded, so the queue may briefly hold one event per run beyond
+    `max_size`. Terminal events are never replaced or discarded, so the
+    consumer always sees every run finish.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        max_size: int = 100,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+    ) -> None:
+        super().__init__(label, max_size=max_size, overflow_policy=overflow_policy)
+        self._max_size = max_size
+        self._latest: dict[str, StreamEvent] = {}
+
+    def put_nowait(self, event: StreamEvent) -> None:
+        """Queue an event, coalescing with the run's unread events if needed."""
+        run_id = event.state.run_id
+        latest = self._latest.get(run_id)
+        if latest is not None and _supersedes(latest, event):
+            self.dropped += 1
+            return
+        if latest is not None and self.overflow_policy == "keep_latest":
+            self._buffer.remove(latest)
+            self.dropped += 1
+        if not self._buffer:
+            self.unread_since = time.monotonic()
+        self._buffer.append(event)
+        self._latest[run_id] = event
+        if len(self._buffer) > self._max_size:
+            self._drop_superseded()
+        self.max_lag = max(self.max_lag, len(self._buffer))
+        self._ready.set()
+
+    def close(self) -> None:
+        """Discard queued events and wake the consumer so it can stop."""
+        super().close()
+        self._latest.clear()
+
+    def _take(self) -> StreamEvent:
+        """Remove and return the oldest queued event."""
+        event = self._buffer.popleft()
+        run_id = event.state.run_id
+        if self._latest.get(run_id) is event:
+            del self._latest[run_id]
+        return event
+
+    def _drop_superseded(self) -> None:
+        """Discard the oldest non-terminal event a newer one of its run replaced."""
+        for index, queued in enumerate(self._buffer):
+            if (
+                queued.state.step not in TERMINAL_STEPS
+                and self._latest[queued.state.run_id] is not queued
+            ):
+                del self._buffer[index]
+                self.dropped += 1
+                return
+
+
+class ReplayBuffer:
+    """
+    Keeps the most recently published events of recently active runs.
+
+    Each run keeps a ring buffer of its last `size` events, and only the
+    `max_runs` most recently published runs are kept. Replayed events reuse
+    the wire encodings already produced for live subscribers.
+    """
+
+    def __init__(self, size: int = 32, max_runs: int = 1000) -> None:
+        self._size = size
+        self._max_runs = max_runs
+        self._runs: OrderedDict[str, deque[StreamEvent]] = OrderedDict()
+
+    def append(self, run_id: str, event: StreamEvent) -> None:
+        """Record a published event, evicting the least recently active run."""
+        if self._size == 0:
+            return
+        history = self._runs.get(run_id)
+        if history is None:
+            history = self._runs[run_id] = deque(maxlen=self._size)
+        self._runs.move_to_end(run_id)
+        history.append(event)
+        while len(self._runs) > self._max_runs:
+            self._runs.popitem(last=False)
+
+    def since(self, run_id: str, revision: int) -> list[StreamEvent] | None:
+        """
+        Return the buffered events newer than `revision`, oldest first.
+
+        Returns None when the buffer no longer holds every event after
+        `revision`, so the caller must fall back to a full snapshot.
+        """
+        history = self._runs.get(run_id)
+        if not history or history[0].revision > revision + 1:
+            return None
+        return [event for event in history if event.revision > revision]
 
 
 class StreamerService:
     """
     Manages SSE connections and streams data to clients.
+
+    Subscribers are kept in a per-run, copy-on-write registry: registering or
+    removing a subscriber replaces that run's tuple of queues, and publishing
+    iterates whichever tuple is current. None of these operations await, so
+    on a single event loop they need no lock, and connects and disconnects on
+    one run never wait on publishes to another. Queues registered under
+    `ALL_RUNS` receive the events of every run.
+
+    Subscribers beyond `max_subscribers_per_run` or `max_subscribers` are
+    rejected with `SubscriberLimitError`. When `stall_timeout_seconds` is set,
+    `start` runs a background task that closes and removes subscribers whose consumer has left
+    events unread for that long, such as clients that vanished without
+    closing their connection.
     """
 
-    def __init__(self) -> None:
-        self._queues: dict[str, set[asyncio.Queue[dict[str, Any]]]] = defaultdict(set)
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+        replay_buffer_size: int = 32,
+        replay_max_runs: int = 1000,
+        *,
+        max_subscribers: int | None = None,
+        max_subscribers_per_run: int | None = None,
+        stall_timeout_seconds: float | None = None,
+        heartbeat_seconds: float | None = None,
+        send_timeout_seconds: float | None = None,
+    ) -> None:
+        self._queues: dict[str, tuple[Subscription, ...]] = {}
+        self._max_queue_size = max_queue_size
+        self._overflow_policy = overflow_policy
+        self._replay = ReplayBuffer(size=replay_buffer_size, max_runs=replay_max_runs)
+        self._max_subscribers = max_subscribers
+        self._max_subscribers_per_run = max_subscribers_per_run
+        self._stall_timeout_seconds = stall_timeout_seconds
+        self._subscriber_count = 0
+        self._rejected = 0
+        self._reaped = 0
+        self._reaper_task: asyncio.Task[None] | None = None
+        self._active: dict[str, StreamEvent] = {}
+        self.heartbeat_seconds = heartbeat_seconds
+        self.send_timeout_seconds = send_timeout_seconds
+
+    def new_subscription(self, label: str) -> MultiplexedSubscription:
+        """
+        Create an unregistered multi-run queue with the configured size and policy.
+
+        Register it under one or more runs with `add_subscriber` to receive
+        their events on a single queue. The overflow policy is applied per
+        run, and terminal events are never dropped.
+        """
+        return MultiplexedSubscription(
+            label,
+            max_size=self._max_queue_size,
+            overflow_policy=self._overflow_policy,
+        )
+
+    async def add_subscriber(
+        self, run_id: str, queue: Subscription | None = None
+    ) -> Subscription:
+        """
+        Register a subscriber queue for a run, creating one if not given.
+
+        Passing an existing queue multiplexes another run onto it; each run a
+        queue is registered under counts towards the subscriber caps.
+
+        Raises:
+            SubscriberLimitError: If the run or the process is at its cap.
+        """
+        subscribers = self._queues.get(run_id, ())
+        limit = self._exceeded_limit(len(subscribers))
+        if limit is not None:
+            self._rejected += 1
+            logger.warning(
+                "stream_subscriber_rejected",
+                run_id=run_id,
+                limit=limit,
+                subscribers=self._subscriber_count,
+                run_subscribers=len(subscribers),
+            )
+            raise SubscriberLimitError(f"Too many stream subscribers ({limit}).")
 
-    async def add_subscriber(self, run_id: str) -> asyncio.Queue[dict[str, Any]]:
-        """Create and register a subscriber queue for a run."""
-        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
-        async with self._lock:
-            self._queues[run_id].add(queue)
+        if queue is None:
+            queue = Subscription(
+                run_id,
+                max_size=self._max_queue_size,
+                overflow_policy=self._overflow_policy,
+            )
+        elif queue in subscribers:
+            return queue
+        self._queues[run_id] = (*subscribers, queue)
+        self._subscriber_count += 1
         return queue
 
     async def remove_subscriber(
         self,
         run_id: str,
-        queue: asyncio.Queue[dict[str, Any]],
+        queue: Subscription,
     ) -> None:
         """Remove a subscriber queue for a run."""
-        async with self._lock:
-            subscribers = self._queues.get(run_id)
-            if not subscribers:
-                return
-            subscribers.discard(queue)
-            if not subscribers:
-                self._queues.pop(run_id, None)
-
-    async def publish(self, run_id: str, data: dict[str, Any]) -> None:
-        """Broadcast a payload to all subscribers for a run."""
-        async with self._lock:
-            subscribers = list(self._queues.get(run_id, set()))
-        for queue in subscribers:
-            await queue.put(data)
+        if not self._unregister(run_id, queue):
+            return
+        if queue.dropped:
+            logger.warning("stream_subscriber_dropped_events", **_log_fields(queue))
+
+    async def publish(self, run_id: str, state: PRDState) -> None:
+        """
+        Broadcast a state to all subscribers for a run.
+
+        The state is wrapped once in a `StreamEvent`, so every subscriber and
+        the replay buffer share the same SSE wire bytes. Queues are bounded and
+        never awaited, so a slow consumer cannot stall the publisher.
+        """
+        subscribers = self._queues.get(run_id, ())
+        watchers = self._queues.get(ALL_RUNS, ())
+        with start_span(
+            "stream.publish",
+            {
+                "prd.run_id": run_id,
+                "prd.revision": state.revision,
+                "prd.step": state.step,
+                "prd.stream.subscribers": len(subscribers) + len(watchers),
+            },
+        ):
+            event = StreamEvent(state)
+            self._replay.append(run_id, event)
+            if state.step in TERMINAL_STEPS:
+                self._active.pop(run_id, None)
+            else:
+                self._active[run_id] = event
+            for queue in subscribers:
+                queue.put_nowait(event)
+            for queue in watchers:
+                queue.put_nowait(event)
+
+    def active_runs(self) -> list[StreamEvent]:
+        """Return the latest event of every run whose last publish was not terminal."""
+        return list(self._active.values())
+
+    def replay_since(self, run_id: str, revision: int) -> list[StreamEvent] | None:
+        """
+        Return the published events of a run after `revision`, oldest first.
+
+        Returns None when they are no longer all buffered.
+        """
+        return self._replay.since(run_id, revision)
+
+    def subscriber_stats(self) -> list[SubscriberStats]:
+        """Return delivery counters for every registered subscriber."""
+        return [
+            queue.stats()
+            for subscribers in self._queues.values()
+            for queue in subscribers
+        ]
+
+    def connection_counts(self) -> ConnectionCounts:
+        """Return subscriber counts and limits for this process."""
+        return ConnectionCounts(
+            subscribers=self._subscriber_count,
+            runs=len(self._queues),
+            max_subscribers=self._max_subscribers,
+            max_subscribers_per_run=self._max_subscribers_per_run,
+            rejected=self._rejected,
+            reaped=self._reaped,
+        )
+
+    def reap_stalled_subscribers(self) -> int:
+        """Close and remove stalled subscribers, returning how many were reaped."""
+        if self._stall_timeout_seconds is None:
+            return 0
+        now = time.monotonic()
+        stalled = [
+            (run_id, queue)
+            for run_id, subscribers in self._queues.items()
+            for queue in subscribers
+            if queue.closed or queue.is_stalled(now, self._stall_timeout_seconds)
+        ]
+        reaped = 0
+        for run_id, queue in stalled:
+            self._unregister(run_id, queue)
+            if queue.closed:
+                continue
+            queue.close()
+            reaped += 1
+            logger.warning("stream_subscriber_reaped", **_log_fields(queue))
+        self._reaped += reaped
+        return reaped
+
+    def start(self) -> None:
+        """Start reaping stalled subscribers, if a stall timeout is set."""
+        if self._stall_timeout_seconds is None or self._reaper_task is not None:
+            return
+        self._reaper_task = asyncio.create_task(
+            self._reap_periodically(self._stall_timeout_seconds / 2)
+        )
+
+    async def close(self) -> None:
+        """Stop the reaper and close every remaining subscriber."""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            await asyncio.gather(self._reaper_task, return_exceptions=True)
+        for subscribers in self._queues.values():
+            for queue in subscribers:
+                queue.close()
+        self._queues.clear()
+        self._subscriber_count = 0
+
+    def _exceeded_limit(self, run_subscribers: int) -> str | None:
+        """Name the cap a new subscriber would exceed, if any."""
+        if (
+            self._max_subscribers_per_run is not None
+            and run_subscribers >= self._max_subscribers_per_run
+        ):
+            return "per_run"
+        if (
+            self._max_subscribers is not None
+            and self._subscriber_count >= self._max_subscribers
+        ):
+            return "global"
+        return None
+
+    def _unregister(self, run_id: str, queue: Subscription) -> bool:
+        """Drop a queue from the registry, returning whether it was registered."""
+        subscribers = self._queues.get(run_id)
+        if not subscribers or queue not in subscribers:
+            return False
+        remaining = tuple(other for other in subscribers if other is not queue)
+        if remaining:
+            self._queues[run_id] = remaining
+        else:
+            del self._queues[run_id]
+        self._subscriber_count -= 1
+        return True
+
+    async def _reap_periodically(self, interval: float) -> None:
+        """Reap stalled subscribers every interval."""
+        while True:
+            await asyncio.sleep(interval)
+            self.reap_stalled_subscribers()
+
+
+def _supersedes(queued: StreamEvent, event: StreamEvent) -> bool:
+    """Return whether a queued event must be kept over a new one of its run."""
+    return queued.state.step in TERMINAL_STEPS or queued.revision > event.revision
+
+
+def _log_fields(queue: Subscription) -> dict[str, object]:
+    """Return structured log fields describing a subscriber's delivery."""
+    stats = queue.stats()
+    return {
+        "run_id": stats.run_id,
+        "overflow_policy": queue.overflow_policy,
+        "delivered": stats.delivered,
+        "dropped": stats.dropped,
+        "max_lag": stats.max_lag,
+    }
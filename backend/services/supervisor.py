@@ -0,0 +1,120 @@
+"""Tracking of background pipeline tasks and graceful draining on shutdown."""
+
+import asyncio
+from collections.abc import Coroutine
+from dataclasses import dataclass
+import time
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class SupervisorStats:
+    """Pipeline task counters for this process."""
+
+    draining: bool
+    active_pipelines: int
+    drain_grace_seconds: float
+
+
+class PipelineSupervisor:
+    """
+    Owns the pipeline tasks running in this process.
+
+    Pipelines run as tracked tasks rather than request background tasks, so
+    shutdown can wait for them. Draining starts when the process is asked to
+    stop: new runs are refused, readiness fails, and running pipelines get
+    `grace_seconds` from the start of the drain to finish. Whatever is still
+    running then is cancelled and reported back with the tenant it was started
+    for, so it can be handed off from its last checkpoint instead of being
+    lost.
+    """
+
+    def __init__(self, grace_seconds: float = 25.0) -> None:
+        self._grace_seconds = grace_seconds
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._tenants: dict[str, str] = {}
+        self._drain_started_at: float | None = None
+
+    @property
+    def draining(self) -> bool:
+        """Whether the process has started draining."""
+        return self._drain_started_at is not None
+
+    @property
+    def active_run_ids(self) -> list[str]:
+        """Run ids of the pipelines still running."""
+        return list(self._tasks)
+
+    async def start(
+        self, run_id: str, pipeline: Coroutine[Any, Any, None], *, tenant: str
+    ) -> asyncio.Task[None]:
+        """
+        Run a pipeline for a tenant as a tracked task.
+
+        Yields once before returning, so the pipeline has started by the time
+        the caller responds.
+        """
+        task = asyncio.create_task(pipeline, name=f"pipeline:{run_id}")
+        self._tasks[run_id] = task
+        self._tenants[run_id] = tenant
+        task.add_done_callback(lambda _: self._forget(run_id, task))
+        await asyncio.sleep(0)
+        return task
+
+    def begin_drain(self) -> None:
+        """
+        Start draining; later calls keep the original start time.
+
+        Safe to call from a signal handler.
+        """
+        if self._drain_started_at is None:
+            self._drain_started_at = time.monotonic()
+
+    async def drain(self) -> dict[str, str]:
+        """
+        Wait for running pipelines until the grace period ends, then cancel them.
+
+        Returns:
+            The run ids of the pipelines that were cancelled, mapped to the
+            tenant each was started for.
+        """
+        self.begin_drain()
+        started_at = self._drain_started_at or time.monotonic()
+        logger.info(
+            "pipeline_drain_started",
+            active_pipelines=len(self._tasks),
+            grace_seconds=self._grace_seconds,
+        )
+        pending = set(self._tasks.values())
+        remaining = started_at + self._grace_seconds - time.monotonic()
+        if pending and remaining > 0:
+            _, pending = await asyncio.wait(pending, timeout=remaining)
+
+        cancelled = {
+            run_id: self._tenants[run_id]
+            for run_id, task in self._tasks.items()
+            if task in pending
+        }
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.info("pipeline_drain_finished", cancelled_runs=len(cancelled))
+        return cancelled
+
+    def stats(self) -> SupervisorStats:
+        """Return the current counters."""
+        return SupervisorStats(
+            draining=self.draining,
+            active_pipelines=len(self._tasks),
+            drain_grace_seconds=self._grace_seconds,
+        )
+
+    def _forget(self, run_id: str, task: asyncio.Task[None]) -> None:
+        """Stop tracking a finished pipeline task."""
+        if self._tasks.get(run_id) is task:
+            del self._tasks[run_id]
+            del self._tenants[run_id]
@@ -16,6 +16,7 @@ class AppSettings(BaseSettings):
 
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    api_workers: int = Field(default=1, ge=1)
     cors_origins: list[str] = Field(
         default_factory=lambda: [
             "http://localhost:8501",
@@ -23,9 +24,61 @@ class AppSettings(BaseSettings):
         ]
     )
 
-    state_backend: Literal["auto", "redis", "memory"] = "auto"
+    state_backend: Literal["auto", "redis", "memory", "sqlite"] = "auto"
     redis_url: str = "redis://localhost:6379/0"
     redis_ttl_seconds: int = 60 * 60 * 24 * 7
+    redis_max_connections: int = Field(default=50, ge=1)
+    redis_pool_timeout_seconds: float = Field(default=5.0, gt=0)
+    redis_socket_timeout_seconds: float = Field(default=5.0, gt=0)
+    redis_socket_connect_timeout_seconds: float = Field(default=2.0, gt=0)
+    redis_health_check_interval_seconds: int = Field(default=30, ge=0)
+    redis_retry_attempts: int = Field(default=3, ge=0)
+    redis_retry_backoff_base_seconds: float = Field(default=0.05, gt=0)
+    redis_retry_backoff_cap_seconds: float = Field(default=1.0, gt=0)
+    sqlite_path: str = "data/prd_state.sqlite3"
+    sqlite_max_batch_size: int = Field(default=64, ge=1)
+    state_write_behind: bool = False
+    state_write_behind_interval_ms: float = Field(default=5.0, gt=0)
+    state_write_behind_max_batch_size: int = Field(default=500, ge=1)
+    stream_queue_size: int = Field(default=100, ge=1)
+    stream_overflow_policy: Literal["drop_oldest", "keep_latest"] = "drop_oldest"
+    stream_replay_buffer_size: int = Field(default=32, ge=0)
+    stream_replay_max_runs: int = Field(default=1000, ge=1)
+    stream_heartbeat_seconds: float = Field(default=15.0, gt=0)
+    stream_send_timeout_seconds: float = Field(default=30.0, gt=0)
+    stream_stall_timeout_seconds: float = Field(default=120.0, gt=0)
+    stream_max_subscribers: int = Field(default=10_000, ge=1)
+    stream_max_subscribers_per_run: int = Field(default=100, ge=1)
+    ws_per_message_deflate: bool = True
+    idempotency_ttl_seconds: int = Field(default=60 * 60 * 24, ge=1)
+    idempotency_auto_key: bool = False
+    max_active_runs: int = Field(default=32, ge=1)
+    max_active_runs_per_adapter: int = Field(default=16, ge=1)
+    max_queued_runs: int = Field(default=100, ge=0)
+    admission_initial_run_seconds: float = Field(default=60.0, gt=0)
+    llm_max_concurrent_calls: int = Field(default=16, ge=1)
+    llm_interactive_weight: float = Field(default=8.0, gt=0)
+    llm_batch_weight: float = Field(default=1.0, gt=0)
+    llm_tenant_weights: dict[str, float] = Field(default_factory=dict)
+    export_cache_size: int = Field(default=128, ge=1)
+    drain_grace_seconds: float = Field(default=25.0, ge=0)
+    handoff_poll_seconds: float = Field(default=5.0, ge=0)
+    warm_imports: bool = False
+    metrics_enabled: bool = True
+    tracing_exporter: Literal["none", "otlp", "file"] = "none"
+    tracing_sample_ratio: float = Field(default=1.0, ge=0, le=1)
+    tracing_otlp_endpoint: str | None = None
+    tracing_file_path: str = "traces.jsonl"
+    tracing_service_name: str = "agentic-prd-api"
+    profiling_enabled: bool = False
+    profiling_dir: str = "profiles"
+    profiling_interval_seconds: float = Field(default=0.001, gt=0)
+    profiling_max_seconds: float = Field(default=120.0, gt=0)
+    admin_token: str | None = Field(default=None, min_length=1)
+    ready_cache_seconds: float = Field(default=2.0, ge=0)
+
+    fake_adapter_enabled: bool = False
+    fake_adapter_latency_ms: float = Field(default=0.0, ge=0)
 
     openai_api_key: str | None = None
     google_api_key: str | None = None
@@ -1,8 +1,50 @@
 """Defines the protocol for state management stores."""
 
+import base64
+import binascii
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Protocol
 
-from backend.models import PRDState
+from backend.models import AdapterType, PRDState, WorkflowStep
+
+
+@dataclass(frozen=True, slots=True)
+class RunPage:
+    """One page of runs ordered newest first."""
+
+    states: list[PRDState]
+    next_cursor: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Handoff:
+    """An unfinished run handed off by a draining worker."""
+
+    run_id: str
+    tenant: str
+
+
+def encode_cursor(created_at: float, run_id: str) -> str:
+    """Encode a keyset position as an opaque pagination cursor."""
+    raw = f"{created_at!r}|{run_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    """
+    Decode a pagination cursor into its keyset position.
+
+    Raises:
+        ValueError: If the cursor was not produced by `encode_cursor`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode()
+        created_at, run_id = raw.split("|", 1)
+        return float(created_at), run_id
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
 
 
 class StateStore(Protocol):
@@ -22,6 +64,15 @@ class StateStore(Protocol):
         """
         ...
 
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        """
+        Saves several PRD states, in as few round trips as the backend allows.
+
+        Args:
+            states: The PRD states to save, in order.
+        """
+        ...
+
     async def get(self, run_id: str) -> PRDState | None:
         """
         Retrieves a PRD state by its run ID.
@@ -34,6 +85,115 @@ class StateStore(Protocol):
         """
         ...
 
+    async def get_revision(self, run_id: str) -> int | None:
+        """
+        Retrieves the latest revision of a run without decoding its state.
+
+        Args:
+            run_id: The unique identifier of the run.
+
+        Returns:
+            The latest revision if the run is known, otherwise None.
+        """
+        ...
+
+    async def get_many(self, run_ids: Sequence[str]) -> list[PRDState | None]:
+        """
+        Retrieves several PRD states by run ID.
+
+        Args:
+            run_ids: The unique identifiers of the runs.
+
+        Returns:
+            One entry per run ID, in order, with None for unknown runs.
+        """
+        ...
+
+    async def list_runs(
+        self,
+        *,
+        step: WorkflowStep | None = None,
+        adapter: AdapterType | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> RunPage:
+        """
+        Lists the latest state of each run, newest first.
+
+        Implementations answer this from secondary indexes maintained in
+        `save`, so the cost depends on the page size, not the number of runs.
+
+        Args:
+            step: Only include runs whose latest state is at this step.
+            adapter: Only include runs generated by this adapter.
+            created_after: Only include states created at or after this time.
+            created_before: Only include states created before this time.
+            limit: Maximum number of runs to return.
+            cursor: The `next_cursor` of the previous page.
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        ...
+
+    async def claim_idempotency_key(
+        self, key: str, run_id: str, ttl_seconds: int
+    ) -> str:
+        """
+        Atomically map an idempotency key to a run, unless it is already mapped.
+
+        Concurrent claims of the same key all return the same run ID.
+
+        Args:
+            key: The idempotency key.
+            run_id: The run to map the key to if it is unclaimed or expired.
+            ttl_seconds: How long a new mapping lasts.
+
+        Returns:
+            The run ID the key maps to: `run_id` if this call claimed the key,
+            otherwise the run of the earlier claim.
+        """
+        ...
+
+    async def release_idempotency_key(self, key: str, run_id: str) -> None:
+        """
+        Drops an idempotency key claimed for a run that was never created.
+
+        The key is only dropped while it still maps to `run_id`, so a later
+        claim by another run is left in place.
+
+        Args:
+            key: The idempotency key.
+            run_id: The run whose claim is released.
+        """
+        ...
+
+    async def enqueue_handoff(self, run_id: str, tenant: str) -> None:
+        """
+        Hands an unfinished run over to whichever worker claims it next.
+
+        Args:
+            run_id: The run whose latest saved state is its checkpoint.
+            tenant: The tenant the run was admitted for, to resume it under.
+        """
+        ...
+
+    async def claim_handoffs(self, limit: int) -> list[Handoff]:
+        """
+        Atomically takes runs off the handoff queue, oldest first.
+
+        Each handed-off run is claimed by exactly one caller.
+
+        Args:
+            limit: Maximum number of runs to claim.
+
+        Returns:
+            The claimed runs and their tenants.
+        """
+        ...
+
     async def ping(self) -> bool:
         """Return whether the backing store is healthy."""
         ...
@@ -2,32 +2,134 @@
 In-memory implementation of the state store for local development and testing.
 """
 
-from backend.models import PRDState
-from backend.state.base import StateStore
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+from datetime import datetime
+import time
+
+from backend.models import AdapterType, PRDState, WorkflowStep
+from backend.state.base import (
+    Handoff,
+    RunPage,
+    StateStore,
+    decode_cursor,
+    encode_cursor,
+)
+
+_IndexEntry = tuple[float, str]
 
 
 class InMemoryStore(StateStore):
     """
     A simple in-memory key-value store using a Python dictionary.
 
+    Run listings are served from sorted `(created_at, run_id)` indexes, one per
+    filter combination, kept up to date on every save.
+
     This class is not thread-safe and is intended for single-instance,
     local development scenarios.
     """
 
     _store: dict[str, PRDState]
+    _indexes: dict[str, list[_IndexEntry]]
+    _idempotency_keys: dict[str, tuple[str, float]]
+    _handoffs: dict[str, str]
     backend_name = "memory"
 
     def __init__(self) -> None:
         self._store = {}
+        self._indexes = {}
+        self._idempotency_keys = {}
+        self._handoffs = {}
 
     async def save(self, state: PRDState) -> None:
         """Saves the PRD state to the in-memory dictionary."""
+        previous = self._store.get(state.run_id)
+        if previous is not None:
+            previous_entry = (previous.created_at.timestamp(), previous.run_id)
+            for key in _index_keys(previous.step, previous.adapter):
+                self._remove_entry(key, previous_entry)
+
         self._store[state.run_id] = state
+        entry = (state.created_at.timestamp(), state.run_id)
+        for key in _index_keys(state.step, state.adapter):
+            insort(self._indexes.setdefault(key, []), entry)
+
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        """Saves several PRD states to the in-memory dictionary."""
+        for state in states:
+            await self.save(state)
 
     async def get(self, run_id: str) -> PRDState | None:
         """Retrieves a PRD state from the in-memory dictionary."""
         return self._store.get(run_id)
 
+    async def get_revision(self, run_id: str) -> int | None:
+        """Retrieves the latest revision from the in-memory dictionary."""
+        state = self._store.get(run_id)
+        return None if state is None else state.revision
+
+    async def get_many(self, run_ids: Sequence[str]) -> list[PRDState | None]:
+        """Retrieves several PRD states from the in-memory dictionary."""
+        return [self._store.get(run_id) for run_id in run_ids]
+
+    async def list_runs(
+        self,
+        *,
+        step: WorkflowStep | None = None,
+        adapter: AdapterType | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> RunPage:
+        """Lists runs newest first from the matching sorted index."""
+        index = self._indexes.get(_index_key(step, adapter), [])
+        low = 0
+        if created_after is not None:
+            low = bisect_left(index, (created_after.timestamp(), ""))
+        high = len(index)
+        if created_before is not None:
+            high = bisect_left(index, (created_before.timestamp(), ""))
+        if cursor is not None:
+            high = min(high, bisect_left(index, decode_cursor(cursor)))
+
+        start = max(low, high - limit)
+        entries = index[start:high][::-1]
+        next_cursor = None
+        if start > low and entries:
+            next_cursor = encode_cursor(*entries[-1])
+        return RunPage(
+            states=[self._store[run_id] for _, run_id in entries],
+            next_cursor=next_cursor,
+        )
+
+    async def claim_idempotency_key(
+        self, key: str, run_id: str, ttl_seconds: int
+    ) -> str:
+        """Maps an idempotency key to a run unless an unexpired mapping exists."""
+        now = time.monotonic()
+        claimed = self._idempotency_keys.get(key)
+        if claimed is not None and claimed[1] > now:
+            return claimed[0]
+        self._idempotency_keys[key] = (run_id, now + ttl_seconds)
+        return run_id
+
+    async def release_idempotency_key(self, key: str, run_id: str) -> None:
+        """Drops an idempotency key if it still maps to the run."""
+        claimed = self._idempotency_keys.get(key)
+        if claimed is not None and claimed[0] == run_id:
+            del self._idempotency_keys[key]
+
+    async def enqueue_handoff(self, run_id: str, tenant: str) -> None:
+        """Queues a run for handoff within this process."""
+        self._handoffs.setdefault(run_id, tenant)
+
+    async def claim_handoffs(self, limit: int) -> list[Handoff]:
+        """Takes the oldest queued handoffs."""
+        claimed = list(self._handoffs)[:limit]
+        return [Handoff(run_id, self._handoffs.pop(run_id)) for run_id in claimed]
+
     async def ping(self) -> bool:
         """The in-memory store is always ready for the current process."""
         return True
@@ -35,3 +137,30 @@ class InMemoryStore(StateStore):
     async def close(self) -> None:
         """Release in-memory resources."""
         self._store.clear()
+        self._indexes.clear()
+        self._idempotency_keys.clear()
+        self._handoffs.clear()
+
+    def _remove_entry(self, key: str, entry: _IndexEntry) -> None:
+        """Remove an entry from a sorted index if it is present."""
+        index = self._indexes.get(key)
+        if not index:
+            return
+        position = bisect_left(index, entry)
+        if position < len(index) and index[position] == entry:
+            del index[position]
+        if not index:
+            del self._indexes[key]
+
+
+def _index_key(step: str | None, adapter: str | None) -> str:
+    """Name the index serving a step/adapter filter combination."""
+    return f"step={step or '*'}:adapter={adapter or '*'}"
+
+
+def _index_keys(step: str, adapter: str | None) -> list[str]:
+    """Return every index a run with this step and adapter belongs to."""
+    keys = [_index_key(None, None), _index_key(step, None)]
+    if adapter is not None:
+        keys += [_index_key(None, adapter), _index_key(step, adapter)]
+    return keys
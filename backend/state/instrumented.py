@@ -0,0 +1,111 @@
+"""Latency metrics and tracing around another state store."""
+
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+
+from backend.metrics import observe_store
+from backend.models import AdapterType, PRDState, WorkflowStep
+from backend.state.base import Handoff, RunPage, StateStore
+from backend.tracing import start_span
+
+
+class InstrumentedStore(StateStore):
+    """
+    Records the latency of reads and writes made through the wrapped store.
+
+    Every save, get and listing is timed into the state store histogram,
+    labelled with the wrapped backend and the operation, and traced as a
+    `state_store.<operation>` span. Handoff, idempotency and lifecycle calls
+    pass straight through.
+    """
+
+    def __init__(self, inner: StateStore) -> None:
+        self.backend_name = inner.backend_name
+        self._inner = inner
+
+    @contextmanager
+    def _measure(self, operation: str, run_id: str | None = None) -> Iterator[None]:
+        """Trace one operation and record its latency, even if it fails."""
+        started = perf_counter()
+        try:
+            with start_span(
+                f"state_store.{operation}",
+                {"db.system": self.backend_name, "prd.run_id": run_id},
+            ):
+                yield
+        finally:
+            observe_store(self.backend_name, operation, perf_counter() - started)
+
+    async def save(self, state: PRDState) -> None:
+        """Save a state through the wrapped store, timing the write."""
+        with self._measure("save", state.run_id):
+            await self._inner.save(state)
+
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        """Save several states through the wrapped store, timing the write."""
+        with self._measure("save_many"):
+            await self._inner.save_many(states)
+
+    async def get(self, run_id: str) -> PRDState | None:
+        """Read a state from the wrapped store, timing the read."""
+        with self._measure("get", run_id):
+            return await self._inner.get(run_id)
+
+    async def get_revision(self, run_id: str) -> int | None:
+        """Read a revision from the wrapped store, timing the read."""
+        with self._measure("get_revision", run_id):
+            return await self._inner.get_revision(run_id)
+
+    async def get_many(self, run_ids: Sequence[str]) -> list[PRDState | None]:
+        """Read several states from the wrapped store, timing the read."""
+        with self._measure("get_many"):
+            return await self._inner.get_many(run_ids)
+
+    async def list_runs(
+        self,
+        *,
+        step: WorkflowStep | None = None,
+        adapter: AdapterType | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> RunPage:
+        """List runs from the wrapped store, timing the listing."""
+        with self._measure("list_runs"):
+            return await self._inner.list_runs(
+                step=step,
+                adapter=adapter,
+                created_after=created_after,
+                created_before=created_before,
+                limit=limit,
+                cursor=cursor,
+            )
+
+    async def claim_idempotency_key(
+        self, key: str, run_id: str, ttl_seconds: int
+    ) -> str:
+        """Claim an idempotency key in the wrapped store."""
+        return await self._inner.claim_idempotency_key(key, run_id, ttl_seconds)
+
+    async def release_idempotency_key(self, key: str, run_id: str) -> None:
+        """Release an idempotency key in the wrapped store."""
+        await self._inner.release_idempotency_key(key, run_id)
+
+    async def enqueue_handoff(self, run_id: str, tenant: str) -> None:
+        """Hand off a run through the wrapped store."""
+        await self._inner.enqueue_handoff(run_id, tenant)
+
+    async def claim_handoffs(self, limit: int) -> list[Handoff]:
+        """Claim handoffs from the wrapped store."""
+        return await self._inner.claim_handoffs(limit)
+
+    async def ping(self) -> bool:
+        """Return whether the wrapped store is healthy."""
+        return await self._inner.ping()
+
+    async def close(self) -> None:
+        """Close the wrapped store."""
+        await self._inner.close()
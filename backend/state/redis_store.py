@@ -1,45 +1,210 @@
 """State manager for reading and writing PRD state to Redis."""
 
+from collections.abc import Sequence
+from datetime import datetime
 from inspect import isawaitable
+import time
+from typing import Self
 
+import orjson
 import redis
 import redis.asyncio as aredis
+from redis.asyncio.retry import Retry
+from redis.backoff import EqualJitterBackoff
 
-from backend.models import PRDState
-from backend.state.base import StateStore
+from backend.models import AdapterType, PRDState, WorkflowStep
+from backend.state.base import (
+    Handoff,
+    RunPage,
+    StateStore,
+    decode_cursor,
+    encode_cursor,
+)
 
 
 class RedisStore(StateStore):
     """
     A state store that persists PRDState in a Redis database.
+
+    Besides the state itself, every save maintains sorted-set indexes scored by
+    `created_at`, one per step/adapter filter combination, so run listings
+    never need to scan the keyspace. A small per-run hash records the run's
+    revision and the step and adapter it is indexed under, so a save only
+    moves the index entries that changed.
     """
 
     _client: aredis.Redis
     backend_name = "redis"
 
-    def __init__(self, redis_url: str, ttl_seconds: int = 60 * 60 * 24 * 7):
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int = 60 * 60 * 24 * 7,
+        *,
+        max_connections: int = 50,
+        pool_timeout_seconds: float = 5.0,
+        socket_timeout_seconds: float = 5.0,
+        socket_connect_timeout_seconds: float = 2.0,
+        health_check_interval_seconds: int = 30,
+        retry_attempts: int = 3,
+        retry_backoff_base_seconds: float = 0.05,
+        retry_backoff_cap_seconds: float = 1.0,
+    ):
         """
         Initializes the Redis client.
 
         Args:
             redis_url: The connection URL for Redis.
             ttl_seconds: The retention period for saved run state.
+            max_connections: Size of the connection pool. Callers wait for a
+                free connection instead of opening more.
+            pool_timeout_seconds: How long to wait for a free pooled connection.
+            socket_timeout_seconds: Timeout for a single command round trip.
+            socket_connect_timeout_seconds: Timeout for opening a connection.
+            health_check_interval_seconds: Idle time after which a pooled
+                connection is checked before reuse.
+            retry_attempts: Retries for connection errors and timeouts.
+            retry_backoff_base_seconds: First retry delay, doubled per attempt.
+            retry_backoff_cap_seconds: Upper bound for a single retry delay.
         """
-        self._client = aredis.from_url(redis_url, decode_responses=True)
+        retry = Retry(
+            EqualJitterBackoff(
+                cap=retry_backoff_cap_seconds, base=retry_backoff_base_seconds
+            ),
+            retry_attempts,
+        )
+        pool: aredis.BlockingConnectionPool = aredis.BlockingConnectionPool.from_url(
+            redis_url,
+            decode_responses=True,
+            max_connections=max_connections,
+            timeout=pool_timeout_seconds,
+            socket_timeout=socket_timeout_seconds,
+            socket_connect_timeout=socket_connect_timeout_seconds,
+            health_check_interval=health_check_interval_seconds,
+            retry=retry,
+        )
+        # The client owns the pool, so closing the store disconnects it too.
+        # types-redis predates `from_pool`.
+        self._client = aredis.Redis.from_pool(pool)  # type: ignore[attr-defined]
         self._ttl_seconds = ttl_seconds
 
+    @classmethod
+    def from_client(
+        cls, client: aredis.Redis, ttl_seconds: int = 60 * 60 * 24 * 7
+    ) -> Self:
+        """
+        Creates a store around an existing client, such as an in-process fake.
+
+        The client must decode responses to strings. Closing the store closes
+        the client.
+        """
+        store = cls.__new__(cls)
+        store._client = client
+        store._ttl_seconds = ttl_seconds
+        return store
+
     def _get_key(self, run_id: str) -> str:
         """Generates the Redis key for a given run ID."""
         return f"prd_state:{run_id}"
 
+    def _get_run_key(self, run_id: str) -> str:
+        """Generates the Redis key of a run's revision and indexed filters."""
+        return f"prd_run:{run_id}"
+
+    def _get_idempotency_key(self, key: str) -> str:
+        """Generates the Redis key mapping an idempotency key to a run."""
+        return f"prd_idempotency:{key}"
+
+    def _get_handoff_key(self) -> str:
+        """Generates the Redis key of the handoff queue."""
+        return "prd_handoffs"
+
+    def _get_index_key(self, step: str | None, adapter: str | None) -> str:
+        """Generates the Redis key of the index for a filter combination."""
+        return f"prd_runs:step={step or '*'}:adapter={adapter or '*'}"
+
     async def save(self, state: PRDState) -> None:
         """
         Saves the PRD state to Redis as a JSON string.
 
-        The state is stored with a TTL of 7 days.
+        The state is stored with a TTL of 7 days. When the run changes step, its
+        entries move out of the old step's indexes, and entries older than the
+        TTL are trimmed from the indexes it joins, in the same transaction.
+        """
+        await self.save_many([state])
+
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        """
+        Saves several PRD states in one pipelined transaction.
+
+        The indexed step and adapter of every run are read first in one
+        pipelined round trip. Saves of one run are sequential, so the read
+        cannot race another save of the same run.
+        """
+        if not states:
+            return
+        lookup = self._client.pipeline(transaction=False)
+        for state in states:
+            lookup.hmget(self._get_run_key(state.run_id), "step", "adapter")
+        indexed: dict[str, tuple[str | None, str | None] | None] = {}
+        for state, (step, adapter) in zip(states, await lookup.execute(), strict=True):
+            indexed.setdefault(state.run_id, None if step is None else (step, adapter))
+
+        expired_before = time.time() - self._ttl_seconds
+        pipe = self._client.pipeline(transaction=True)
+        for state in states:
+            self._queue_save(pipe, state, indexed.get(state.run_id), expired_before)
+            indexed[state.run_id] = (state.step, state.adapter)
+        await pipe.execute()
+
+    def _queue_save(
+        self,
+        pipe: aredis.client.Pipeline,
+        state: PRDState,
+        previous: tuple[str | None, str | None] | None,
+        expired_before: float,
+    ) -> None:
+        """
+        Queue the commands that store one state and update its indexes.
+
+        `previous` is the step and adapter the run is currently indexed under,
+        or None for a new run. Only the indexes the run leaves or joins are
+        touched besides the score updates of the ones it stays in.
         """
-        key = self._get_key(state.run_id)
-        await self._client.set(key, state.model_dump_json(), ex=self._ttl_seconds)
+        run_id = state.run_id
+        pipe.set(self._get_key(run_id), state.storage_json, ex=self._ttl_seconds)
+        run_key = self._get_run_key(run_id)
+        pipe.hset(
+            run_key,
+            mapping={
+                "revision": state.revision,
+                "step": state.step,
+                "adapter": state.adapter or "",
+            },
+        )
+        pipe.expire(run_key, self._ttl_seconds)
+
+        current = self._index_keys(state.step, state.adapter)
+        previous_keys: set[str] = set()
+        if previous is not None:
+            previous_keys = self._index_keys(previous[0], previous[1] or None)
+        for index_key in previous_keys - current:
+            pipe.zrem(index_key, run_id)
+        score = state.created_at.timestamp()
+        for index_key in current:
+            pipe.zadd(index_key, {run_id: score})
+        # Each run trims an index once, when it joins it.
+        for index_key in current - previous_keys:
+            pipe.zremrangebyscore(index_key, "-inf", f"({expired_before}")
+
+    def _index_keys(self, step: str | None, adapter: str | None) -> set[str]:
+        """Return the indexes listing a run with the given step and adapter."""
+        adapters = [None] if adapter is None else [None, adapter]
+        return {
+            self._get_index_key(indexed_step, indexed_adapter)
+            for indexed_step in (None, step)
+            for indexed_adapter in adapters
+        }
 
     async def get(self, run_id: str) -> PRDState | None:
         """
@@ -49,7 +214,124 @@ class RedisStore(StateStore):
         data = await self._client.get(key)
         if not data:
             return None
-        return PRDState.model_validate_json(data)
+        return PRDState.from_json(data)
+
+    async def get_revision(self, run_id: str) -> int | None:
+        """
+        Retrieves a run's latest revision from its small run hash.
+        """
+        revision = await self._client.hget(self._get_run_key(run_id), "revision")
+        return None if revision is None else int(revision)
+
+    async def get_many(self, run_ids: Sequence[str]) -> list[PRDState | None]:
+        """
+        Retrieves several PRD states with a single MGET.
+        """
+        if not run_ids:
+            return []
+        values = await self._client.mget([self._get_key(run_id) for run_id in run_ids])
+        return [PRDState.from_json(value) if value else None for value in values]
+
+    async def list_runs(
+        self,
+        *,
+        step: WorkflowStep | None = None,
+        adapter: AdapterType | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> RunPage:
+        """
+        Lists runs newest first from the matching sorted-set index.
+
+        Members with equal scores are ordered by run ID, so the cursor resumes
+        inside a tie by filtering the (rare) entries sharing its score.
+        """
+        index_key = self._get_index_key(step, adapter)
+        low = "-inf" if created_after is None else repr(created_after.timestamp())
+        high = "+inf" if created_before is None else f"({created_before.timestamp()!r}"
+
+        pipe = self._client.pipeline(transaction=False)
+        cursor_run_id = None
+        if cursor is not None:
+            cursor_score, cursor_run_id = decode_cursor(cursor)
+            high = f"({cursor_score!r}"
+            pipe.zrevrangebyscore(
+                index_key, cursor_score, cursor_score, withscores=True
+            )
+        pipe.zrevrangebyscore(
+            index_key, high, low, start=0, num=limit + 1, withscores=True
+        )
+        results = await pipe.execute()
+
+        entries: list[tuple[str, float]] = []
+        if cursor_run_id is not None:
+            entries = [entry for entry in results[0] if entry[0] < cursor_run_id]
+        entries += results[-1]
+
+        page = entries[:limit]
+        page_states = await self.get_many([run_id for run_id, _ in page])
+        expired = [
+            run_id
+            for (run_id, _), state in zip(page, page_states, strict=True)
+            if state is None
+        ]
+        if expired:
+            await self._client.zrem(index_key, *expired)
+        states = [state for state in page_states if state is not None]
+
+        next_cursor = None
+        if len(entries) > limit:
+            last_run_id, last_score = page[-1]
+            next_cursor = encode_cursor(last_score, last_run_id)
+        return RunPage(states=states, next_cursor=next_cursor)
+
+    async def claim_idempotency_key(
+        self, key: str, run_id: str, ttl_seconds: int
+    ) -> str:
+        """
+        Claims an idempotency key with `SET NX EX`, so concurrent claims race safely.
+        """
+        redis_key = self._get_idempotency_key(key)
+        while True:
+            if await self._client.set(redis_key, run_id, nx=True, ex=ttl_seconds):
+                return run_id
+            claimed = await self._client.get(redis_key)
+            # The earlier claim may expire between SET and GET; claim again.
+            if claimed is not None:
+                return str(claimed)
+
+    async def release_idempotency_key(self, key: str, run_id: str) -> None:
+        """
+        Deletes an idempotency key if it still maps to the run, under `WATCH`.
+        """
+        redis_key = self._get_idempotency_key(key)
+        async with self._client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(redis_key)
+                if await pipe.get(redis_key) != run_id:
+                    return
+                pipe.multi()
+                pipe.delete(redis_key)
+                await pipe.execute()
+            except redis.WatchError:
+                # Another run claimed the key in between; that claim stays.
+                return
+
+    async def enqueue_handoff(self, run_id: str, tenant: str) -> None:
+        """
+        Pushes a run and its tenant onto the shared handoff list.
+        """
+        entry = orjson.dumps([run_id, tenant]).decode()
+        await self._client.rpush(self._get_handoff_key(), entry)
+
+    async def claim_handoffs(self, limit: int) -> list[Handoff]:
+        """
+        Pops the oldest handoffs with `LPOP count`, so each run has one claimant.
+        """
+        claimed = await self._client.lpop(self._get_handoff_key(), limit)
+        return [Handoff(*orjson.loads(entry)) for entry in claimed or []]
 
     async def ping(self) -> bool:
         """Check whether Redis is reachable."""
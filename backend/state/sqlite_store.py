@@ -0,0 +1,398 @@
+"""State store that persists PRD state in a local SQLite database."""
+
+import asyncio
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+import sqlite3
+import time
+from typing import TypeVar
+
+from backend.models import AdapterType, PRDState, WorkflowStep, hash_idea
+from backend.state.base import (
+    Handoff,
+    RunPage,
+    StateStore,
+    decode_cursor,
+    encode_cursor,
+)
+
+T = TypeVar("T")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS prd_runs (
+        run_id TEXT PRIMARY KEY,
+        step TEXT NOT NULL,
+        adapter TEXT,
+        revision INTEGER NOT NULL,
+        idea_hash TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        state TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_prd_runs_step_created "
+    "ON prd_runs (step, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_prd_runs_adapter_created "
+    "ON prd_runs (adapter, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_prd_runs_created ON prd_runs (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_prd_runs_idea_hash ON prd_runs (idea_hash)",
+    """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        key TEXT PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires "
+    "ON idempotency_keys (expires_at)",
+    """
+    CREATE TABLE IF NOT EXISTS handoffs (
+        run_id TEXT PRIMARY KEY,
+        tenant TEXT NOT NULL,
+        queued_at REAL NOT NULL
+    )
+    """,
+)
+
+_UPSERT = """
+    INSERT INTO prd_runs (
+        run_id, step, adapter, revision, idea_hash, created_at, state
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (run_id) DO UPDATE SET
+        step = excluded.step,
+        adapter = excluded.adapter,
+        revision = excluded.revision,
+        idea_hash = excluded.idea_hash,
+        created_at = excluded.created_at,
+        state = excluded.state
+"""
+
+_Row = tuple[str, str, str | None, int, str, float, str]
+
+
+class SQLiteStore(StateStore):
+    """
+    A durable state store for single-node deployments.
+
+    The database runs in WAL mode so readers never block the writer. All
+    SQLite calls run on one dedicated worker thread, keeping the event loop
+    free, and concurrent saves are grouped into a single commit.
+    """
+
+    backend_name = "sqlite"
+
+    def __init__(self, path: str, max_batch_size: int = 64):
+        """
+        Initializes the SQLite store.
+
+        Args:
+            path: Filesystem path of the database file.
+            max_batch_size: Maximum number of saves grouped into one commit.
+        """
+        self._path = path
+        self._max_batch_size = max_batch_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-store"
+        )
+        self._connection: sqlite3.Connection | None = None
+        self._pending: list[tuple[_Row, asyncio.Future[None]]] = []
+        self._flush_task: asyncio.Task[None] | None = None
+        self._commit_count = 0
+
+    async def save(self, state: PRDState) -> None:
+        """
+        Saves the PRD state, waiting until its batch has been committed.
+        """
+        await self.save_many([state])
+
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        """
+        Saves several PRD states, waiting until they have been committed.
+        """
+        if not states:
+            return
+        loop = asyncio.get_running_loop()
+        futures: list[asyncio.Future[None]] = []
+        for state in states:
+            future: asyncio.Future[None] = loop.create_future()
+            self._pending.append((_to_row(state), future))
+            futures.append(future)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+        await asyncio.gather(*futures)
+
+    async def get(self, run_id: str) -> PRDState | None:
+        """
+        Retrieves a PRD state from SQLite by its run ID.
+        """
+        row = await self._run(
+            lambda connection: connection.execute(
+                "SELECT state FROM prd_runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        )
+        if row is None:
+            return None
+        return PRDState.from_json(row[0])
+
+    async def get_revision(self, run_id: str) -> int | None:
+        """
+        Retrieves the latest revision from its indexed column.
+        """
+        row = await self._run(
+            lambda connection: connection.execute(
+                "SELECT revision FROM prd_runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        )
+        return None if row is None else int(row[0])
+
+    async def get_many(self, run_ids: Sequence[str]) -> list[PRDState | None]:
+        """
+        Retrieves several PRD states with a single query.
+        """
+        if not run_ids:
+            return []
+        placeholders = ", ".join("?" for _ in run_ids)
+        query = (
+            f"SELECT run_id, state FROM prd_runs "  # nosec B608
+            f"WHERE run_id IN ({placeholders})"
+        )
+        rows = await self._run(
+            lambda connection: connection.execute(query, list(run_ids)).fetchall()
+        )
+        states = {run_id: PRDState.from_json(data) for run_id, data in rows}
+        return [states.get(run_id) for run_id in run_ids]
+
+    async def list_runs(
+        self,
+        *,
+        step: WorkflowStep | None = None,
+        adapter: AdapterType | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        idea: str | None = None,
+    ) -> RunPage:
+        """
+        Lists runs newest first using the table indexes.
+
+        Args:
+            step: Only include runs whose latest state is at this step.
+            adapter: Only include runs generated by this adapter.
+            created_after: Only include states created at or after this time.
+            created_before: Only include states created before this time.
+            limit: Maximum number of runs to return.
+            cursor: The `next_cursor` of the previous page.
+            idea: Only include runs for this idea, compared by normalized hash.
+        """
+        clauses: list[str] = []
+        params: list[object] = []
+        if step is not None:
+            clauses.append("step = ?")
+            params.append(step)
+        if adapter is not None:
+            clauses.append("adapter = ?")
+            params.append(adapter)
+        if created_after is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_after.timestamp())
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(created_before.timestamp())
+        if cursor is not None:
+            cursor_created_at, cursor_run_id = decode_cursor(cursor)
+            clauses.append("(created_at, run_id) < (?, ?)")
+            params.extend([cursor_created_at, cursor_run_id])
+        if idea is not None:
+            clauses.append("idea_hash = ?")
+            params.append(hash_idea(idea))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = (
+            f"SELECT created_at, run_id, state FROM prd_runs {where} "  # nosec B608
+            "ORDER BY created_at DESC, run_id DESC LIMIT ?"
+        )
+        params.append(limit + 1)
+
+        rows = await self._run(
+            lambda connection: connection.execute(query, params).fetchall()
+        )
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(page[-1][0], page[-1][1])
+        return RunPage(
+            states=[PRDState.from_json(row[2]) for row in page],
+            next_cursor=next_cursor,
+        )
+
+    async def claim_idempotency_key(
+        self, key: str, run_id: str, ttl_seconds: int
+    ) -> str:
+        """
+        Claims an idempotency key with `INSERT OR IGNORE` in one transaction.
+
+        Expired keys are purged first. All writes run on the single worker
+        thread, so concurrent claims are serialized.
+        """
+        return await self._run(
+            partial(self._claim_key, key=key, run_id=run_id, ttl_seconds=ttl_seconds)
+        )
+
+    async def release_idempotency_key(self, key: str, run_id: str) -> None:
+        """
+        Deletes an idempotency key if it still maps to the run.
+        """
+
+        def release(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    "DELETE FROM idempotency_keys WHERE key = ? AND run_id = ?",
+                    (key, run_id),
+                )
+
+        await self._run(release)
+
+    async def enqueue_handoff(self, run_id: str, tenant: str) -> None:
+        """
+        Queues a run for handoff in the shared database.
+        """
+
+        def enqueue(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    "INSERT OR IGNORE INTO handoffs (run_id, tenant, queued_at) "
+                    "VALUES (?, ?, ?)",
+                    (run_id, tenant, time.time()),
+                )
+
+        await self._run(enqueue)
+
+    async def claim_handoffs(self, limit: int) -> list[Handoff]:
+        """
+        Claims the oldest handoffs with `DELETE ... RETURNING` in one transaction.
+        """
+        return await self._run(partial(self._claim_handoffs, limit=limit))
+
+    async def ping(self) -> bool:
+        """Check whether the database can be opened and queried."""
+        try:
+            await self._run(lambda connection: connection.execute("SELECT 1"))
+        except (sqlite3.Error, OSError):
+            return False
+        return True
+
+    async def close(self) -> None:
+        """Flush pending writes and close the database connection."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._close_connection
+        )
+        self._executor.shutdown(wait=True)
+
+    async def _flush_pending(self) -> None:
+        """Commit queued saves in batches until the queue is empty."""
+        while self._pending:
+            batch = self._pending[: self._max_batch_size]
+            del self._pending[: self._max_batch_size]
+            rows = [row for row, _ in batch]
+            try:
+                await self._run(partial(self._write_batch, rows=rows))
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+    def _write_batch(self, connection: sqlite3.Connection, rows: list[_Row]) -> None:
+        """Write a batch of rows inside one transaction."""
+        with connection:
+            connection.executemany(_UPSERT, rows)
+        self._commit_count += 1
+
+    def _claim_key(
+        self,
+        connection: sqlite3.Connection,
+        key: str,
+        run_id: str,
+        ttl_seconds: int,
+    ) -> str:
+        """Claim an idempotency key and return the run it maps to."""
+        now = time.time()
+        with connection:
+            connection.execute(
+                "DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,)
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (key, run_id, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, run_id, now + ttl_seconds),
+            )
+            row = connection.execute(
+                "SELECT run_id FROM idempotency_keys WHERE key = ?", (key,)
+            ).fetchone()
+        return str(row[0])
+
+    def _claim_handoffs(
+        self, connection: sqlite3.Connection, limit: int
+    ) -> list[Handoff]:
+        """Delete and return the oldest queued handoffs."""
+        with connection:
+            rows = connection.execute(
+                "DELETE FROM handoffs WHERE run_id IN ("
+                "SELECT run_id FROM handoffs ORDER BY queued_at LIMIT ?"
+                ") RETURNING run_id, tenant, queued_at",
+                (limit,),
+            ).fetchall()
+        return [
+            Handoff(str(run_id), str(tenant))
+            for run_id, tenant, _ in sorted(rows, key=lambda row: row[2])
+        ]
+
+    async def _run(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        """Run a database operation on the dedicated worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: operation(self._get_connection())
+        )
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Open the connection on first use from the worker thread."""
+        if self._connection is None:
+            if self._path != ":memory:":
+                Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=5000")
+            with connection:
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+            self._connection = connection
+        return self._connection
+
+    def _close_connection(self) -> None:
+        """Close the connection from the worker thread."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def _to_row(state: PRDState) -> _Row:
+    """Convert a state into its indexed table row."""
+    return (
+        state.run_id,
+        state.step,
+        state.adapter,
+        state.revision,
+        hash_idea(state.idea),
+        state.created_at.timestamp(),
+        state.storage_json,
+    )
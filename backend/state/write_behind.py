@@ -0,0 +1,202 @@
+"""Write-behind buffering in front of another state store."""
+
+import asyncio
+from collections.abc import Sequence
+from datetime import datetime
+import time
+
+import structlog
+
+from backend.models import TERMINAL_STEPS, AdapterType, PRDState, WorkflowStep
+from backend.state.base import Handoff, RunPage, StateStore
+
+logger = structlog.get_logger(__name__)
+
+
+class WriteBehindStore(StateStore):
+    """
+    Buffers non-terminal saves and flushes them to the wrapped store in batches.
+
+    Saves are coalesced per run, so only the newest buffered state of a run is
+    written, and all buffered runs are flushed together with `save_many` every
+    `flush_interval_seconds`. Terminal states are written synchronously, after
+    any in-flight batch, so a `Complete` or `Error` state is durable before its
+    save returns. Reads see buffered states immediately; run listings only
+    reflect them once flushed.
+
+    While the wrapped store keeps failing, the flush interval doubles up to
+    `max_retry_interval_seconds`, and the failure is logged at most once per
+    `error_log_interval_seconds`.
+    """
+
+    def __init__(
+        self,
+        inner: StateStore,
+        *,
+        flush_interval_seconds: float = 0.005,
+        max_batch_size: int = 500,
+        max_retry_interval_seconds: float = 5.0,
+        error_log_interval_seconds: float = 60.0,
+    ) -> None:
+        self.backend_name = inner.backend_name
+        self._inner = inner
+        self._flush_interval_seconds = flush_interval_seconds
+        self._max_batch_size = max_batch_size
+        self._max_retry_interval_seconds = max_retry_interval_seconds
+        self._error_log_interval_seconds = error_log_interval_seconds
+        self._pending: dict[str, PRDState] = {}
+        self._in_flight: dict[str, PRDState] = {}
+        self._write_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    async def save(self, state: PRDState) -> None:
+        """Buffer a state, or write it through if it is terminal."""
+        if state.step in TERMINAL_STEPS:
+            async with self._write_lock:
+                self._pending.pop(state.run_id, None)
+                await self._inner.save(state)
+            return
+
+        self._pending[state.run_id] = state
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        """Buffer or write through each state in order."""
+        for state in states:
+            await self.save(state)
+
+    async def get(self, run_id: str) -> PRDState | None:
+        """Return the newest state, including states not yet flushed."""
+        buffered = self._pending.get(run_id) or self._in_flight.get(run_id)
+        if buffered is not None:
+            return buffered
+        return await self._inner.get(run_id)
+
+    async def get_revision(self, run_id: str) -> int | None:
+        """Return the newest revision, including states not yet flushed."""
+        buffered = self._pending.get(run_id) or self._in_flight.get(run_id)
+        if buffered is not None:
+            return buffered.revision
+        return await self._inner.get_revision(run_id)
+
+    async def get_many(self, run_ids: Sequence[str]) -> list[PRDState | None]:
+        """Return the newest states, reading only unbuffered runs from the store."""
+        buffered = {
+            run_id: self._pending.get(run_id) or self._in_flight.get(run_id)
+            for run_id in run_ids
+        }
+        missing = [run_id for run_id, state in buffered.items() if state is None]
+        stored = dict(zip(missing, await self._inner.get_many(missing), strict=True))
+        return [buffered[run_id] or stored.get(run_id) for run_id in run_ids]
+
+    async def list_runs(
+        self,
+        *,
+        step: WorkflowStep | None = None,
+        adapter: AdapterType | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> RunPage:
+        """List runs from the wrapped store's indexes."""
+        return await self._inner.list_runs(
+            step=step,
+            adapter=adapter,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def claim_idempotency_key(
+        self, key: str, run_id: str, ttl_seconds: int
+    ) -> str:
+        """Claim an idempotency key directly in the wrapped store."""
+        return await self._inner.claim_idempotency_key(key, run_id, ttl_seconds)
+
+    async def release_idempotency_key(self, key: str, run_id: str) -> None:
+        """Release an idempotency key directly in the wrapped store."""
+        await self._inner.release_idempotency_key(key, run_id)
+
+    async def enqueue_handoff(self, run_id: str, tenant: str) -> None:
+        """Flush buffered states, so the checkpoint is visible, then hand off."""
+        await self.flush()
+        await self._inner.enqueue_handoff(run_id, tenant)
+
+    async def claim_handoffs(self, limit: int) -> list[Handoff]:
+        """Claim handoffs directly from the wrapped store."""
+        return await self._inner.claim_handoffs(limit)
+
+    async def ping(self) -> bool:
+        """Return whether the wrapped store is healthy."""
+        return await self._inner.ping()
+
+    async def close(self) -> None:
+        """Flush buffered states and close the wrapped store."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+        await self._inner.close()
+
+    async def flush(self) -> None:
+        """Write every buffered state to the wrapped store."""
+        while self._pending:
+            await self._flush_batch()
+
+    async def _flush_periodically(self) -> None:
+        """
+        Flush buffered states every interval until the buffer stays empty.
+
+        Failed flushes back off exponentially; the first success restores the
+        normal interval.
+        """
+        interval = self._flush_interval_seconds
+        failures = 0
+        last_logged: float | None = None
+        while self._pending:
+            await asyncio.sleep(interval)
+            try:
+                await self._flush_batch()
+            except Exception:
+                failures += 1
+                interval = min(interval * 2, self._max_retry_interval_seconds)
+                now = time.monotonic()
+                if (
+                    last_logged is None
+                    or now - last_logged >= self._error_log_interval_seconds
+                ):
+                    last_logged = now
+                    logger.exception(
+                        "state_write_behind_flush_failed",
+                        state_backend=self.backend_name,
+                        buffered_runs=len(self._pending),
+                        consecutive_failures=failures,
+                        retry_in_seconds=interval,
+                    )
+                continue
+            if failures:
+                logger.info(
+                    "state_write_behind_flush_recovered",
+                    state_backend=self.backend_name,
+                    failed_attempts=failures,
+                )
+            interval = self._flush_interval_seconds
+            failures = 0
+            last_logged = None
+
+    async def _flush_batch(self) -> None:
+        """Move up to one batch out of the buffer and write it."""
+        async with self._write_lock:
+            run_ids = list(self._pending)[: self._max_batch_size]
+            self._in_flight = {run_id: self._pending.pop(run_id) for run_id in run_ids}
+            try:
+                await self._inner.save_many(list(self._in_flight.values()))
+            except BaseException:
+                for run_id, state in self._in_flight.items():
+                    self._pending.setdefault(run_id, state)
+                raise
+            finally:
+                self._in_flight = {}
@@ -0,0 +1,149 @@
+"""
+OpenTelemetry tracing for the route, pipeline, adapters, store and streamer.
+
+Tracing needs the OpenTelemetry packages from the `observability` extra,
+which are imported only by `configure_tracing`. Until then, and whenever
+`TRACING_EXPORTER` is `none`, `start_span` returns a shared no-op context
+manager, so hot paths pay a single attribute lookup.
+
+Spans follow the current context, so a pipeline task started inside the
+`generate_prd` span continues its trace.
+"""
+
+from collections.abc import Mapping
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from opentelemetry.context import Context
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+    from opentelemetry.trace import Span, Tracer
+
+    from backend.settings import AppSettings
+
+AttributeValue = str | int | float | bool
+
+_NO_SPAN: AbstractContextManager[None] = nullcontext()
+
+
+class _Tracing:
+    """Holds the tracer once `configure_tracing` has created it."""
+
+    tracer: "Tracer | None" = None
+    provider: "TracerProvider | None" = None
+    output: IO[str] | None = None
+
+
+def configure_tracing(settings: "AppSettings") -> bool:
+    """
+    Set up span export for this process as configured.
+
+    Replaces any earlier configuration, after flushing it.
+
+    Returns:
+        Whether spans are recorded.
+    """
+    shutdown_tracing()
+    if settings.tracing_exporter == "none":
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    exporter: SpanExporter
+    if settings.tracing_exporter == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        path = Path(settings.tracing_file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _Tracing.output = path.open("a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(out=_Tracing.output, formatter=_span_json_line)
+    else:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+
+    provider = TracerProvider(
+        resource=Resource.create(
+            {
+                "service.name": settings.tracing_service_name,
+                "service.version": settings.app_version,
+                "deployment.environment": settings.environment,
+            }
+        ),
+        # Sampling is decided once per trace, at its root.
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    _Tracing.provider = provider
+    _Tracing.tracer = provider.get_tracer("backend")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush and stop span export, if it was configured."""
+    if _Tracing.provider is not None:
+        _Tracing.provider.shutdown()
+    if _Tracing.output is not None:
+        _Tracing.output.close()
+    _Tracing.tracer = None
+    _Tracing.provider = None
+    _Tracing.output = None
+
+
+def start_span(
+    name: str,
+    attributes: Mapping[str, AttributeValue | None] | None = None,
+    *,
+    context: "Context | None" = None,
+) -> "AbstractContextManager[Span | None]":
+    """
+    Start a span as the current span, or return a no-op without tracing.
+
+    Attributes whose value is None are left out.
+    """
+    tracer = _Tracing.tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.start_as_current_span(
+        name, context=context, attributes=_clean(attributes)
+    )
+
+
+def set_span_attributes(
+    span: "Span | None", attributes: Mapping[str, AttributeValue | None]
+) -> None:
+    """Add attributes to a span returned by `start_span`, skipping None values."""
+    if span is not None:
+        span.set_attributes(_clean(attributes) or {})
+
+
+def extract_context(headers: Mapping[str, str]) -> "Context | None":
+    """Read an incoming W3C `traceparent`, so a caller's trace continues here."""
+    if _Tracing.tracer is None or "traceparent" not in headers:
+        return None
+    from opentelemetry.trace.propagation.tracecontext import (
+        TraceContextTextMapPropagator,
+    )
+
+    return TraceContextTextMapPropagator().extract(headers)
+
+
+def _clean(
+    attributes: Mapping[str, AttributeValue | None] | None,
+) -> dict[str, Any] | None:
+    """Drop attributes without a value."""
+    if not attributes:
+        return None
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+def _span_json_line(span: "ReadableSpan") -> str:
+    """Format a finished span as one line of JSON."""
+    line: str = span.to_json(indent=None)
+    return line + "\n"
@@ -0,0 +1 @@
+"""Offline micro and load benchmarks for the PRD generation backend."""
@@ -0,0 +1,69 @@
+"""Helpers shared by the benchmark scripts."""
+
+import asyncio
+import os
+import platform
+import socket
+import subprocess
+import time
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of pre-sorted samples, or 0 if none."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(fraction * len(samples)))
+    return samples[index]
+
+
+def format_cell(value: float | int | str, width: int = 16, precision: int = 2) -> str:
+    """Right-align a result cell for the console table."""
+    if isinstance(value, float):
+        return f"{value:>{width}.{precision}f}"
+    return f"{value:>{width}}"
+
+
+def environment() -> dict[str, str]:
+    """Describe the commit and machine the results were measured on."""
+    try:
+        commit = subprocess.run(  # nosec B603 B607
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.machine(),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+async def wait_until_ready(base_url: str, timeout_seconds: float = 30.0) -> None:
+    """Poll `/ready` until the server answers or the timeout expires."""
+    # Imported here so the in-process benchmarks do not need the HTTP client.
+    import httpx
+
+    deadline = time.monotonic() + timeout_seconds
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    msg = f"Server at {base_url} did not become ready."
+    raise RuntimeError(msg)
@@ -0,0 +1,256 @@
+"""
+Pipeline throughput benchmark with the fake adapter and no network.
+
+Drives `--runs` complete `run_pipeline` executions, `--concurrency` at a time,
+through the deterministic fake adapter and a real `StreamerService`, against
+the in-memory store and the Redis store. Redis is a local server given by
+`--redis-url`, or an in-process fakeredis stand-in by default.
+`--latency-ms` stands in for provider round trips, so concurrent runs
+interleave on the event loop the way real ones do.
+
+Reports runs per second, per-step latency percentiles (the time from a run's
+previous published state to the next one, so it covers the LLM call, the diff,
+the save and the publish), event-loop lag sampled every few milliseconds and
+the peak RSS of the process. Each backend runs in a fresh interpreter so its
+peak RSS is its own.
+
+Run with:
+
+    python -m benchmarks.bench_pipeline --runs 500 --concurrency 100 --json out.json
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+from pathlib import Path
+import resource
+import sys
+import time
+from typing import Any
+
+from backend.agents.fake import FakeAdapter
+from backend.models import PRDState
+from backend.pipelines.pipeline_runner import run_pipeline
+from backend.services.streamer import StreamerService
+from backend.state.base import StateStore
+from benchmarks._common import environment, format_cell, percentile
+
+BACKENDS = ["memory", "redis"]
+LOOP_LAG_INTERVAL_SECONDS = 0.005
+
+
+class TimingStreamer(StreamerService):
+    """A streamer that records the time between consecutive states of a run."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.step_seconds: dict[str, list[float]] = defaultdict(list)
+        self._last_published: dict[str, float] = {}
+
+    async def publish(self, run_id: str, state: PRDState) -> None:
+        """Record the time since the run's previous state, then publish."""
+        now = time.perf_counter()
+        previous = self._last_published.get(run_id)
+        if previous is not None:
+            self.step_seconds[state.step].append(now - previous)
+        self._last_published[run_id] = now
+        await super().publish(run_id, state)
+
+
+def _peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def build_store(backend: str, redis_url: str | None) -> StateStore:
+    """Create the state store for one benchmark case."""
+    if backend == "memory":
+        from backend.state.in_memory_store import InMemoryStore
+
+        return InMemoryStore()
+
+    from backend.state.redis_store import RedisStore
+
+    if redis_url is None:
+        import fakeredis
+
+        return RedisStore.from_client(fakeredis.FakeAsyncRedis(decode_responses=True))
+    store = RedisStore(redis_url)
+    if not await store.ping():
+        await store.close()
+        msg = f"Redis at {redis_url} is not reachable."
+        raise RuntimeError(msg)
+    return store
+
+
+async def monitor_loop_lag(samples: list[float], stop: asyncio.Event) -> None:
+    """Sample how late the event loop wakes a sleeping task."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+        samples.append(time.perf_counter() - started - LOOP_LAG_INTERVAL_SECONDS)
+
+
+async def measure(
+    backend: str,
+    runs: int,
+    concurrency: int,
+    latency_seconds: float,
+    redis_url: str | None,
+) -> dict[str, Any]:
+    """Run every pipeline of one case and summarize its timings."""
+    store = await build_store(backend, redis_url)
+    try:
+        return await _measure_store(store, backend, runs, concurrency, latency_seconds)
+    finally:
+        await store.close()
+
+
+async def _measure_store(
+    store: StateStore,
+    backend: str,
+    runs: int,
+    concurrency: int,
+    latency_seconds: float,
+) -> dict[str, Any]:
+    """Run every pipeline of one case against an open store."""
+    streamer = TimingStreamer()
+    adapter = FakeAdapter(latency_seconds=latency_seconds)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one_run(index: int) -> None:
+        async with slots:
+            state = PRDState(
+                run_id=f"bench-{index}",
+                idea=f"Benchmark idea {index}",
+                step="Outline",
+                adapter="fake",
+                content="# PRD\n\n_Starting outline generation..._",
+                revision=0,
+            )
+            await store.save(state)
+            await streamer.publish(state.run_id, state)
+            await run_pipeline(state, store, adapter, streamer)
+
+    lag_samples: list[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(lag_samples, stop))
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one_run(index) for index in range(runs)))
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor
+        await streamer.close()
+
+    completed = len(streamer.step_seconds["Complete"])
+    lag_samples.sort()
+    row: dict[str, Any] = {
+        "backend": backend,
+        "runs": runs,
+        "concurrency": concurrency,
+        "completed": completed,
+        "runs_per_second": completed / elapsed,
+    }
+    for step, samples in streamer.step_seconds.items():
+        samples.sort()
+        name = step.lower()
+        row[f"{name}_p50_ms"] = percentile(samples, 0.50) * 1e3
+        row[f"{name}_p95_ms"] = percentile(samples, 0.95) * 1e3
+        row[f"{name}_p99_ms"] = percentile(samples, 0.99) * 1e3
+    row["loop_lag_p50_ms"] = percentile(lag_samples, 0.50) * 1e3
+    row["loop_lag_p99_ms"] = percentile(lag_samples, 0.99) * 1e3
+    row["loop_lag_max_ms"] = lag_samples[-1] * 1e3
+    row["peak_rss_mb"] = _peak_rss_mb()
+    return row
+
+
+def measure_case(
+    backend: str,
+    runs: int,
+    concurrency: int,
+    latency_seconds: float,
+    redis_url: str | None,
+) -> dict[str, Any]:
+    """Run one case to completion; the entry point of each child process."""
+    return asyncio.run(measure(backend, runs, concurrency, latency_seconds, redis_url))
+
+
+def run(
+    backends: list[str],
+    runs: int,
+    concurrency: int,
+    latency_seconds: float,
+    redis_url: str | None,
+) -> list[dict[str, Any]]:
+    """Run every backend in a fresh interpreter and return one row per backend."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(
+                pool.submit(
+                    measure_case,
+                    backend,
+                    runs,
+                    concurrency,
+                    latency_seconds,
+                    redis_url,
+                ).result()
+            )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the pipeline benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=10.0,
+        help="Fake adapter latency per LLM call; 0 never yields to the loop.",
+    )
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument(
+        "--redis-url", help="Benchmark this Redis server instead of fakeredis."
+    )
+    parser.add_argument("--json", type=Path, help="Write results to this file.")
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.backends,
+        args.runs,
+        args.concurrency,
+        args.latency_ms / 1000,
+        args.redis_url,
+    )
+    for row in results:
+        for column, value in row.items():
+            print(f"{column:>20} {format_cell(value)}")
+        print()
+    if args.json:
+        report = {
+            "benchmark": "pipeline",
+            "environment": environment(),
+            "parameters": {
+                "runs": args.runs,
+                "concurrency": args.concurrency,
+                "latency_ms": args.latency_ms,
+                "redis": args.redis_url or "fakeredis",
+            },
+            "results": results,
+        }
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
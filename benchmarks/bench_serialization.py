@@ -0,0 +1,113 @@
+"""
+Micro-benchmarks for PRDState encoding and decoding.
+
+Compares the per-transition cost of the single-encode path (one orjson encode
+shared by storage and every SSE subscriber) with encoding the state separately
+for storage, for the event payload, and again for each subscriber.
+
+Run with:
+
+    python -m benchmarks.bench_serialization --subscribers 10 --json results.json
+"""
+
+import argparse
+from collections.abc import Callable
+import json
+from pathlib import Path
+import timeit
+
+from backend.models import EVENT_PAYLOAD_FIELDS, PRDState
+from benchmarks._common import format_cell
+
+CONTENT_SIZES = [1_000, 10_000, 50_000, 200_000]
+
+
+def build_state(content_size: int) -> PRDState:
+    """Build a state whose content and diff are roughly `content_size` bytes."""
+    line = "- Functional requirement with détails and ✓ markers\n"
+    content = (line * (content_size // len(line) + 1))[:content_size]
+    return PRDState(
+        run_id="bench-run",
+        idea="A benchmark idea",
+        step="Revise",
+        adapter="vanilla_openai",
+        content=content,
+        revision=4,
+        diff=f"@@ -1,{content_size // 10} +1,{content_size // 10} @@\n",
+    )
+
+
+def encode_repeatedly(state: PRDState, subscribers: int) -> None:
+    """Encode the state the way each consumer used to: once per use."""
+    state.model_dump_json()
+    payload = state.model_dump(mode="json", include=EVENT_PAYLOAD_FIELDS)
+    for _ in range(subscribers):
+        json.dumps(payload)
+
+
+def encode_once(state: PRDState, subscribers: int) -> None:
+    """Encode the state once and share the result with every consumer."""
+    fresh = state.model_copy()
+    fresh.storage_json  # noqa: B018
+    for _ in range(subscribers):
+        fresh.event_json  # noqa: B018
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """Return the best mean call time in microseconds."""
+    timer = timeit.Timer(function)
+    number = max(1, repeat)
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def run(subscribers: int) -> list[dict[str, float | int]]:
+    """Run every benchmark case and return one result row per content size."""
+    results: list[dict[str, float | int]] = []
+    for size in CONTENT_SIZES:
+        state = build_state(size)
+        stored = state.storage_json
+        repeat = max(10, 200_000 // size)
+        results.append(
+            {
+                "content_bytes": size,
+                "subscribers": subscribers,
+                "encode_repeated_us": measure(
+                    lambda s=state: encode_repeatedly(s, subscribers), repeat
+                ),
+                "encode_once_us": measure(
+                    lambda s=state: encode_once(s, subscribers), repeat
+                ),
+                "decode_pydantic_us": measure(
+                    lambda d=stored: PRDState.model_validate_json(d), repeat
+                ),
+                "decode_orjson_us": measure(
+                    lambda d=stored: PRDState.from_json(d), repeat
+                ),
+            }
+        )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the serialization benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=10)
+    parser.add_argument("--json", type=Path, help="Write results to this file.")
+    args = parser.parse_args(argv)
+
+    results = run(args.subscribers)
+    columns = list(results[0])
+    print(" ".join(f"{column:>20}" for column in columns))
+    for row in results:
+        print(
+            " ".join(
+                format_cell(row[column], width=20, precision=1) for column in columns
+            )
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
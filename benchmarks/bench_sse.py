@@ -0,0 +1,399 @@
+"""
+SSE fan-out load test for `/api/v1/stream/{run_id}`.
+
+Serves the API with uvicorn in a child process, opens `--clients` SSE
+connections spread evenly across `--runs` runs, and then publishes
+`--rounds` states to every run through `StreamerService.publish`, by way of a
+benchmark-only route mounted on the child's app. Every published state
+carries its publish time, so each client measures end-to-end delivery latency
+from `publish` to the parsed event.
+
+Reports delivery latency percentiles, revisions clients never received,
+subscriber queue drops and lag on the server, clients slower than
+`--slow-ms`, the server's publish time per round, and server memory per open
+connection. Clients speak plain HTTP/1.0 over asyncio streams, so the harness
+itself stays cheap next to the server.
+
+Run with:
+
+    python -m benchmarks.bench_sse --clients 2000 --runs 100 --json out.json
+
+Compare against the checked-in baseline (same parameters and machine class):
+
+    python -m benchmarks.bench_sse --baseline benchmarks/baselines/sse_fanout.json
+"""
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass, field
+import json
+import os
+from pathlib import Path
+import resource
+import subprocess
+import sys
+import time
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Query
+import httpx
+import orjson
+
+from backend.dependencies import get_runtime
+from backend.models import PRDState
+from backend.runtime import AppRuntime
+from benchmarks._common import environment, free_port, percentile, wait_until_ready
+
+BODY = "- Functional requirement with measurable acceptance criteria\n" * 40
+CONNECT_CONCURRENCY = 200
+BASELINE_METRICS = [
+    "latency_p50_ms",
+    "latency_p99_ms",
+    "publish_round_p99_ms",
+    "missed_revisions",
+    "server_kib_per_connection",
+]
+
+bench_router = APIRouter()
+
+
+def _bench_state(run_id: str, revision: int, step: str = "Revise") -> PRDState:
+    """Build a state whose first content line is its publish time."""
+    return PRDState(
+        run_id=run_id,
+        idea="SSE fan-out benchmark",
+        step=step,
+        adapter="fake",
+        content=f"{time.time():.6f}\n{BODY}",
+        revision=revision,
+    )
+
+
+@bench_router.post("/bench/runs")
+async def create_runs(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+    count: Annotated[int, Query(ge=1)],
+) -> dict[str, int]:
+    """Save the first state of `count` runs, so clients can subscribe to them."""
+    await runtime.state_store.save_many(
+        [_bench_state(f"bench-{index}", 0) for index in range(count)]
+    )
+    return {"runs": count}
+
+
+@bench_router.post("/bench/publish")
+async def publish_round(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+    count: Annotated[int, Query(ge=1)],
+    revision: Annotated[int, Query(ge=1)],
+    final: bool = False,
+) -> dict[str, float]:
+    """Publish one state to every run and time the whole round."""
+    step = "Complete" if final else "Revise"
+    started = time.perf_counter()
+    for index in range(count):
+        run_id = f"bench-{index}"
+        await runtime.streamer.publish(run_id, _bench_state(run_id, revision, step))
+    return {"publish_seconds": time.perf_counter() - started}
+
+
+@bench_router.get("/bench/stats")
+async def server_stats(
+    runtime: Annotated[AppRuntime, Depends(get_runtime)],
+) -> dict[str, Any]:
+    """Report server memory and subscriber delivery counters."""
+    subscribers = runtime.streamer.subscriber_stats()
+    return {
+        "rss_bytes": _current_rss_bytes(),
+        "connections": asdict(runtime.streamer.connection_counts()),
+        "dropped": sum(subscriber.dropped for subscriber in subscribers),
+        "max_lag": max((subscriber.max_lag for subscriber in subscribers), default=0),
+    }
+
+
+def _current_rss_bytes() -> int:
+    """Return this process's resident set size, or its peak where unavailable."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes.
+        return peak if sys.platform == "darwin" else peak * 1024
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _raise_open_file_limit() -> None:
+    """Allow as many sockets as the hard limit permits."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def serve(port: int) -> None:
+    """Serve the API plus the benchmark routes; the child process entry point."""
+    import uvicorn
+
+    from backend.main import create_app
+    from backend.settings import AppSettings
+
+    _raise_open_file_limit()
+    app = create_app(AppSettings())
+    app.include_router(bench_router)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def start_server(port: int, queue_size: int) -> subprocess.Popen[bytes]:
+    """Start the API in a child process with room for every subscriber."""
+    env = {
+        **os.environ,
+        "STATE_BACKEND": "memory",
+        "STREAM_MAX_SUBSCRIBERS": "1000000",
+        "STREAM_MAX_SUBSCRIBERS_PER_RUN": "1000000",
+        "STREAM_QUEUE_SIZE": str(queue_size),
+        "METRICS_ENABLED": "false",
+        "HANDOFF_POLL_SECONDS": "0",
+    }
+    command = [sys.executable, "-m", "benchmarks.bench_sse", "--serve", str(port)]
+    return subprocess.Popen(  # nosec B603
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+@dataclass
+class ClientResult:
+    """What one SSE client saw."""
+
+    connected: bool = False
+    revisions: set[int] = field(default_factory=set)
+    latencies: list[float] = field(default_factory=list)
+
+
+async def sse_client(
+    port: int,
+    run_id: str,
+    result: ClientResult,
+    connect_slots: asyncio.Semaphore,
+) -> None:
+    """Stream one run over HTTP/1.0 until its terminal state or a disconnect."""
+    async with connect_slots:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            return
+        writer.write(
+            f"GET /api/v1/stream/{run_id} HTTP/1.0\r\n"
+            "Host: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        status_line = await reader.readline()
+        if b" 200 " not in status_line:
+            writer.close()
+            return
+        while await reader.readline() not in (b"\r\n", b"\n", b""):
+            pass
+        result.connected = True
+    try:
+        async for line in reader:
+            if not line.startswith(b"data: "):
+                continue
+            received = time.time()
+            payload = orjson.loads(line[6:])
+            if payload["revision"] == 0:
+                continue
+            published = float(payload["content"].split("\n", 1)[0])
+            result.latencies.append(received - published)
+            result.revisions.add(payload["revision"])
+            if payload["step"] == "Complete":
+                break
+    except (ConnectionError, orjson.JSONDecodeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def drive(
+    port: int, clients: int, runs: int, rounds: int, interval_seconds: float
+) -> dict[str, Any]:
+    """Connect every client, publish every round and collect what arrived."""
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as control:
+        await control.post("/bench/runs", params={"count": runs})
+        idle = (await control.get("/bench/stats")).json()
+
+        results = [ClientResult() for _ in range(clients)]
+        connect_slots = asyncio.Semaphore(CONNECT_CONCURRENCY)
+        readers = [
+            asyncio.create_task(
+                sse_client(port, f"bench-{index % runs}", result, connect_slots)
+            )
+            for index, result in enumerate(results)
+        ]
+        connect_started = time.perf_counter()
+        while sum(result.connected for result in results) < clients:
+            if all(task.done() for task in readers):
+                break
+            await asyncio.sleep(0.05)
+        connect_seconds = time.perf_counter() - connect_started
+        connected = (await control.get("/bench/stats")).json()
+
+        publish_seconds: list[float] = []
+        for revision in range(1, rounds + 1):
+            response = await control.post(
+                "/bench/publish", params={"count": runs, "revision": revision}
+            )
+            publish_seconds.append(response.json()["publish_seconds"])
+            await asyncio.sleep(interval_seconds)
+        delivered = (await control.get("/bench/stats")).json()
+        await control.post(
+            "/bench/publish",
+            params={"count": runs, "revision": rounds + 1, "final": True},
+        )
+        _, pending = await asyncio.wait(readers, timeout=60)
+        for task in pending:
+            task.cancel()
+
+    return {
+        "results": results,
+        "connect_seconds": connect_seconds,
+        "publish_seconds": publish_seconds,
+        "idle": idle,
+        "connected": connected,
+        "delivered": delivered,
+    }
+
+
+def summarize(
+    clients: int,
+    runs: int,
+    rounds: int,
+    slow_seconds: float,
+    outcome: dict[str, Any],
+) -> dict[str, Any]:
+    """Reduce the raw client and server observations to one result row."""
+    results: list[ClientResult] = outcome["results"]
+    latencies = sorted(latency for result in results for latency in result.latencies)
+    expected = set(range(1, rounds + 2))
+    connected = [result for result in results if result.connected]
+    open_connections = outcome["connected"]["connections"]["subscribers"]
+    rss_growth = outcome["connected"]["rss_bytes"] - outcome["idle"]["rss_bytes"]
+    publish_seconds = sorted(outcome["publish_seconds"])
+    return {
+        "clients": clients,
+        "runs": runs,
+        "rounds": rounds,
+        "connected_clients": len(connected),
+        "connect_seconds": outcome["connect_seconds"],
+        "events_received": len(latencies),
+        "latency_p50_ms": percentile(latencies, 0.50) * 1e3,
+        "latency_p95_ms": percentile(latencies, 0.95) * 1e3,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1e3,
+        "latency_max_ms": latencies[-1] * 1e3 if latencies else 0.0,
+        "missed_revisions": sum(
+            len(expected - result.revisions) for result in connected
+        ),
+        "slow_clients": sum(
+            1
+            for result in connected
+            if result.latencies and max(result.latencies) > slow_seconds
+        ),
+        "server_dropped_events": outcome["delivered"]["dropped"],
+        "server_max_queue_lag": outcome["delivered"]["max_lag"],
+        "server_reaped_subscribers": outcome["delivered"]["connections"]["reaped"],
+        "publish_round_p50_ms": percentile(publish_seconds, 0.50) * 1e3,
+        "publish_round_p99_ms": percentile(publish_seconds, 0.99) * 1e3,
+        "server_rss_idle_mb": outcome["idle"]["rss_bytes"] / 2**20,
+        "server_rss_connected_mb": outcome["connected"]["rss_bytes"] / 2**20,
+        "server_kib_per_connection": (
+            rss_growth / open_connections / 1024 if open_connections else 0.0
+        ),
+    }
+
+
+def measure(
+    clients: int,
+    runs: int,
+    rounds: int,
+    interval_seconds: float,
+    queue_size: int,
+    slow_seconds: float,
+) -> dict[str, Any]:
+    """Run one load test against a fresh server."""
+    _raise_open_file_limit()
+    port = free_port()
+    server = start_server(port, queue_size)
+    try:
+        asyncio.run(wait_until_ready(f"http://127.0.0.1:{port}"))
+        outcome = asyncio.run(drive(port, clients, runs, rounds, interval_seconds))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return summarize(clients, runs, rounds, slow_seconds, outcome)
+
+
+def compare(
+    parameters: dict[str, float], result: dict[str, Any], baseline_path: Path
+) -> None:
+    """Print the change of the headline metrics against a saved baseline."""
+    baseline = json.loads(baseline_path.read_text())
+    if baseline["parameters"] != parameters:
+        print(f"note: parameters differ from {baseline_path}")
+    previous = baseline["results"][0]
+    print(f"{'metric':>28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for metric in BASELINE_METRICS:
+        before, after = previous[metric], result[metric]
+        change = f"{(after - before) / before:+.0%}" if before else "n/a"
+        print(f"{metric:>28} {before:>12.2f} {after:>12.2f} {change:>8}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the SSE fan-out load test from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=100.0)
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--slow-ms", type=float, default=1000.0)
+    parser.add_argument("--json", type=Path, help="Write results to this file.")
+    parser.add_argument("--baseline", type=Path, help="Compare with this result file.")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    parameters = {
+        "clients": args.clients,
+        "runs": args.runs,
+        "rounds": args.rounds,
+        "interval_ms": args.interval_ms,
+        "queue_size": args.queue_size,
+        "slow_ms": args.slow_ms,
+    }
+    result = measure(
+        args.clients,
+        args.runs,
+        args.rounds,
+        args.interval_ms / 1000,
+        args.queue_size,
+        args.slow_ms / 1000,
+    )
+    for column, value in result.items():
+        cell = f"{value:>16.2f}" if isinstance(value, float) else f"{value:>16}"
+        print(f"{column:>28} {cell}")
+    if args.baseline:
+        print()
+        compare(parameters, result, args.baseline)
+    if args.json:
+        report = {
+            "benchmark": "sse_fanout",
+            "environment": environment(),
+            "parameters": parameters,
+            "results": [result],
+        }
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""
+Micro-benchmarks for StreamerService publish latency.
+
+Registers subscribers spread evenly across runs, publishes one state to every
+run per round, and reports the latency of each `publish` call together with
+the cost of the first wire encoding a subscriber reads, which is shared by
+every other subscriber of the same event.
+
+Run with:
+
+    python -m benchmarks.bench_streamer --rounds 20 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import statistics
+import time
+
+from backend.models import PRDState
+from backend.services.streamer import StreamerService, Subscription
+from benchmarks._common import format_cell, percentile
+
+SUBSCRIBER_COUNTS = [1, 100, 10_000]
+RUN_COUNTS = [1, 1_000]
+
+
+def build_state(run_id: str, revision: int) -> PRDState:
+    """Build a state with a realistically sized PRD body."""
+    return PRDState(
+        run_id=run_id,
+        idea="A benchmark idea",
+        step="Draft",
+        adapter="vanilla_openai",
+        content="- Functional requirement with détails\n" * 250,
+        revision=revision,
+    )
+
+
+async def measure(subscribers: int, runs: int, rounds: int) -> dict[str, float | int]:
+    """Publish `rounds` states to each run and time every publish call."""
+    streamer = StreamerService(max_queue_size=rounds)
+    run_ids = [f"run-{index}" for index in range(runs)]
+    queues: list[Subscription] = [
+        await streamer.add_subscriber(run_ids[index % runs])
+        for index in range(subscribers)
+    ]
+
+    publish_seconds: list[float] = []
+    encode_seconds: list[float] = []
+    for revision in range(1, rounds + 1):
+        states = [build_state(run_id, revision) for run_id in run_ids]
+        for run_id, state in zip(run_ids, states, strict=True):
+            started = time.perf_counter()
+            await streamer.publish(run_id, state)
+            publish_seconds.append(time.perf_counter() - started)
+        for queue in queues[:runs]:
+            event = await queue.get()
+            started = time.perf_counter()
+            event.wire("message")
+            encode_seconds.append(time.perf_counter() - started)
+        for queue in queues:
+            while queue.lag:
+                await queue.get()
+
+    publish_seconds.sort()
+    return {
+        "subscribers": subscribers,
+        "runs": runs,
+        "publishes": len(publish_seconds),
+        "publish_mean_us": statistics.fmean(publish_seconds) * 1e6,
+        "publish_p50_us": percentile(publish_seconds, 0.50) * 1e6,
+        "publish_p99_us": percentile(publish_seconds, 0.99) * 1e6,
+        "encode_mean_us": (
+            statistics.fmean(encode_seconds) * 1e6 if encode_seconds else 0.0
+        ),
+    }
+
+
+def run(rounds: int) -> list[dict[str, float | int]]:
+    """Run every benchmark case and return one result row per case."""
+    return [
+        asyncio.run(measure(subscribers, runs, rounds))
+        for subscribers in SUBSCRIBER_COUNTS
+        for runs in RUN_COUNTS
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the streamer benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", type=Path, help="Write results to this file.")
+    args = parser.parse_args(argv)
+
+    results = run(args.rounds)
+    columns = list(results[0])
+    print(" ".join(f"{column:>16}" for column in columns))
+    for row in results:
+        print(" ".join(format_cell(row[column]) for column in columns))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
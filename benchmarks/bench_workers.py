@@ -0,0 +1,156 @@
+"""
+Throughput benchmark for the API served by 1, 2, 4 and 8 workers.
+
+Starts the `agentic-prd` CLI with the production preset for each worker
+count, backed by a fresh SQLite database and the fake adapter, and drives it
+with concurrent clients. Each client submits a run and then polls its state
+once, so every iteration exercises run creation, the background pipeline and
+a conditional read. Reports requests per second and request latency.
+
+Run with:
+
+    python -m benchmarks.bench_workers --duration 10 --concurrency 64 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks._common import format_cell, free_port, percentile, wait_until_ready
+
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def start_server(workers: int, port: int, database: Path) -> subprocess.Popen[bytes]:
+    """Start the API with the production preset and the fake adapter enabled."""
+    env = {
+        **os.environ,
+        "ENVIRONMENT": "production",
+        "STATE_BACKEND": "sqlite",
+        "SQLITE_PATH": str(database),
+        "FAKE_ADAPTER_ENABLED": "true",
+        "MAX_ACTIVE_RUNS": "100000",
+        "MAX_ACTIVE_RUNS_PER_ADAPTER": "100000",
+        "MAX_QUEUED_RUNS": "100000",
+        "LLM_MAX_CONCURRENT_CALLS": "100000",
+    }
+    command = [
+        sys.executable,
+        "-m",
+        "backend.main",
+        "--preset",
+        "production",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+    ]
+    return subprocess.Popen(  # nosec B603
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def drive(
+    base_url: str, concurrency: int, duration_seconds: float
+) -> tuple[list[float], int]:
+    """Run submit-then-poll loops from concurrent clients for a fixed time."""
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration_seconds
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+
+        async def client_loop(index: int) -> None:
+            nonlocal errors
+            iteration = 0
+            while time.monotonic() < deadline:
+                iteration += 1
+                started = time.perf_counter()
+                try:
+                    created = await client.post(
+                        "/api/v1/generate_prd",
+                        json={"idea": f"Idea {index}-{iteration}", "adapter": "fake"},
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    created.raise_for_status()
+                    run_id = created.json()["run_id"]
+                    started = time.perf_counter()
+                    polled = await client.get(
+                        f"/api/v1/runs/{run_id}", params={"fields": "step,revision"}
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    polled.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(client_loop(index) for index in range(concurrency)))
+    return latencies, errors
+
+
+def measure(
+    workers: int, concurrency: int, duration_seconds: float
+) -> dict[str, float | int]:
+    """Benchmark one worker count against a fresh database."""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(workers, port, Path(directory) / "bench.sqlite3")
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(wait_until_ready(base_url))
+            latencies, errors = asyncio.run(
+                drive(base_url, concurrency, duration_seconds)
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    latencies.sort()
+    return {
+        "workers": workers,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / duration_seconds,
+        "latency_mean_ms": statistics.fmean(latencies) * 1e3 if latencies else 0.0,
+        "latency_p50_ms": percentile(latencies, 0.50) * 1e3,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the worker benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=WORKER_COUNTS, metavar="N"
+    )
+    parser.add_argument("--json", type=Path, help="Write results to this file.")
+    args = parser.parse_args(argv)
+
+    results = [
+        measure(workers, args.concurrency, args.duration) for workers in args.workers
+    ]
+    columns = list(results[0])
+    print(" ".join(f"{column:>20}" for column in columns))
+    for row in results:
+        print(" ".join(format_cell(row[column], width=20) for column in columns))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
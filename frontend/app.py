@@ -1,9 +1,12 @@
 """Streamlit frontend application for Agentic PRD Generation."""
 
+from hashlib import sha256
 import json
 import os
 from typing import Any
+import uuid
 
+from diff_match_patch import diff_match_patch
 import httpx
 from httpx_sse import connect_sse
 import streamlit as st
@@ -11,6 +14,12 @@ import streamlit as st
 DEFAULT_PRD_CONTENT = "*Your generated PRD will appear here.*"
 TERMINAL_STEPS = {"Complete", "Error"}
 IMPLEMENTED_ADAPTERS = ["vanilla_openai", "vanilla_google"]
+STREAM_EVENTS = {"message", "snapshot", "delta"}
+MAX_STREAM_RESYNCS = 3
+
+
+class DeltaMismatchError(ValueError):
+    """Raised when a delta event does not apply cleanly to the local content."""
 
 
 def main() -> None:
@@ -89,6 +98,8 @@ def initialize_session_state() -> None:
         "stream_active": False,
         "project_idea": "",
         "adapter": IMPLEMENTED_ADAPTERS[0],
+        "submission": None,
+        "idempotency_key": None,
     }
     for key, value in defaults.items():
         if key not in st.session_state:
@@ -107,6 +118,7 @@ def start_generation() -> None:
             response = client.post(
                 f"{st.session_state.api_url}/api/v1/generate_prd",
                 json=payload,
+                headers={"Idempotency-Key": submission_idempotency_key(payload)},
             )
             response.raise_for_status()
         data = response.json()
@@ -123,6 +135,10 @@ def start_generation() -> None:
         st.error(f"Could not connect to backend: {exc}")
     except httpx.HTTPStatusError as exc:
         st.session_state.stream_active = False
+        if exc.response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+            retry_after = exc.response.headers.get("Retry-After", "a few")
+            st.warning(f"The backend is busy. Try again in {retry_after} seconds.")
+            return
         st.error(
             f"Error from backend: {exc.response.status_code} - {exc.response.text}"
         )
@@ -140,24 +156,25 @@ def listen_for_updates(
         return
 
     st.session_state.stream_active = True
-    url = build_stream_url(st.session_state.api_url, st.session_state.run_id)
-    timeout = httpx.Timeout(timeout=None, connect=5.0)
+    url = build_stream_url(
+        st.session_state.api_url, st.session_state.run_id, delta=True
+    )
+    placeholders = {
+        "prd_placeholder": prd_placeholder,
+        "status_placeholder": status_placeholder,
+        "diff_placeholder": diff_placeholder,
+        "error_placeholder": error_placeholder,
+    }
 
     try:
-        with connect_sse(httpx.Client(timeout=timeout), "GET", url) as event_source:
-            for sse in event_source.iter_sse():
-                if sse.event != "message":
-                    continue
-                update_state(json.loads(sse.data))
-                render_state(
-                    prd_placeholder=prd_placeholder,
-                    status_placeholder=status_placeholder,
-                    diff_placeholder=diff_placeholder,
-                    error_placeholder=error_placeholder,
-                )
-                if is_terminal_step(st.session_state.status):
-                    st.session_state.stream_active = False
-                    return
+        for _ in range(MAX_STREAM_RESYNCS + 1):
+            try:
+                consume_stream(url, **placeholders)
+                return
+            except DeltaMismatchError:
+                # Reconnecting always starts with a full snapshot.
+                continue
+        mark_stream_error("Stream could not be resynchronized with the backend.")
     except httpx.HTTPStatusError as exc:
         mark_stream_error(
             f"Stream connection failed with status {exc.response.status_code}."
@@ -176,6 +193,37 @@ def listen_for_updates(
         )
 
 
+def consume_stream(
+    url: str,
+    *,
+    prd_placeholder: Any,
+    status_placeholder: Any,
+    diff_placeholder: Any,
+    error_placeholder: Any,
+) -> None:
+    """Apply stream events to the UI until the run ends or the stream closes."""
+    timeout = httpx.Timeout(timeout=None, connect=5.0)
+    with connect_sse(httpx.Client(timeout=timeout), "GET", url) as event_source:
+        for sse in event_source.iter_sse():
+            if sse.event not in STREAM_EVENTS:
+                continue
+            update_state(
+                apply_stream_event(
+                    sse.event, json.loads(sse.data), st.session_state.prd_content
+                )
+            )
+            render_state(
+                prd_placeholder=prd_placeholder,
+                status_placeholder=status_placeholder,
+                diff_placeholder=diff_placeholder,
+                error_placeholder=error_placeholder,
+            )
+            if is_terminal_step(st.session_state.status):
+                st.session_state.stream_active = False
+                st.session_state.submission = None
+                return
+
+
 def update_state(data: dict[str, Any]) -> None:
     """Update session state with data from the stream."""
     ui_state = coerce_stream_state(data)
@@ -196,9 +244,53 @@ def build_generation_payload(idea: str, adapter: str) -> dict[str, str]:
     return {"idea": idea.strip(), "adapter": adapter}
 
 
-def build_stream_url(api_url: str, run_id: str) -> str:
-    """Build the SSE URL for a run."""
-    return f"{api_url}/api/v1/stream/{run_id}"
+def submission_idempotency_key(payload: dict[str, str]) -> str:
+    """
+    Return the idempotency key for a generation request.
+
+    Resubmitting the same idea and adapter, after a double-click or a failed
+    request, reuses the key so the backend returns the existing run. A new
+    submission, or one after the previous run finished, gets a fresh key.
+    """
+    submission = f"{payload['adapter']}:{payload['idea']}"
+    if st.session_state.submission != submission:
+        st.session_state.submission = submission
+        st.session_state.idempotency_key = str(uuid.uuid4())
+    return str(st.session_state.idempotency_key)
+
+
+def build_stream_url(api_url: str, run_id: str, *, delta: bool = False) -> str:
+    """Build the SSE URL for a run, optionally negotiating delta events."""
+    url = f"{api_url}/api/v1/stream/{run_id}"
+    return f"{url}?mode=delta" if delta else url
+
+
+def build_export_url(api_url: str, run_id: str, export_format: str) -> str:
+    """Build the server-rendered export URL of a finished run."""
+    return f"{api_url}/api/v1/runs/{run_id}/export?format={export_format}"
+
+
+def apply_stream_event(
+    event: str, data: dict[str, Any], current_content: str
+) -> dict[str, Any]:
+    """
+    Rebuild a full state payload from a stream event.
+
+    Snapshot events already carry the content. Delta events carry a patch
+    against the previous revision, which is applied to `current_content` and
+    verified against the event checksum.
+    """
+    if event != "delta":
+        return data
+
+    dmp = diff_match_patch()
+    patch = data.get("patch", "")
+    content, applied = dmp.patch_apply(dmp.patch_fromText(patch), current_content)
+    checksum = sha256(content.encode("utf-8")).hexdigest()
+    if not all(applied) or checksum != data.get("checksum"):
+        msg = f"Delta for revision {data.get('revision')} does not match."
+        raise DeltaMismatchError(msg)
+    return {**data, "content": content, "diff": patch}
 
 
 def is_terminal_step(step: str) -> bool:
@@ -215,8 +307,11 @@ def should_resume_stream() -> bool:
 
 def coerce_stream_state(data: dict[str, Any]) -> dict[str, Any]:
     """Normalize a raw stream event into UI state."""
+    status = data.get("step", "Unknown")
+    if data.get("queue_position"):
+        status = f"Queued (#{data['queue_position']})"
     return {
-        "status": data.get("step", "Unknown"),
+        "status": status,
         "prd_content": data.get("content", DEFAULT_PRD_CONTENT),
         "diff": data.get("diff", "") or "",
         "error": data.get("error"),
@@ -245,6 +340,14 @@ def render_state(
     elif st.session_state.status == "Complete":
         with error_placeholder.container():
             st.success("PRD generation completed.")
+            if st.session_state.run_id:
+                html_url = build_export_url(
+                    st.session_state.api_url, st.session_state.run_id, "html"
+                )
+                markdown_url = build_export_url(
+                    st.session_state.api_url, st.session_state.run_id, "md"
+                )
+                st.markdown(f"Share: [HTML]({html_url}) · [Markdown]({markdown_url})")
     else:
         error_placeholder.empty()
 
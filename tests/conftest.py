@@ -1,12 +1,13 @@
 """Pytest configuration and shared fixtures."""
 
-from collections.abc import Generator
+from collections.abc import Callable, Generator
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import pytest
 
 from backend.main import create_app
+from backend.models import PRDState
 from backend.settings import AppSettings
 
 
@@ -33,3 +34,25 @@ def client(app: FastAPI) -> Generator[TestClient, None, None]:
     """FastAPI test client with lifespan support enabled."""
     with TestClient(app) as test_client:
         yield test_client
+
+
+@pytest.fixture
+def make_state() -> Callable[..., PRDState]:
+    """
+    Factory for PRD states with test defaults.
+
+    Any other PRDState field, such as `adapter`, `content` or `created_at`,
+    can be passed by keyword to override the defaults.
+    """
+
+    def build(
+        run_id: str = "run-1",
+        step: str = "Outline",
+        revision: int = 0,
+        **fields: object,
+    ) -> PRDState:
+        values: dict[str, object] = {"idea": "An AI PM assistant", "content": "# PRD"}
+        values.update(fields)
+        return PRDState(run_id=run_id, step=step, revision=revision, **values)
+
+    return build
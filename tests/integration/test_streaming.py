@@ -5,28 +5,40 @@ import json
 from typing import TYPE_CHECKING, cast
 from unittest.mock import AsyncMock, patch
 
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+import pytest
 from sse_starlette.sse import EventSourceResponse
 
-from backend.routes.generation import stream_prd
+from backend.pipelines.pipeline_runner import _next_state
+from backend.routes.generation import stream_prd, stream_runs
+from backend.services.streamer import StreamerService
 
 if TYPE_CHECKING:
     from collections.abc import AsyncIterator
 
 
+def _parse_sse_message(wire: bytes) -> dict[str, str]:
+    """Split an SSE wire message into its `id`, `event` and `data` fields."""
+    fields: dict[str, str] = {}
+    for line in wire.decode().strip().splitlines():
+        name, _, value = line.partition(": ")
+        fields[name] = value
+    return fields
+
+
 async def _read_first_sse_event(
     response: EventSourceResponse,
 ) -> dict[str, object]:
     """Read the first payload from an SSE response body iterator."""
-    iterator = cast("AsyncIterator[dict[str, object]]", response.body_iterator)
-    message = await anext(iterator)
-    data = cast("str", message["data"])
-    return cast("dict[str, object]", json.loads(data))
+    iterator = cast("AsyncIterator[bytes]", response.body_iterator)
+    message = _parse_sse_message(await anext(iterator))
+    return cast("dict[str, object]", json.loads(message["data"]))
 
 
 async def _stream_is_exhausted(response: EventSourceResponse) -> bool:
     """Return whether the SSE body iterator terminates after the first event."""
-    iterator = cast("AsyncIterator[dict[str, object]]", response.body_iterator)
+    iterator = cast("AsyncIterator[bytes]", response.body_iterator)
     try:
         await anext(iterator)
     except StopAsyncIteration:
@@ -90,3 +102,240 @@ def test_stream_replays_terminal_error_state(
     assert payload["error"] == "boom"
     assert asyncio.run(_stream_is_exhausted(stream_response)) is True
     mock_run_pipeline.assert_awaited_once()
+
+
+async def _collect_stream_events(
+    response: EventSourceResponse, count: int
+) -> list[dict[str, str]]:
+    """Read and parse `count` SSE messages from a response body iterator."""
+    iterator = cast("AsyncIterator[bytes]", response.body_iterator)
+    return [_parse_sse_message(await anext(iterator)) for _ in range(count)]
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_delta_stream_sends_patches_and_resyncs_after_gaps(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """Delta mode sends a snapshot, then patches, then a snapshot after a gap."""
+    response = client.post(
+        "/api/v1/generate_prd",
+        json={"idea": "Delta stream", "adapter": "vanilla_openai"},
+    )
+    run_id = response.json()["run_id"]
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    initial_state = asyncio.run(runtime.state_store.get(run_id))
+    assert initial_state is not None
+
+    async def scenario() -> list[dict[str, str]]:
+        stream_response = await stream_prd(
+            run_id, runtime.state_store, runtime.streamer, mode="delta"
+        )
+        outline = _next_state(initial_state, step="Outline", content="# Outline")
+        skipped = _next_state(outline, step="Draft", content="# Draft")
+        draft = _next_state(skipped, step="Draft", content="# Draft\n\nMore")
+        for state in (outline, draft):
+            await runtime.streamer.publish(run_id, state)
+        return await _collect_stream_events(stream_response, 3)
+
+    events = asyncio.run(scenario())
+
+    assert [event["event"] for event in events] == ["snapshot", "delta", "snapshot"]
+    delta = json.loads(events[1]["data"])
+    assert "content" not in delta
+    assert delta["base_revision"] == 0
+    assert delta["patch"].startswith("@@")
+    assert json.loads(events[2]["data"])["content"] == "# Draft\n\nMore"
+    mock_run_pipeline.assert_awaited_once()
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_stream_resumes_from_last_event_id(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """Reconnecting clients should only be replayed the events they missed."""
+    response = client.post(
+        "/api/v1/generate_prd",
+        json={"idea": "Resumable stream", "adapter": "vanilla_openai"},
+    )
+    run_id = response.json()["run_id"]
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    state = asyncio.run(runtime.state_store.get(run_id))
+    assert state is not None
+
+    async def scenario() -> list[dict[str, str]]:
+        current = state
+        for step in ("Outline", "Draft", "Complete"):
+            current = _next_state(current, step=step, content=f"# {step}")
+            await runtime.state_store.save(current)
+            await runtime.streamer.publish(run_id, current)
+        stream_response = await stream_prd(
+            run_id,
+            runtime.state_store,
+            runtime.streamer,
+            mode="delta",
+            last_event_id="1",
+        )
+        return await _collect_stream_events(stream_response, 2)
+
+    events = asyncio.run(scenario())
+
+    assert [(event["id"], event["event"]) for event in events] == [
+        ("2", "delta"),
+        ("3", "delta"),
+    ]
+    assert json.loads(events[1]["data"])["step"] == "Complete"
+    mock_run_pipeline.assert_awaited_once()
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_stream_rejects_subscribers_over_the_run_cap(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """Connections beyond the per-run subscriber cap get a 503."""
+    response = client.post(
+        "/api/v1/generate_prd",
+        json={"idea": "Popular run", "adapter": "vanilla_openai"},
+    )
+    run_id = response.json()["run_id"]
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    streamer = StreamerService(max_subscribers_per_run=1)
+
+    async def scenario() -> None:
+        first = await stream_prd(run_id, runtime.state_store, streamer)
+        assert first.send_timeout == streamer.send_timeout_seconds
+        await stream_prd(run_id, runtime.state_store, streamer)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(scenario())
+
+    assert exc_info.value.status_code == 503
+    mock_run_pipeline.assert_awaited_once()
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_multi_run_stream_sends_progress_until_all_runs_finish(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """One connection should stream content-free progress for several runs."""
+    run_ids = [
+        client.post(
+            "/api/v1/generate_prd",
+            json={"idea": f"Idea {index}", "adapter": "vanilla_openai"},
+        ).json()["run_id"]
+        for index in range(2)
+    ]
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+
+    async def scenario() -> tuple[list[dict[str, str]], bool]:
+        stream_response = await stream_runs(
+            runtime.state_store,
+            runtime.streamer,
+            run_ids=[",".join(run_ids)],
+        )
+        for run_id in run_ids:
+            state = await runtime.state_store.get(run_id)
+            await runtime.streamer.publish(
+                run_id, _next_state(state, step="Complete", content="# Done")
+            )
+        events = await _collect_stream_events(stream_response, 4)
+        return events, await _stream_is_exhausted(stream_response)
+
+    events, exhausted = asyncio.run(scenario())
+
+    payloads = [json.loads(event["data"]) for event in events]
+    assert {event["event"] for event in events} == {"progress"}
+    assert "id" not in events[0]
+    assert [payload["run_id"] for payload in payloads] == run_ids + run_ids
+    assert [payload["step"] for payload in payloads[2:]] == ["Complete", "Complete"]
+    assert "content" not in payloads[2]
+    assert payloads[2]["content_length"] == len("# Done")
+    assert exhausted is True
+    assert mock_run_pipeline.await_count == 2
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_multi_run_stream_ends_under_keep_latest(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """A run finishing before another publishes still ends the keep-latest stream."""
+    run_ids = [
+        client.post(
+            "/api/v1/generate_prd",
+            json={"idea": f"Idea {index}", "adapter": "vanilla_openai"},
+        ).json()["run_id"]
+        for index in range(2)
+    ]
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    streamer = StreamerService(overflow_policy="keep_latest")
+
+    async def scenario() -> tuple[list[dict[str, str]], bool]:
+        stream_response = await stream_runs(
+            runtime.state_store, streamer, run_ids=run_ids
+        )
+        first = await runtime.state_store.get(run_ids[0])
+        second = await runtime.state_store.get(run_ids[1])
+        await streamer.publish(
+            run_ids[0], _next_state(first, step="Complete", content="# Done")
+        )
+        drafted = _next_state(second, step="Draft", content="# Draft")
+        await streamer.publish(run_ids[1], drafted)
+        await streamer.publish(
+            run_ids[1], _next_state(drafted, step="Complete", content="# Done")
+        )
+        events = await _collect_stream_events(stream_response, 4)
+        return events, await _stream_is_exhausted(stream_response)
+
+    events, exhausted = asyncio.run(scenario())
+
+    payloads = [json.loads(event["data"]) for event in events]
+    assert [(payload["run_id"], payload["step"]) for payload in payloads[2:]] == [
+        (run_ids[0], "Complete"),
+        (run_ids[1], "Complete"),
+    ]
+    assert exhausted is True
+    assert mock_run_pipeline.await_count == 2
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_batch_stream_follows_new_runs_of_the_batch(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """Batch streams include active batch runs and runs started later."""
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    first = client.post(
+        "/api/v1/generate_prd",
+        json={"idea": "Batch one", "batch_id": "nightly"},
+    ).json()["run_id"]
+    client.post("/api/v1/generate_prd", json={"idea": "Unbatched"})
+
+    async def scenario() -> list[dict[str, str]]:
+        stream_response = await stream_runs(
+            runtime.state_store,
+            runtime.streamer,
+            scope="batch",
+            batch_id="nightly",
+        )
+        state = await runtime.state_store.get(first)
+        await runtime.streamer.publish(
+            "later", state.model_copy(update={"run_id": "later"})
+        )
+        return await _collect_stream_events(stream_response, 2)
+
+    events = asyncio.run(scenario())
+
+    payloads = [json.loads(event["data"]) for event in events]
+    assert [payload["run_id"] for payload in payloads] == [first, "later"]
+    assert {payload["batch_id"] for payload in payloads} == {"nightly"}
+    assert mock_run_pipeline.await_count == 2
+
+
+def test_multi_run_stream_requires_run_ids(client: TestClient) -> None:
+    """The default `runs` scope needs at least one run id."""
+    response = client.get("/api/v1/stream")
+    assert response.status_code == 400
@@ -0,0 +1,138 @@
+"""Integration tests for the multiplexed WebSocket stream."""
+
+import json
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from backend.main import create_app
+from backend.pipelines.pipeline_runner import _next_state
+from backend.services.streamer import msgpack_available
+from backend.settings import AppSettings
+
+
+def _start_run(client: TestClient, idea: str) -> str:
+    """Start a run and return its id."""
+    response = client.post(
+        "/api/v1/generate_prd",
+        json={"idea": idea, "adapter": "vanilla_openai"},
+    )
+    return str(response.json()["run_id"])
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_websocket_streams_many_runs_over_one_socket(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """One socket should receive snapshots and deltas for every subscribed run."""
+    first_run = _start_run(client, "First idea")
+    second_run = _start_run(client, "Second idea")
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    portal = client.portal
+    assert portal is not None
+
+    with client.websocket_connect("/api/v1/ws?mode=delta") as websocket:
+        websocket.send_json({"action": "subscribe", "run_ids": [first_run, second_run]})
+        snapshots = [websocket.receive_json() for _ in range(2)]
+        assert {frame["event"] for frame in snapshots} == {"snapshot"}
+        assert {frame["data"]["run_id"] for frame in snapshots} == {
+            first_run,
+            second_run,
+        }
+
+        websocket.send_json({"action": "unsubscribe", "run_ids": [second_run]})
+        websocket.send_json({"action": "subscribe", "run_ids": ["missing"]})
+        error = websocket.receive_json()
+        assert error["event"] == "error"
+        assert error["data"]["run_id"] == "missing"
+
+        for run_id in (second_run, first_run):
+            state = portal.call(runtime.state_store.get, run_id)
+            portal.call(
+                runtime.streamer.publish,
+                run_id,
+                _next_state(state, step="Complete", content="# Done"),
+            )
+        delta = websocket.receive_json()
+
+    assert delta["event"] == "delta"
+    assert delta["id"] == "1"
+    assert delta["data"]["run_id"] == first_run
+    assert delta["data"]["step"] == "Complete"
+    assert runtime.streamer.connection_counts().subscribers == 0
+    assert mock_run_pipeline.await_count == 2
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_websocket_keep_latest_delivers_every_runs_terminal_event(
+    mock_run_pipeline: AsyncMock,
+    test_settings: AppSettings,
+) -> None:
+    """Under keep-latest, one run's updates must not evict another run's end."""
+    settings = test_settings.model_copy(
+        update={"stream_overflow_policy": "keep_latest"}
+    )
+    with TestClient(create_app(settings)) as client:
+        first_run = _start_run(client, "First idea")
+        second_run = _start_run(client, "Second idea")
+        runtime = client.app.state.runtime  # type: ignore[attr-defined]
+        portal = client.portal
+        assert portal is not None
+
+        async def finish_both_runs() -> None:
+            first = await runtime.state_store.get(first_run)
+            second = await runtime.state_store.get(second_run)
+            drafted = _next_state(second, step="Draft", content="# Draft")
+            await runtime.streamer.publish(
+                first_run, _next_state(first, step="Complete", content="# Done")
+            )
+            await runtime.streamer.publish(second_run, drafted)
+            await runtime.streamer.publish(
+                second_run, _next_state(drafted, step="Complete", content="# Done")
+            )
+
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            websocket.send_json(
+                {"action": "subscribe", "run_ids": [first_run, second_run]}
+            )
+            snapshots = [websocket.receive_json() for _ in range(2)]
+            portal.call(finish_both_runs)
+            finished = [websocket.receive_json() for _ in range(2)]
+
+        assert {frame["data"]["run_id"] for frame in snapshots} == {
+            first_run,
+            second_run,
+        }
+        assert [
+            (frame["data"]["run_id"], frame["data"]["step"]) for frame in finished
+        ] == [
+            (first_run, "Complete"),
+            (second_run, "Complete"),
+        ]
+        assert runtime.streamer.connection_counts().subscribers == 0
+    assert mock_run_pipeline.await_count == 2
+
+
+def test_websocket_reports_invalid_commands(client: TestClient) -> None:
+    """Malformed commands are answered with an error event."""
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        websocket.send_text(json.dumps({"action": "subscribe", "run_ids": []}))
+        error = websocket.receive_json()
+
+    assert error["event"] == "error"
+    assert error["data"]["run_id"] is None
+
+
+@pytest.mark.skipif(msgpack_available(), reason="msgpack is installed")
+def test_websocket_rejects_msgpack_without_the_extra(client: TestClient) -> None:
+    """The binary format is refused when msgpack is not installed."""
+    with (
+        pytest.raises(WebSocketDisconnect) as exc_info,
+        client.websocket_connect("/api/v1/ws?format=msgpack"),
+    ):
+        pass
+
+    assert exc_info.value.code == 1003
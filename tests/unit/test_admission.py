@@ -0,0 +1,94 @@
+"""Unit tests for admission control of new runs."""
+
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.main import create_app
+from backend.services.admission import AdmissionController, AdmissionRejectedError
+from backend.settings import AppSettings
+
+
+def test_admission_caps_active_runs_globally_and_per_adapter() -> None:
+    """Runs past either cap wait in FIFO order and start as slots free up."""
+    admission = AdmissionController(
+        max_active_runs=3, max_active_runs_per_adapter=2, max_queued_runs=5
+    )
+
+    first = admission.admit("run-1", "vanilla_openai")
+    second = admission.admit("run-2", "vanilla_openai")
+    third = admission.admit("run-3", "vanilla_openai")
+    google = admission.admit("run-4", "vanilla_google")
+    fifth = admission.admit("run-5", "vanilla_google")
+
+    assert first.admitted and second.admitted and google.admitted
+    assert (third.admitted, third.position) == (False, 1)
+    assert (fifth.admitted, fifth.position) == (False, 2)
+
+    first.release()
+    assert third.admitted
+    assert (fifth.admitted, fifth.position) == (False, 1)
+
+    first.release()
+    assert admission.stats().active == 3
+
+
+def test_admission_rejects_when_queue_is_full() -> None:
+    """A full queue rejects new runs with a retry delay from run durations."""
+    admission = AdmissionController(
+        max_active_runs=1, max_queued_runs=1, initial_run_seconds=10.0
+    )
+    admission.admit("run-1", "vanilla_openai")
+    queued = admission.admit("run-2", "vanilla_openai")
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        admission.admit("run-3", "vanilla_openai")
+
+    assert exc_info.value.retry_after_seconds == 20
+    assert admission.stats().rejected == 1
+
+    queued.release()
+    stats = admission.stats()
+    assert (stats.active, stats.queued) == (1, 0)
+
+
+def test_admission_learns_run_durations() -> None:
+    """Finished runs replace the initial estimate with a moving average."""
+    admission = AdmissionController(max_active_runs=1, initial_run_seconds=60.0)
+    ticket = admission.admit("run-1", "vanilla_openai")
+    assert ticket.admitted_at is not None
+    ticket.admitted_at -= 4.0
+
+    ticket.release()
+
+    assert admission.stats().run_seconds_by_adapter["vanilla_openai"] >= 4.0
+    assert admission.retry_after_seconds("vanilla_openai") < 10
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_generate_prd_sheds_load_with_retry_after(
+    mock_run_pipeline: AsyncMock,
+    test_settings: AppSettings,
+) -> None:
+    """Requests past the active and queued caps get 429 with `Retry-After`."""
+    settings = test_settings.model_copy(
+        update={"max_active_runs": 1, "max_queued_runs": 1}
+    )
+    body = {"idea": "A PRD assistant", "adapter": "vanilla_openai"}
+
+    with TestClient(create_app(settings)) as client:
+        active = client.post("/api/v1/generate_prd", json=body)
+        queued = client.post("/api/v1/generate_prd", json=body)
+        rejected = client.post("/api/v1/generate_prd", json=body)
+        stats = client.get("/admission").json()
+
+    assert active.status_code == 201
+    assert queued.status_code == 201
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert mock_run_pipeline.await_count == 2
+    assert mock_run_pipeline.await_args.kwargs["ticket"].position == 1
+    assert stats["active"] == 1
+    assert stats["queued"] == 1
+    assert stats["rejected"] == 1
@@ -2,7 +2,10 @@
 
 from unittest.mock import patch
 
+import pytest
+
 from backend.main import cli
+from backend.settings import AppSettings
 
 
 def test_cli_invokes_uvicorn_with_expected_arguments() -> None:
@@ -12,8 +15,56 @@ def test_cli_invokes_uvicorn_with_expected_arguments() -> None:
 
     assert exit_code == 0
     mock_run.assert_called_once_with(
-        "backend.main:app",
+        "backend.main:create_app",
+        factory=True,
         host="127.0.0.1",
         port=9001,
+        workers=1,
+        ws_per_message_deflate=True,
         reload=False,
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=5,
+        backlog=2048,
+        access_log=True,
+        proxy_headers=False,
     )
+
+
+def test_cli_production_preset_tunes_workers_and_loop() -> None:
+    """The production preset selects uvloop/httptools and accepts overrides."""
+    settings = AppSettings(state_backend="redis")
+    with (
+        patch("backend.main.AppSettings", return_value=settings),
+        patch("backend.main.uvicorn.run") as mock_run,
+    ):
+        cli(["--preset", "production", "--workers", "4", "--backlog", "8192"])
+
+    kwargs = mock_run.call_args.kwargs
+    assert kwargs["workers"] == 4
+    assert kwargs["reload"] is False
+    assert (kwargs["loop"], kwargs["http"]) == ("uvloop", "httptools")
+    assert kwargs["timeout_keep_alive"] == 75
+    assert kwargs["backlog"] == 8192
+
+
+@pytest.mark.parametrize("state_backend", ["memory", "auto"])
+def test_cli_production_preset_refuses_per_process_state(state_backend: str) -> None:
+    """Several production workers cannot share in-memory state."""
+    settings = AppSettings(state_backend=state_backend)
+    with (
+        patch("backend.main.AppSettings", return_value=settings),
+        patch("backend.main.uvicorn.run") as mock_run,
+        pytest.raises(SystemExit),
+    ):
+        cli(["--preset", "production", "--workers", "2"])
+
+    mock_run.assert_not_called()
+
+
+def test_cli_rejects_reload_with_several_workers() -> None:
+    """Uvicorn cannot reload a multi-process server."""
+    with patch("backend.main.uvicorn.run") as mock_run, pytest.raises(SystemExit):
+        cli(["--reload", "--workers", "2"])
+
+    mock_run.assert_not_called()
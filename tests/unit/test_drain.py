@@ -0,0 +1,123 @@
+"""Unit tests for graceful draining and handoff of pipeline runs."""
+
+import asyncio
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.models import PRDState
+from backend.runtime import build_runtime, close_runtime, resume_handoffs
+from backend.services.supervisor import PipelineSupervisor
+from backend.settings import AppSettings
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_pipelines_within_the_grace_period() -> None:
+    """Pipelines finishing inside the grace period are not cancelled."""
+    supervisor = PipelineSupervisor(grace_seconds=1.0)
+    finished = asyncio.Event()
+
+    async def pipeline() -> None:
+        await asyncio.sleep(0.01)
+        finished.set()
+
+    await supervisor.start("run-1", pipeline(), tenant="tenant-a")
+
+    assert supervisor.active_run_ids == ["run-1"]
+    assert await supervisor.drain() == {}
+    assert finished.is_set()
+    assert supervisor.stats().draining is True
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_pipelines_still_running_after_the_grace_period() -> None:
+    """Pipelines outliving the grace period are cancelled and reported."""
+    supervisor = PipelineSupervisor(grace_seconds=0.01)
+    cancelled = asyncio.Event()
+
+    async def pipeline() -> None:
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    await supervisor.start("run-slow", pipeline(), tenant="tenant-a")
+
+    assert await supervisor.drain() == {"run-slow": "tenant-a"}
+    assert cancelled.is_set()
+    await asyncio.sleep(0)
+    assert supervisor.stats().active_pipelines == 0
+
+
+@pytest.mark.asyncio
+async def test_close_runtime_hands_off_runs_that_outlive_the_drain() -> None:
+    """Runs cancelled by the drain are queued for handoff before closing."""
+    settings = AppSettings(
+        state_backend="memory", drain_grace_seconds=0, handoff_poll_seconds=0
+    )
+    runtime = await build_runtime(settings)
+    store = runtime.state_store
+    handed_off: list[tuple[str, str]] = []
+
+    async def enqueue_handoff(run_id: str, tenant: str) -> None:
+        handed_off.append((run_id, tenant))
+
+    store.enqueue_handoff = enqueue_handoff  # type: ignore[method-assign]
+    await runtime.pipelines.start("run-slow", asyncio.sleep(60), tenant="tenant-a")
+
+    await close_runtime(runtime)
+
+    assert handed_off == [("run-slow", "tenant-a")]
+
+
+@pytest.mark.asyncio
+async def test_resume_handoffs_continues_after_the_last_checkpoint(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """A handed-off run resumes from its checkpoint under its own tenant."""
+    settings = AppSettings(
+        state_backend="memory",
+        fake_adapter_enabled=True,
+        handoff_poll_seconds=0,
+    )
+    runtime = await build_runtime(settings)
+    store = runtime.state_store
+    checkpoint = make_state(
+        "run-1", "Draft", 2, adapter="fake", content="# Draft from the old worker"
+    )
+    await store.save(checkpoint)
+    await store.save(make_state("run-done", "Complete", 5, adapter="fake"))
+    await store.enqueue_handoff("run-1", "tenant-a")
+    await store.enqueue_handoff("run-done", "tenant-b")
+
+    assert await resume_handoffs(runtime) == 1
+    async with asyncio.timeout(5):
+        while runtime.pipelines.active_run_ids:
+            await asyncio.sleep(0.01)
+
+    final_state = await store.get("run-1")
+    assert final_state is not None
+    assert final_state.step == "Complete"
+    assert final_state.revision == 4
+    assert final_state.content == "# Draft from the old worker"
+    assert await store.claim_handoffs(10) == []
+    assert list(runtime.scheduler.stats().tenants) == ["tenant-a"]
+    await close_runtime(runtime)
+
+
+def test_draining_instance_is_not_ready_and_refuses_new_runs(
+    client: TestClient,
+) -> None:
+    """Once draining starts, `/ready` fails and new runs get 503."""
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    runtime.pipelines.begin_drain()
+
+    ready = client.get("/ready")
+    created = client.post("/api/v1/generate_prd", json={"idea": "Too late"})
+
+    assert ready.status_code == 503
+    assert ready.json()["status"] == "draining"
+    assert created.status_code == 503
+    assert client.get("/pipelines").json()["draining"] is True
@@ -0,0 +1,84 @@
+"""Unit tests for cached PRD rendering and the export endpoint."""
+
+import asyncio
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.models import PRDState
+from backend.services.renderer import MarkdownRenderer, render_document
+
+CONTENT = "# Team Planner\n\n## Goals\n\n- Ship **fast**\n\n<script>alert(1)</script>\n"
+
+
+def test_render_document_escapes_raw_html() -> None:
+    """Rendered pages keep Markdown formatting but never pass raw HTML through."""
+    page = render_document(CONTENT).decode()
+    assert "<title>Team Planner</title>" in page
+    assert "<strong>fast</strong>" in page
+    assert "<script>" not in page
+    assert "&lt;script&gt;" in page
+
+
+@pytest.mark.asyncio
+async def test_renderer_renders_each_content_once(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Concurrent and repeated requests share one render per content hash."""
+    renderer = MarkdownRenderer(max_entries=1)
+    state = make_state(step="Complete", revision=5, content=CONTENT)
+
+    pages = await asyncio.gather(
+        *(renderer.render_html(state.content, state.content_checksum) for _ in range(5))
+    )
+    await renderer.render_html(state.content, state.content_checksum)
+
+    assert len(set(pages)) == 1
+    assert renderer.stats().renders == 1
+    assert renderer.stats().hits == 5
+
+    await renderer.render_html("# Other", "other-checksum")
+    assert renderer.stats().entries == 1
+    await renderer.render_html(state.content, state.content_checksum)
+    assert renderer.stats().renders == 3
+
+
+def test_export_endpoint_streams_html_and_markdown(
+    client: TestClient,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Exports carry strong content ETags and revalidate with 304."""
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    state = make_state(step="Complete", revision=5, content=CONTENT)
+    client.portal.call(runtime.state_store.save, state)  # type: ignore[union-attr]
+
+    html_export = client.get("/api/v1/runs/run-1/export")
+    assert html_export.status_code == 200
+    assert html_export.headers["content-type"] == "text/html; charset=utf-8"
+    assert html_export.headers["ETag"] == f'"{state.content_checksum}.html"'
+    assert "<h2>Goals</h2>" in html_export.text
+
+    markdown_export = client.get("/api/v1/runs/run-1/export", params={"format": "md"})
+    assert markdown_export.text == CONTENT
+    assert markdown_export.headers["ETag"] != html_export.headers["ETag"]
+
+    revalidated = client.get(
+        "/api/v1/runs/run-1/export",
+        headers={"If-None-Match": html_export.headers["ETag"]},
+    )
+    assert revalidated.status_code == 304
+    assert runtime.renderer.stats().renders == 1
+
+
+def test_export_endpoint_requires_a_completed_run(
+    client: TestClient,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Unknown runs are 404s and unfinished runs 409s."""
+    assert client.get("/api/v1/runs/run-1/export").status_code == 404
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    client.portal.call(  # type: ignore[union-attr]
+        runtime.state_store.save, make_state(step="Draft", content=CONTENT)
+    )
+    assert client.get("/api/v1/runs/run-1/export").status_code == 409
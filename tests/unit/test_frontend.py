@@ -1,14 +1,22 @@
 """Unit tests for frontend helper functions."""
 
+from hashlib import sha256
+
+from diff_match_patch import diff_match_patch
+import pytest
 import streamlit as st
 
 from frontend.app import (
     DEFAULT_PRD_CONTENT,
+    DeltaMismatchError,
+    apply_stream_event,
+    build_export_url,
     build_generation_payload,
     build_stream_url,
     coerce_stream_state,
     is_terminal_step,
     mark_stream_error,
+    submission_idempotency_key,
 )
 
 
@@ -18,11 +26,57 @@ def test_build_generation_payload_trims_idea() -> None:
     assert payload == {"idea": "test idea", "adapter": "vanilla_openai"}
 
 
+def test_build_export_url() -> None:
+    """Export links should point at the server-rendered export endpoint."""
+    assert build_export_url("http://localhost:8000", "run-1", "html") == (
+        "http://localhost:8000/api/v1/runs/run-1/export?format=html"
+    )
+
+
 def test_build_stream_url() -> None:
     """The stream URL should be derived from the backend base URL."""
     assert build_stream_url("http://localhost:8000", "run-1") == (
         "http://localhost:8000/api/v1/stream/run-1"
     )
+    assert build_stream_url("http://localhost:8000", "run-1", delta=True) == (
+        "http://localhost:8000/api/v1/stream/run-1?mode=delta"
+    )
+
+
+def _delta_event(before: str, after: str) -> dict[str, object]:
+    """Build a delta payload the way the backend encodes it."""
+    dmp = diff_match_patch()
+    return {
+        "step": "Revise",
+        "revision": 2,
+        "patch": dmp.patch_toText(dmp.patch_make(before, after)),
+        "checksum": sha256(after.encode("utf-8")).hexdigest(),
+    }
+
+
+def test_apply_stream_event_patches_delta_content() -> None:
+    """Delta events should rebuild the full content from the previous one."""
+    before = "# PRD\n\n## Goals\n- Ship fast"
+    after = "# PRD\n\n## Goals\n- Ship fast\n- Stay reliable"
+
+    payload = apply_stream_event("delta", _delta_event(before, after), before)
+
+    assert payload["content"] == after
+    assert payload["diff"] == _delta_event(before, after)["patch"]
+
+
+def test_apply_stream_event_rejects_checksum_mismatch() -> None:
+    """A delta applied to the wrong base must trigger a resync."""
+    event = _delta_event("# PRD v1", "# PRD v2")
+
+    with pytest.raises(DeltaMismatchError):
+        apply_stream_event("delta", event, "# Something else entirely")
+
+
+def test_apply_stream_event_passes_snapshots_through() -> None:
+    """Snapshot events already carry the full content."""
+    snapshot = {"step": "Draft", "content": "# Draft"}
+    assert apply_stream_event("snapshot", snapshot, "") is snapshot
 
 
 def test_is_terminal_step() -> None:
@@ -42,6 +96,14 @@ def test_coerce_stream_state_defaults() -> None:
     }
 
 
+def test_coerce_stream_state_reports_queue_position() -> None:
+    """Queued runs should show their admission queue position as the status."""
+    ui_state = coerce_stream_state({"step": "Outline", "queue_position": 3})
+    assert ui_state["status"] == "Queued (#3)"
+    ui_state = coerce_stream_state({"step": "Outline", "queue_position": None})
+    assert ui_state["status"] == "Outline"
+
+
 def test_mark_stream_error_sets_terminal_state() -> None:
     """Transport failures should move the UI to a terminal error state."""
     st.session_state.status = "Draft"
@@ -51,3 +113,19 @@ def test_mark_stream_error_sets_terminal_state() -> None:
 
     assert st.session_state.status == "Error"
     assert st.session_state.error == "backend unavailable"
+
+
+def test_submission_idempotency_key_is_reused_for_retries() -> None:
+    """Resubmitting the same request reuses its key until it changes."""
+    st.session_state.submission = None
+    st.session_state.idempotency_key = None
+    payload = build_generation_payload("test idea", "vanilla_openai")
+
+    first = submission_idempotency_key(payload)
+    retry = submission_idempotency_key(payload)
+    changed = submission_idempotency_key(
+        build_generation_payload("other idea", "vanilla_openai")
+    )
+
+    assert first == retry
+    assert changed != first
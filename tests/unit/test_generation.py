@@ -89,3 +89,15 @@ def test_generate_prd_validation_errors(
     assert response.status_code == 422
     assert "vanilla_openai" in str(response.json()["detail"])
     assert "vanilla_google" in str(response.json()["detail"])
+
+
+def test_generate_prd_rejects_the_fake_adapter_unless_enabled(
+    client: TestClient,
+) -> None:
+    """The benchmark-only fake adapter is off by default."""
+    response = client.post(
+        "/api/v1/generate_prd", json={"idea": "Load test", "adapter": "fake"}
+    )
+
+    assert response.status_code == 400
+    assert "FAKE_ADAPTER_ENABLED" in response.json()["detail"]
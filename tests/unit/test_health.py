@@ -18,6 +18,16 @@ def test_readiness_check(client: TestClient) -> None:
     assert response.json() == {"status": "ready", "state_backend": "memory"}
 
 
+def test_connection_counts(client: TestClient) -> None:
+    """`/connections` reports stream subscriber counts and limits."""
+    response = client.get("/connections")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["subscribers"] == 0
+    assert data["runs"] == 0
+    assert data["max_subscribers_per_run"] == 100
+
+
 def test_root_endpoint(client: TestClient) -> None:
     """The root endpoint exposes basic API metadata."""
     response = client.get("/")
@@ -0,0 +1,205 @@
+"""Unit tests for idempotent run creation."""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.main import create_app
+from backend.settings import AppSettings
+from backend.state.in_memory_store import InMemoryStore
+from backend.state.sqlite_store import SQLiteStore
+
+
+@pytest.mark.asyncio
+async def test_memory_store_claims_keys_until_they_expire() -> None:
+    """The first claim wins until its TTL runs out."""
+    store = InMemoryStore()
+
+    assert await store.claim_idempotency_key("key-1", "run-1", 60) == "run-1"
+    assert await store.claim_idempotency_key("key-1", "run-2", 60) == "run-1"
+    assert await store.claim_idempotency_key("key-2", "run-3", 60) == "run-3"
+
+    store._idempotency_keys["key-1"] = ("run-1", 0.0)
+    assert await store.claim_idempotency_key("key-1", "run-4", 60) == "run-4"
+
+
+@pytest.mark.asyncio
+async def test_memory_store_releases_only_its_own_claim() -> None:
+    """Releasing a key leaves another run's claim in place."""
+    store = InMemoryStore()
+    await store.claim_idempotency_key("key-1", "run-1", 60)
+
+    await store.release_idempotency_key("key-1", "run-2")
+    assert await store.claim_idempotency_key("key-1", "run-3", 60) == "run-1"
+
+    await store.release_idempotency_key("key-1", "run-1")
+    assert await store.claim_idempotency_key("key-1", "run-3", 60) == "run-3"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_claims_keys_atomically(tmp_path: Path) -> None:
+    """SQLite claims persist across connections and purge expired keys."""
+    path = str(tmp_path / "state.sqlite3")
+    store = SQLiteStore(path)
+    assert await store.claim_idempotency_key("key-1", "run-1", 60) == "run-1"
+    assert await store.claim_idempotency_key("key-2", "run-2", -1) == "run-2"
+    await store.close()
+
+    reopened = SQLiteStore(path)
+    assert await reopened.claim_idempotency_key("key-1", "run-3", 60) == "run-1"
+    assert await reopened.claim_idempotency_key("key-2", "run-4", 60) == "run-4"
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_releases_only_its_own_claim(tmp_path: Path) -> None:
+    """Releasing a key leaves another run's claim in place."""
+    store = SQLiteStore(str(tmp_path / "state.sqlite3"))
+    await store.claim_idempotency_key("key-1", "run-1", 60)
+
+    await store.release_idempotency_key("key-1", "run-2")
+    assert await store.claim_idempotency_key("key-1", "run-3", 60) == "run-1"
+
+    await store.release_idempotency_key("key-1", "run-1")
+    assert await store.claim_idempotency_key("key-1", "run-3", 60) == "run-3"
+    await store.close()
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_generate_prd_reuses_run_for_repeated_idempotency_key(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """Retried submissions with the same key return the original run."""
+    body = {"idea": "A PRD assistant", "adapter": "vanilla_openai"}
+
+    first = client.post(
+        "/api/v1/generate_prd", json=body, headers={"Idempotency-Key": "abc"}
+    )
+    retry = client.post(
+        "/api/v1/generate_prd", json=body, headers={"Idempotency-Key": "abc"}
+    )
+    other = client.post(
+        "/api/v1/generate_prd", json=body, headers={"Idempotency-Key": "def"}
+    )
+
+    assert first.status_code == 201
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["run_id"] == first.json()["run_id"]
+    assert other.json()["run_id"] != first.json()["run_id"]
+    assert mock_run_pipeline.await_count == 2
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_generate_prd_scopes_idempotency_keys_to_the_tenant(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """Tenants sending the same key get their own runs, never each other's."""
+    body = {"idea": "A PRD assistant", "adapter": "vanilla_openai"}
+
+    acme = client.post(
+        "/api/v1/generate_prd",
+        json=body,
+        headers={"Idempotency-Key": "abc", "X-Tenant-ID": "acme"},
+    )
+    globex = client.post(
+        "/api/v1/generate_prd",
+        json=body,
+        headers={"Idempotency-Key": "abc", "X-Tenant-ID": "globex"},
+    )
+    acme_retry = client.post(
+        "/api/v1/generate_prd",
+        json=body,
+        headers={"Idempotency-Key": "abc", "X-Tenant-ID": "acme"},
+    )
+
+    assert acme.status_code == 201
+    assert globex.status_code == 201
+    assert globex.json()["run_id"] != acme.json()["run_id"]
+    assert acme_retry.status_code == 200
+    assert acme_retry.json()["run_id"] == acme.json()["run_id"]
+    assert mock_run_pipeline.await_count == 2
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_generate_prd_derives_keys_from_the_idea_when_enabled(
+    mock_run_pipeline: AsyncMock,
+    test_settings: AppSettings,
+) -> None:
+    """Automatic keys treat normalized duplicates of an idea as one run."""
+    settings = test_settings.model_copy(update={"idempotency_auto_key": True})
+
+    with TestClient(create_app(settings)) as client:
+        first = client.post("/api/v1/generate_prd", json={"idea": "A PRD assistant"})
+        duplicate = client.post(
+            "/api/v1/generate_prd", json={"idea": "  a prd   ASSISTANT "}
+        )
+        other_adapter = client.post(
+            "/api/v1/generate_prd",
+            json={"idea": "A PRD assistant", "adapter": "vanilla_google"},
+        )
+
+    assert duplicate.status_code == 200
+    assert duplicate.json()["run_id"] == first.json()["run_id"]
+    assert other_adapter.status_code == 201
+    assert mock_run_pipeline.await_count == 2
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_generate_prd_releases_key_when_initial_save_fails(
+    mock_run_pipeline: AsyncMock,
+    client: TestClient,
+) -> None:
+    """A retry after a failed save starts a new run instead of replaying it."""
+    body = {"idea": "A PRD assistant", "adapter": "vanilla_openai"}
+    headers = {"Idempotency-Key": "abc"}
+    state_store = client.app.state.runtime.state_store  # type: ignore[attr-defined]
+
+    with (
+        patch.object(state_store, "save", side_effect=ConnectionError("down")),
+        pytest.raises(ConnectionError),
+    ):
+        client.post("/api/v1/generate_prd", json=body, headers=headers)
+    retry = client.post("/api/v1/generate_prd", json=body, headers=headers)
+
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
+    assert mock_run_pipeline.await_count == 1
+
+
+@patch("backend.routes.generation.run_pipeline", new_callable=AsyncMock)
+def test_generate_prd_replays_before_admission(
+    mock_run_pipeline: AsyncMock,
+    test_settings: AppSettings,
+) -> None:
+    """Retries of an admitted run replay it even when admission is full."""
+    settings = test_settings.model_copy(
+        update={"max_active_runs": 1, "max_queued_runs": 0}
+    )
+    body = {"idea": "A PRD assistant", "adapter": "vanilla_openai"}
+
+    with TestClient(create_app(settings)) as client:
+        first = client.post(
+            "/api/v1/generate_prd", json=body, headers={"Idempotency-Key": "abc"}
+        )
+        retry = client.post(
+            "/api/v1/generate_prd", json=body, headers={"Idempotency-Key": "abc"}
+        )
+        rejected = client.post(
+            "/api/v1/generate_prd", json=body, headers={"Idempotency-Key": "def"}
+        )
+        rejected_again = client.post(
+            "/api/v1/generate_prd", json=body, headers={"Idempotency-Key": "def"}
+        )
+
+    assert first.status_code == 201
+    assert retry.status_code == 200
+    assert retry.json()["run_id"] == first.json()["run_id"]
+    # A rejected run releases its key, so its retry is not replayed.
+    assert rejected.status_code == 429
+    assert rejected_again.status_code == 429
+    assert mock_run_pipeline.await_count == 1
@@ -0,0 +1,83 @@
+"""Import-time budget for the API entry point."""
+
+import subprocess
+import sys
+
+FRAMEWORK_MODULES = (
+    "fastapi",
+    "uvicorn",
+    "structlog",
+    "sse_starlette",
+    "pydantic_settings",
+)
+LAZY_MODULES = (
+    "openai",
+    "google.genai",
+    "diff_match_patch",
+    "markdown",
+    "prometheus_client",
+    "opentelemetry.sdk",
+    "pyinstrument",
+    "streamlit",
+    "backend.state.redis_store",
+    "backend.state.sqlite_store",
+)
+# The backend's own import cost is budgeted relative to the frameworks it
+# builds on, so the check holds on fast and slow machines alike.
+BACKEND_IMPORT_BUDGET_RATIO = 0.5
+
+
+def _import_profile(statement: str) -> dict[str, int]:
+    """Run a statement under `-X importtime` and return cumulative microseconds."""
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def test_backend_main_imports_lazily() -> None:
+    """Importing the entry point neither builds the app nor loads heavy extras."""
+    profile = _import_profile(
+        "import backend.main; assert 'app' not in vars(backend.main)"
+    )
+    loaded = {module for module in LAZY_MODULES if module in profile}
+    assert loaded == set()
+
+
+def test_backend_main_import_time_stays_within_budget() -> None:
+    """The backend's own import time stays small next to its frameworks."""
+    frameworks = ", ".join(FRAMEWORK_MODULES)
+    profile = _import_profile(f"import {frameworks}; import backend.main")
+    framework_us = sum(profile[module] for module in FRAMEWORK_MODULES)
+    backend_us = profile["backend.main"]
+
+    assert backend_us <= BACKEND_IMPORT_BUDGET_RATIO * framework_us, (
+        f"backend.main took {backend_us / 1000:.1f} ms to import on top of "
+        f"{framework_us / 1000:.1f} ms of frameworks"
+    )
+
+
+def test_backend_main_builds_the_default_app_on_first_access() -> None:
+    """`backend.main:app` still works for servers that do not use the factory."""
+    result = subprocess.run(  # nosec B603
+        [
+            sys.executable,
+            "-c",
+            "import backend.main; "
+            "assert backend.main.app is backend.main.app; "
+            "print(backend.main.app.title)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "Agentic PRD Generation API"
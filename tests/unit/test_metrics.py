@@ -0,0 +1,134 @@
+"""Unit tests for the Prometheus metrics endpoint and recorders."""
+
+import asyncio
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend import metrics
+from backend.agents.base_adapter import AdapterError, BaseAdapter
+from backend.agents.vanilla import VanillaAdapter
+from backend.main import create_app
+from backend.models import PRDState
+from backend.pipelines.pipeline_runner import run_pipeline
+from backend.settings import AppSettings
+from backend.state.in_memory_store import InMemoryStore
+
+
+class FailingAdapter(BaseAdapter):
+    """Adapter test double that raises a typed provider error."""
+
+    adapter_type = "test"
+
+    async def call_llm(self, prompt: str) -> str:
+        del prompt
+        raise AdapterError("test", "provider blew up")
+
+
+def _sample(body: str, name: str, **labels: str) -> float:
+    """Return the value of one sample from Prometheus text exposition."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    prefix = f"{name}{{{label_text}}} " if labels else f"{name} "
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line.removeprefix(prefix))
+    raise AssertionError(f"No sample {prefix!r} in metrics output.")
+
+
+def test_metrics_cover_pipeline_store_and_runtime_gauges(
+    test_settings: AppSettings,
+) -> None:
+    """A finished run shows up in step, store, diff and revision metrics."""
+    settings = test_settings.model_copy(update={"fake_adapter_enabled": True})
+    with TestClient(create_app(settings)) as client:
+        created = client.post(
+            "/api/v1/generate_prd", json={"idea": "Metrics", "adapter": "fake"}
+        )
+        run_id = created.json()["run_id"]
+        for _ in range(100):
+            if client.get(f"/api/v1/runs/{run_id}").json()["step"] == "Complete":
+                break
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    for step in ("Outline", "Draft", "Critique"):
+        assert _sample(
+            body,
+            "prd_pipeline_step_duration_seconds_count",
+            step=step,
+            outcome="success",
+        )
+    assert _sample(
+        body,
+        "prd_llm_call_duration_seconds_count",
+        provider="fake",
+        model="fake",
+        outcome="success",
+    )
+    assert _sample(
+        body,
+        "prd_state_store_operation_duration_seconds_count",
+        backend="memory",
+        operation="save",
+    )
+    assert _sample(body, "prd_diff_duration_seconds_count")
+    assert _sample(body, "prd_run_revisions_count", outcome="complete")
+    assert _sample(body, "prd_stream_subscribers") == 0
+    assert _sample(body, "prd_admission_queued_runs") == 0
+    assert _sample(body, "prd_llm_calls_queued") == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_steps_are_recorded_with_their_outcome(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """A step that raises still records its latency, labelled as an error."""
+    from prometheus_client import REGISTRY
+
+    assert metrics.enable_metrics()
+    labels = {"step": "Outline", "outcome": "error"}
+    name = "prd_pipeline_step_duration_seconds_count"
+    before = REGISTRY.get_sample_value(name, labels) or 0.0
+
+    await run_pipeline(make_state("run-failing"), InMemoryStore(), FailingAdapter())
+
+    assert REGISTRY.get_sample_value(name, labels) == before + 1
+
+
+def test_metrics_endpoint_is_absent_when_disabled(test_settings: AppSettings) -> None:
+    """`METRICS_ENABLED=false` removes the endpoint's data and returns 404."""
+    settings = test_settings.model_copy(update={"metrics_enabled": False})
+    with TestClient(create_app(settings)) as client:
+        assert client.get("/metrics").status_code == 404
+
+
+def test_recorders_are_no_ops_without_metrics(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Hot paths can record unconditionally before metrics are enabled."""
+    monkeypatch.setattr(metrics._Registry, "metrics", None)
+
+    metrics.observe_step("Outline", 0.1)
+    metrics.observe_llm_call("openai", "model", 0.1, prompt_tokens=10)
+    metrics.observe_store("memory", "save", 0.001)
+    metrics.observe_diff(0.001)
+    metrics.observe_run_revisions("complete", 4)
+
+
+def test_openai_calls_record_reported_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Token usage reported by the provider is counted per model."""
+    assert metrics.enable_metrics()
+    adapter = VanillaAdapter(openai_api_key="key", openai_model="metrics-model")
+    tokens = metrics._Registry.metrics.llm_tokens  # type: ignore[union-attr]
+    before = tokens.labels("openai", "metrics-model", "completion")._value.get()
+
+    async def call_openai(prompt: str) -> tuple[str, tuple[int, int]]:
+        del prompt
+        return "# Outline", (12, 34)
+
+    monkeypatch.setattr(adapter, "_call_openai", call_openai)
+    asyncio.run(adapter.call_llm("Write an outline"))
+
+    after = tokens.labels("openai", "metrics-model", "completion")._value.get()
+    assert after - before == 34
@@ -0,0 +1,52 @@
+"""Unit tests for PRD state models and their encodings."""
+
+from collections.abc import Callable
+import json
+
+import pytest
+
+from backend.models import PRDState, hash_idea
+
+
+@pytest.fixture
+def state(make_state: Callable[..., PRDState]) -> PRDState:
+    """A PRD state with non-ASCII content."""
+    return make_state(
+        step="Draft",
+        revision=2,
+        adapter="vanilla_openai",
+        content="# PRD\n\nCafé ☕ requirements",
+        diff="@@ -1 +1 @@",
+    )
+
+
+def test_event_json_omits_the_private_idea(state: PRDState) -> None:
+    """The SSE encoding should expose the public payload only."""
+    payload = json.loads(state.event_json)
+
+    assert "idea" not in payload
+    assert payload["content"] == state.content
+    assert payload["created_at"].endswith("Z")
+    assert payload == state.to_event_payload()
+
+
+def test_storage_json_round_trips_the_full_state(state: PRDState) -> None:
+    """The storage encoding should decode back into an equal state."""
+    assert json.loads(state.storage_json)["idea"] == state.idea
+    assert PRDState.from_json(state.storage_json) == state
+
+
+def test_model_copy_does_not_reuse_cached_encodings(state: PRDState) -> None:
+    """Updated copies must be encoded from their own fields."""
+    assert "Café" in state.event_json
+
+    copied = state.model_copy(update={"content": "# Replaced"})
+
+    assert json.loads(copied.event_json)["content"] == "# Replaced"
+    assert PRDState.from_json(copied.storage_json).content == "# Replaced"
+
+
+def test_hash_idea_ignores_case_and_whitespace() -> None:
+    """Equivalent ideas should hash identically."""
+    assert hash_idea("  Plant   Identifier ") == hash_idea("plant identifier")
+    assert hash_idea("plant identifier") != hash_idea("plant identifiers")
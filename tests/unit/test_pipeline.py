@@ -1,12 +1,15 @@
 """Unit tests for the PRD generation pipeline."""
 
+import asyncio
 from dataclasses import dataclass, field
 
 import pytest
 
 from backend.agents.base_adapter import AdapterError, BaseAdapter
+from backend.agents.fake import FakeAdapter
 from backend.models import PRDState
 from backend.pipelines.pipeline_runner import create_diff, run_pipeline
+from backend.services.admission import AdmissionController
 from backend.services.streamer import StreamerService
 from backend.state.base import StateStore
 
@@ -208,3 +211,65 @@ async def test_run_pipeline_terminal_states_preserve_none_diff() -> None:
 
     assert error_store.history[-1].step == "Error"
     assert error_store.history[-1].diff is None
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_reports_queue_position_until_admitted() -> None:
+    """Queued runs publish position changes, then start once a slot frees up."""
+    admission = AdmissionController(max_active_runs=1, max_queued_runs=5)
+    blocker = admission.admit("run-blocker", "vanilla_openai")
+    ticket = admission.admit("run-queued", "vanilla_openai")
+    store = RecordingStore()
+    initial_state = PRDState(
+        run_id="run-queued",
+        idea="A queued run",
+        step="Outline",
+        content="# PRD for A queued run\n\n_Starting outline generation..._",
+        revision=0,
+        queue_position=ticket.position,
+    )
+
+    pipeline = asyncio.create_task(
+        run_pipeline(
+            initial_state=initial_state,
+            state_store=store,
+            adapter=SequenceAdapter(["# Outline", "# Draft", "No issues found."]),
+            ticket=ticket,
+        )
+    )
+    await asyncio.sleep(0)
+    assert store.history == []
+
+    blocker.release()
+    await pipeline
+
+    assert store.history[0].queue_position is None
+    assert store.history[0].step == "Outline"
+    assert store.history[0].revision == 1
+    assert store.history[-1].step == "Complete"
+    assert admission.stats().active == 0
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_completes_with_the_fake_adapter() -> None:
+    """The fake adapter approves its first draft, so runs take three calls."""
+    store = RecordingStore()
+    initial_state = PRDState(
+        run_id="run-fake",
+        idea="A benchmark run",
+        step="Outline",
+        content="# PRD for A benchmark run",
+        revision=0,
+    )
+
+    await run_pipeline(
+        initial_state=initial_state, state_store=store, adapter=FakeAdapter()
+    )
+
+    assert [state.step for state in store.history] == [
+        "Outline",
+        "Draft",
+        "Critique",
+        "Complete",
+    ]
+    assert "## Functional Requirements" in store.history[-1].content
@@ -0,0 +1,118 @@
+"""Unit tests for on-demand run and process profiling."""
+
+import json
+from pathlib import Path
+import pstats
+
+from fastapi.testclient import TestClient
+
+from backend.main import create_app
+from backend.settings import AppSettings
+
+
+def _profiling_settings(test_settings: AppSettings, tmp_path: Path) -> AppSettings:
+    """Return settings with the fake adapter and profiling into `tmp_path`."""
+    return test_settings.model_copy(
+        update={
+            "fake_adapter_enabled": True,
+            "profiling_enabled": True,
+            "profiling_dir": str(tmp_path),
+        }
+    )
+
+
+def test_profiled_run_is_downloadable_in_every_format(
+    test_settings: AppSettings, tmp_path: Path
+) -> None:
+    """A run started with `profile` saves speedscope, pstats and tracemalloc files."""
+    with TestClient(create_app(_profiling_settings(test_settings, tmp_path))) as client:
+        created = client.post(
+            "/api/v1/generate_prd",
+            json={"idea": "Profiling", "adapter": "fake", "profile": True},
+        )
+        run_id = created.json()["run_id"]
+        for _ in range(200):
+            response = client.get(f"/admin/profiles/{run_id}")
+            if response.status_code == 200:
+                break
+        speedscope = response.json()
+        pstats_file = client.get(f"/admin/profiles/{run_id}?format=pstats")
+        allocations = client.get(f"/admin/profiles/{run_id}?format=tracemalloc")
+
+    assert speedscope["$schema"].startswith("https://www.speedscope.app/")
+    assert pstats_file.status_code == 200
+    stats_path = tmp_path / "downloaded.pstats"
+    stats_path.write_bytes(pstats_file.content)
+    assert pstats.Stats(str(stats_path)).stats  # type: ignore[attr-defined]
+    assert allocations.text.startswith("# Allocation growth during the capture")
+
+
+def test_process_profile_captures_for_the_requested_time(
+    test_settings: AppSettings, tmp_path: Path
+) -> None:
+    """The admin endpoint samples the process and reports the saved formats."""
+    with TestClient(create_app(_profiling_settings(test_settings, tmp_path))) as client:
+        response = client.post("/admin/profile?seconds=0.05")
+        capture = response.json()
+        download = client.get(f"/admin/profiles/{capture['profile_id']}")
+
+    assert response.status_code == 200
+    assert capture["scope"] == "process"
+    assert capture["duration_seconds"] >= 0.05
+    assert capture["formats"] == ["speedscope", "pstats", "tracemalloc"]
+    assert json.loads(download.content)["profiles"]
+    saved = json.loads((tmp_path / f"{capture['profile_id']}.json").read_bytes())
+    assert saved["scope"] == "process"
+
+
+def test_profiling_is_refused_when_disabled(test_settings: AppSettings) -> None:
+    """Without `PROFILING_ENABLED`, profiled runs get 400 and admin routes 404."""
+    settings = test_settings.model_copy(update={"fake_adapter_enabled": True})
+    with TestClient(create_app(settings)) as client:
+        created = client.post(
+            "/api/v1/generate_prd",
+            json={"idea": "Profiling", "adapter": "fake", "profile": True},
+        )
+        capture = client.post("/admin/profile?seconds=0.01")
+        download = client.get("/admin/profiles/missing")
+
+    assert created.status_code == 400
+    assert capture.status_code == 404
+    assert download.status_code == 404
+
+
+def test_unknown_or_invalid_profile_ids_are_not_found(
+    test_settings: AppSettings, tmp_path: Path
+) -> None:
+    """Only ids of saved profiles resolve to files."""
+    with TestClient(create_app(_profiling_settings(test_settings, tmp_path))) as client:
+        assert client.get("/admin/profiles/missing").status_code == 404
+        assert client.get("/admin/profiles/..secret").status_code == 404
+
+
+def test_admin_routes_require_debug_or_the_admin_token(
+    test_settings: AppSettings, tmp_path: Path
+) -> None:
+    """Without DEBUG, admin routes need the configured token and stay undocumented."""
+    settings = _profiling_settings(test_settings, tmp_path)
+    production = settings.model_copy(update={"debug": False})
+    guarded = production.model_copy(update={"admin_token": "s3cret"})
+
+    with TestClient(create_app(production)) as client:
+        assert client.post("/admin/profile?seconds=0.01").status_code == 403
+        assert client.get("/admin/profiles/missing").status_code == 403
+        assert not any(
+            path.startswith("/admin")
+            for path in client.get("/openapi.json").json()["paths"]
+        )
+
+    with TestClient(create_app(guarded)) as client:
+        assert client.get("/admin/profiles/missing").status_code == 401
+        wrong = client.get(
+            "/admin/profiles/missing", headers={"X-Admin-Token": "guess"}
+        )
+        assert wrong.status_code == 401
+        allowed = client.get(
+            "/admin/profiles/missing", headers={"X-Admin-Token": "s3cret"}
+        )
+        assert allowed.status_code == 404
@@ -0,0 +1,46 @@
+"""Unit tests for the cached readiness probe."""
+
+import asyncio
+
+import pytest
+
+from backend.services.readiness import ReadinessProbe
+from backend.state.in_memory_store import InMemoryStore
+
+
+class CountingStore(InMemoryStore):
+    """In-memory store that counts and slows down health checks."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pings = 0
+
+    async def ping(self) -> bool:
+        self.pings += 1
+        await asyncio.sleep(0.01)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_readiness_probe_caches_and_coalesces_pings() -> None:
+    """Concurrent and repeated probes inside the window share one ping."""
+    store = CountingStore()
+    probe = ReadinessProbe(state_store=store, cache_seconds=60)
+
+    results = await asyncio.gather(*(probe.check() for _ in range(20)))
+    assert await probe.check() is True
+
+    assert all(results)
+    assert store.pings == 1
+
+
+@pytest.mark.asyncio
+async def test_readiness_probe_refreshes_after_the_window() -> None:
+    """A zero-length window pings the store on every probe."""
+    store = CountingStore()
+    probe = ReadinessProbe(state_store=store, cache_seconds=0)
+
+    await probe.check()
+    await probe.check()
+
+    assert store.pings == 2
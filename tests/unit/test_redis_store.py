@@ -0,0 +1,139 @@
+"""Unit tests for the Redis state store, run against fakeredis."""
+
+from collections.abc import AsyncGenerator, Callable
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from backend.models import PRDState
+from backend.state.base import Handoff
+from backend.state.redis_store import RedisStore
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+async def store() -> AsyncGenerator[RedisStore, None]:
+    """A Redis store backed by an in-process fake server."""
+    redis_store = RedisStore.from_client(
+        fakeredis.FakeAsyncRedis(decode_responses=True)
+    )
+    yield redis_store
+    await redis_store.close()
+
+
+async def _index(store: RedisStore, step: str | None, adapter: str | None) -> set[str]:
+    """Return the run IDs in one filter index."""
+    members = await store._client.zrange(store._get_index_key(step, adapter), 0, -1)
+    return set(members)
+
+
+@pytest.mark.asyncio
+async def test_redis_store_round_trips_state_and_revision(
+    store: RedisStore, make_state: Callable[..., PRDState]
+) -> None:
+    """Saved states and their revisions should be readable again."""
+    state = make_state("run-1", "Draft", 2, adapter="fake")
+
+    await store.save(state)
+
+    assert await store.get("run-1") == state
+    assert await store.get("missing") is None
+    assert await store.get_revision("run-1") == 2
+    assert await store.get_revision("missing") is None
+    assert await store.get_many(["run-1", "missing"]) == [state, None]
+
+
+@pytest.mark.asyncio
+async def test_redis_store_moves_index_entries_on_step_changes(
+    store: RedisStore, make_state: Callable[..., PRDState]
+) -> None:
+    """A run should leave the old step's indexes and join the new step's."""
+    await store.save(make_state("run-1", "Outline", adapter="fake"))
+    await store.save(make_state("run-1", "Draft", 1, adapter="fake"))
+    await store.save(make_state("run-1", "Draft", 2, adapter="fake"))
+
+    assert await _index(store, "Outline", None) == set()
+    assert await _index(store, "Outline", "fake") == set()
+    assert await _index(store, "Draft", None) == {"run-1"}
+    assert await _index(store, "Draft", "fake") == {"run-1"}
+    assert await _index(store, None, None) == {"run-1"}
+    assert await _index(store, None, "fake") == {"run-1"}
+    assert await store.get_revision("run-1") == 2
+
+    drafts = await store.list_runs(step="Draft", adapter="fake")
+    assert [state.revision for state in drafts.states] == [2]
+    assert (await store.list_runs(step="Outline")).states == []
+
+
+@pytest.mark.asyncio
+async def test_redis_store_save_many_indexes_every_state(
+    store: RedisStore, make_state: Callable[..., PRDState]
+) -> None:
+    """One batch should store and index every run, keeping the newest state."""
+    await store.save_many(
+        [
+            make_state("run-1", "Outline", adapter="fake"),
+            make_state("run-2", "Draft", 1, adapter="vanilla_openai"),
+            make_state("run-1", "Draft", 1, adapter="fake"),
+        ]
+    )
+
+    assert await store.get_revision("run-1") == 1
+    assert await store.get_revision("run-2") == 1
+    assert await _index(store, "Outline", None) == set()
+    assert await _index(store, "Draft", None) == {"run-1", "run-2"}
+    assert await _index(store, None, "vanilla_openai") == {"run-2"}
+    await store.save_many([])
+
+
+@pytest.mark.asyncio
+async def test_redis_store_cursor_breaks_ties_by_run_id(
+    store: RedisStore, make_state: Callable[..., PRDState]
+) -> None:
+    """Pages should cover runs sharing a timestamp exactly once."""
+    now = datetime.now(UTC)
+    for run_id in ("run-a", "run-b", "run-c", "run-d"):
+        await store.save(make_state(run_id, "Draft", created_at=now))
+    await store.save(
+        make_state("run-old", "Draft", created_at=now - timedelta(minutes=1))
+    )
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page = await store.list_runs(limit=2, cursor=cursor)
+        seen.extend(state.run_id for state in page.states)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == ["run-d", "run-c", "run-b", "run-a", "run-old"]
+
+
+@pytest.mark.asyncio
+async def test_redis_store_claims_idempotency_keys_once(store: RedisStore) -> None:
+    """The first claim wins, and only its own run can release it."""
+    assert await store.claim_idempotency_key("key-1", "run-1", 60) == "run-1"
+    assert await store.claim_idempotency_key("key-1", "run-2", 60) == "run-1"
+    assert await store._client.ttl(store._get_idempotency_key("key-1")) > 0
+
+    await store.release_idempotency_key("key-1", "run-2")
+    assert await store.claim_idempotency_key("key-1", "run-3", 60) == "run-1"
+
+    await store.release_idempotency_key("key-1", "run-1")
+    assert await store.claim_idempotency_key("key-1", "run-3", 60) == "run-3"
+
+
+@pytest.mark.asyncio
+async def test_redis_store_hands_off_runs_in_order(store: RedisStore) -> None:
+    """Handed-off runs are popped oldest first with their tenants."""
+    for run_id in ("run-1", "run-2", "run-3"):
+        await store.enqueue_handoff(run_id, f"tenant-{run_id}")
+
+    assert await store.claim_handoffs(2) == [
+        Handoff("run-1", "tenant-run-1"),
+        Handoff("run-2", "tenant-run-2"),
+    ]
+    assert await store.claim_handoffs(10) == [Handoff("run-3", "tenant-run-3")]
+    assert await store.claim_handoffs(10) == []
@@ -0,0 +1,150 @@
+"""Unit tests for run listing and the store indexes behind it."""
+
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.models import PRDState
+from backend.state.in_memory_store import InMemoryStore
+
+BASE_TIME = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+@pytest.mark.asyncio
+async def test_memory_store_paginates_newest_first(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Cursor pages should cover every run exactly once, newest first."""
+    store = InMemoryStore()
+    for minute in range(5):
+        await store.save(
+            make_state(
+                f"run-{minute}",
+                "Draft",
+                created_at=BASE_TIME + timedelta(minutes=minute),
+            )
+        )
+
+    first_page = await store.list_runs(limit=2)
+    second_page = await store.list_runs(limit=2, cursor=first_page.next_cursor)
+    last_page = await store.list_runs(limit=2, cursor=second_page.next_cursor)
+
+    assert [state.run_id for state in first_page.states] == ["run-4", "run-3"]
+    assert [state.run_id for state in second_page.states] == ["run-2", "run-1"]
+    assert [state.run_id for state in last_page.states] == ["run-0"]
+    assert last_page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_memory_store_indexes_follow_step_changes(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """A run should move between step indexes as its state advances."""
+    store = InMemoryStore()
+    await store.save(make_state("run-1", "Draft", created_at=BASE_TIME))
+    await store.save(
+        make_state(
+            "run-2",
+            "Draft",
+            created_at=BASE_TIME + timedelta(minutes=1),
+            adapter="vanilla_google",
+        )
+    )
+    await store.save(
+        make_state(
+            "run-1", "Error", created_at=BASE_TIME + timedelta(minutes=2), error="boom"
+        )
+    )
+
+    errors = await store.list_runs(step="Error")
+    drafts = await store.list_runs(step="Draft")
+    google_drafts = await store.list_runs(step="Draft", adapter="vanilla_google")
+    recent = await store.list_runs(created_after=BASE_TIME + timedelta(minutes=2))
+
+    assert [state.run_id for state in errors.states] == ["run-1"]
+    assert [state.run_id for state in drafts.states] == ["run-2"]
+    assert [state.run_id for state in google_drafts.states] == ["run-2"]
+    assert [state.run_id for state in recent.states] == ["run-1"]
+
+
+def test_list_runs_endpoint_returns_summaries(
+    client: TestClient,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """`GET /runs` returns content-free summaries and a next cursor."""
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    for minute in range(3):
+        client.portal.call(  # type: ignore[union-attr]
+            runtime.state_store.save,
+            make_state(
+                f"run-{minute}",
+                "Complete",
+                adapter="vanilla_openai",
+                created_at=BASE_TIME + timedelta(minutes=minute),
+            ),
+        )
+
+    response = client.get("/api/v1/runs", params={"step": "Complete", "limit": 2})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [run["run_id"] for run in body["runs"]] == ["run-2", "run-1"]
+    assert "content" not in body["runs"][0]
+    assert body["runs"][0]["adapter"] == "vanilla_openai"
+
+    next_page = client.get("/api/v1/runs", params={"cursor": body["next_cursor"]})
+    assert [run["run_id"] for run in next_page.json()["runs"]] == ["run-0"]
+
+
+def test_list_runs_endpoint_rejects_invalid_cursor(client: TestClient) -> None:
+    """Malformed cursors are reported as client errors."""
+    response = client.get("/api/v1/runs", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_get_run_supports_etags_and_field_projection(
+    client: TestClient,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """`GET /runs/{run_id}` revalidates by revision and projects fields."""
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    state = make_state("run-1", "Draft", 2)
+    client.portal.call(runtime.state_store.save, state)  # type: ignore[union-attr]
+
+    response = client.get("/api/v1/runs/run-1")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"run-1.2"'
+    assert response.json() == state.to_event_payload()
+
+    projected = client.get("/api/v1/runs/run-1", params={"fields": "step,revision"})
+    assert projected.json() == {"step": "Draft", "revision": 2}
+
+    unchanged = client.get(
+        "/api/v1/runs/run-1", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    client.portal.call(  # type: ignore[union-attr]
+        runtime.state_store.save, state.model_copy(update={"revision": 3})
+    )
+    changed = client.get("/api/v1/runs/run-1", headers={"If-None-Match": '"run-1.2"'})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] == '"run-1.3"'
+
+
+def test_get_run_rejects_unknown_fields_and_runs(
+    client: TestClient,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Unknown runs are 404s and unknown projection fields 400s."""
+    assert client.get("/api/v1/runs/missing").status_code == 404
+    runtime = client.app.state.runtime  # type: ignore[attr-defined]
+    client.portal.call(  # type: ignore[union-attr]
+        runtime.state_store.save, make_state("run-1", "Draft")
+    )
+    response = client.get("/api/v1/runs/run-1", params={"fields": "step,idea"})
+    assert response.status_code == 400
+    assert "idea" in response.json()["detail"]
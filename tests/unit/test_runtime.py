@@ -1,11 +1,14 @@
 """Unit tests for settings and runtime selection."""
 
+from pathlib import Path
+
 import pytest
 
 from backend.runtime import _build_state_store
 from backend.settings import AppSettings
 from backend.state.in_memory_store import InMemoryStore
 from backend.state.redis_store import RedisStore
+from backend.state.sqlite_store import SQLiteStore
 
 
 def test_settings_parse_env_lists_and_state_backend(
@@ -62,3 +65,37 @@ async def test_runtime_raises_when_redis_is_required(
     with pytest.raises(RuntimeError, match="Redis was selected explicitly"):
         await _build_state_store(settings)
     assert closed is True
+
+
+@pytest.mark.asyncio
+async def test_runtime_selects_sqlite_store(tmp_path: Path) -> None:
+    """The SQLite backend should be selectable through settings."""
+    settings = AppSettings(
+        state_backend="sqlite",
+        sqlite_path=str(tmp_path / "state.sqlite3"),
+    )
+
+    store = await _build_state_store(settings)
+
+    assert isinstance(store, SQLiteStore)
+    assert store.backend_name == "sqlite"
+    await store.close()
+
+
+def test_redis_store_applies_pool_timeout_and_retry_settings() -> None:
+    """Connection pool options should be wired from the constructor."""
+    store = RedisStore(
+        redis_url="redis://localhost:6379/0",
+        max_connections=7,
+        socket_timeout_seconds=1.5,
+        socket_connect_timeout_seconds=0.5,
+        health_check_interval_seconds=10,
+        retry_attempts=4,
+    )
+
+    pool = store._client.connection_pool
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["socket_timeout"] == 1.5
+    assert pool.connection_kwargs["socket_connect_timeout"] == 0.5
+    assert pool.connection_kwargs["health_check_interval"] == 10
+    assert pool.connection_kwargs["retry"].get_retries() == 4
@@ -0,0 +1,127 @@
+"""Unit tests for fair-share scheduling of LLM calls."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.agents.scheduled import ScheduledAdapter
+from backend.dependencies import get_tenant
+from backend.models import GeneratePRDRequest, PriorityClass
+from backend.services.scheduler import LLMScheduler
+
+
+class RecordingAdapter:
+    """Adapter test double that records the order of its calls."""
+
+    adapter_type = "test"
+
+    def __init__(self, calls: list[str], gate: asyncio.Event) -> None:
+        self._calls = calls
+        self._gate = gate
+
+    async def call_llm(self, prompt: str) -> str:
+        await self._gate.wait()
+        self._calls.append(prompt)
+        return prompt
+
+
+async def _dispatch_order(
+    scheduler: LLMScheduler, flows: list[tuple[str, PriorityClass]]
+) -> list[str]:
+    """Queue one call per flow behind a busy slot and return the service order."""
+    calls: list[str] = []
+    gate = asyncio.Event()
+    blocker = asyncio.create_task(
+        ScheduledAdapter(
+            RecordingAdapter(calls, gate),
+            scheduler,
+            tenant="blocker",
+            priority="interactive",
+        ).call_llm("blocker")
+    )
+    await asyncio.sleep(0)
+    tasks = []
+    for index, (tenant, priority) in enumerate(flows):
+        adapter = ScheduledAdapter(
+            RecordingAdapter(calls, gate), scheduler, tenant=tenant, priority=priority
+        )
+        tasks.append(asyncio.create_task(adapter.call_llm(f"{tenant}-{index}")))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+    return calls[1:]
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_overtake_queued_batch_work() -> None:
+    """An interactive call is served ahead of a tenant's batch backlog."""
+    scheduler = LLMScheduler(max_concurrent_calls=1)
+    flows: list[tuple[str, PriorityClass]] = [("bulk", "batch")] * 4
+    flows.append(("user", "interactive"))
+
+    order = await _dispatch_order(scheduler, flows)
+
+    assert order[0] == "user-4"
+    assert order[1:] == ["bulk-0", "bulk-1", "bulk-2", "bulk-3"]
+
+
+@pytest.mark.asyncio
+async def test_tenants_of_one_priority_share_capacity_fairly() -> None:
+    """A tenant arriving behind another's backlog is served in alternation."""
+    scheduler = LLMScheduler(max_concurrent_calls=1)
+    flows: list[tuple[str, PriorityClass]] = [("bulk", "batch")] * 3
+    flows += [("other", "batch")] * 2
+
+    order = await _dispatch_order(scheduler, flows)
+
+    assert order == ["bulk-0", "other-3", "bulk-1", "other-4", "bulk-2"]
+    stats = scheduler.stats()
+    assert stats.active == 0
+    assert stats.queued == 0
+    assert stats.tenants["bulk"].calls == 3
+    assert stats.tenants["other"].max_wait_seconds >= 0.0
+    assert stats.priorities["batch"].calls == 5
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_give_up_their_place() -> None:
+    """Cancelling a queued call removes it without leaking a slot."""
+    scheduler = LLMScheduler(max_concurrent_calls=1)
+    async with scheduler.slot("a", "interactive"):
+        waiter = asyncio.create_task(scheduler.slot("b", "batch").__aenter__())
+        await asyncio.sleep(0)
+        assert scheduler.stats().queued == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    async with scheduler.slot("c", "batch"):
+        assert scheduler.stats().active == 1
+    assert scheduler.stats().active == 0
+    assert scheduler.stats().tenants["b"].queued == 0
+
+
+def test_tenant_and_priority_resolution() -> None:
+    """Tenants come from headers and batch runs default to the batch class."""
+    assert get_tenant("acme", "secret") == "acme"
+    assert get_tenant(None, "secret").startswith("key-")
+    assert "secret" not in get_tenant(None, "secret")
+    assert get_tenant(None, None) == "anonymous"
+
+    assert GeneratePRDRequest(idea="x").priority_class == "interactive"
+    assert GeneratePRDRequest(idea="x", batch_id="b").priority_class == "batch"
+    request = GeneratePRDRequest(idea="x", batch_id="b", priority="interactive")
+    assert request.priority_class == "interactive"
+
+
+def test_scheduler_stats_endpoint(client: TestClient) -> None:
+    """`/scheduler` reports slots and per-tenant waits."""
+    response = client.get("/scheduler")
+    assert response.status_code == 200
+    assert response.json() == {
+        "active": 0,
+        "queued": 0,
+        "max_concurrent_calls": 16,
+        "tenants": {},
+        "priorities": {},
+    }
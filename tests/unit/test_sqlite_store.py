@@ -0,0 +1,104 @@
+"""Unit tests for the SQLite state store."""
+
+import asyncio
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from backend.models import PRDState
+from backend.state.base import Handoff
+from backend.state.sqlite_store import SQLiteStore
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_round_trips_state_in_wal_mode(
+    tmp_path: Path,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Saved states should be readable and the database should use WAL."""
+    store = SQLiteStore(path=str(tmp_path / "state.sqlite3"))
+    state = make_state("run-1", step="Draft", revision=2)
+
+    await store.save(state)
+
+    assert await store.get("run-1") == state
+    assert await store.get("missing") is None
+    assert await store.get_revision("run-1") == 2
+    assert await store.get_revision("missing") is None
+    journal_mode = await store._run(
+        lambda connection: connection.execute("PRAGMA journal_mode").fetchone()[0]
+    )
+    assert journal_mode == "wal"
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_groups_concurrent_saves_into_batches(
+    tmp_path: Path,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Concurrent saves should share commits instead of committing one by one."""
+    store = SQLiteStore(path=str(tmp_path / "state.sqlite3"), max_batch_size=50)
+
+    await asyncio.gather(*(store.save(make_state(f"run-{i}")) for i in range(100)))
+
+    assert store._commit_count < 100
+    assert await store.get("run-99") is not None
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_lists_runs_by_step_time_and_idea(
+    tmp_path: Path,
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Indexed queries should filter by step, creation time, and idea hash."""
+    store = SQLiteStore(path=str(tmp_path / "state.sqlite3"))
+    now = datetime.now(UTC)
+    await store.save(
+        make_state("old-error", step="Error", created_at=now - timedelta(hours=2))
+    )
+    await store.save(make_state("new-error", step="Error", created_at=now))
+    await store.save(make_state("draft", step="Draft", idea="Plant  identifier"))
+
+    recent_errors = await store.list_runs(
+        step="Error", created_after=now - timedelta(hours=1)
+    )
+    same_idea = await store.list_runs(idea="plant identifier")
+
+    assert [state.run_id for state in recent_errors.states] == ["new-error"]
+    assert [state.run_id for state in same_idea.states] == ["draft"]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_ping_reports_unusable_paths(tmp_path: Path) -> None:
+    """A database path that cannot be opened should fail the health check."""
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    store = SQLiteStore(path=str(blocker / "state.sqlite3"))
+
+    assert await store.ping() is False
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_hands_off_runs_across_connections(tmp_path: Path) -> None:
+    """A run handed off by one worker is claimed once, by another, in order."""
+    path = str(tmp_path / "state.sqlite3")
+    draining, successor = SQLiteStore(path=path), SQLiteStore(path=path)
+
+    for run_id in ("run-1", "run-2", "run-3"):
+        await draining.enqueue_handoff(run_id, f"tenant-{run_id}")
+    await draining.enqueue_handoff("run-1", "tenant-other")
+
+    assert await successor.claim_handoffs(2) == [
+        Handoff("run-1", "tenant-run-1"),
+        Handoff("run-2", "tenant-run-2"),
+    ]
+    assert await draining.claim_handoffs(10) == [Handoff("run-3", "tenant-run-3")]
+    assert await successor.claim_handoffs(10) == []
+    await draining.close()
+    await successor.close()
@@ -1,29 +1,35 @@
 """Unit tests for the shared streamer service."""
 
 import asyncio
+from collections.abc import Callable
+import json
 
 import pytest
 
-from backend.services.streamer import StreamerService
+from backend.models import PRDState
+from backend.services.streamer import (
+    StreamerService,
+    SubscriberLimitError,
+    SubscriptionClosedError,
+)
 
 
 @pytest.mark.asyncio
-async def test_streamer_broadcasts_to_multiple_subscribers() -> None:
+async def test_streamer_broadcasts_to_multiple_subscribers(
+    make_state: Callable[..., PRDState],
+) -> None:
     """All subscribers for a run should receive the same payload."""
     streamer = StreamerService()
     queue_one = await streamer.add_subscriber("run-1")
     queue_two = await streamer.add_subscriber("run-1")
+    state = make_state("run-1", revision=1)
 
-    await streamer.publish("run-1", {"revision": 1, "step": "Outline"})
+    await streamer.publish("run-1", state)
 
-    assert await asyncio.wait_for(queue_one.get(), timeout=1) == {
-        "revision": 1,
-        "step": "Outline",
-    }
-    assert await asyncio.wait_for(queue_two.get(), timeout=1) == {
-        "revision": 1,
-        "step": "Outline",
-    }
+    event_one = await asyncio.wait_for(queue_one.get(), timeout=1)
+    event_two = await asyncio.wait_for(queue_two.get(), timeout=1)
+    assert event_one is event_two
+    assert event_one.state is state
 
 
 @pytest.mark.asyncio
@@ -35,3 +41,230 @@ async def test_streamer_cleans_up_subscribers() -> None:
     await streamer.remove_subscriber("run-2", queue)
 
     assert "run-2" not in streamer._queues
+
+
+@pytest.mark.asyncio
+async def test_streamer_drops_oldest_states_for_slow_subscribers(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """A full queue should discard the oldest state instead of blocking."""
+    streamer = StreamerService(max_queue_size=2, overflow_policy="drop_oldest")
+    queue = await streamer.add_subscriber("run-3")
+
+    for revision in range(1, 6):
+        await asyncio.wait_for(
+            streamer.publish("run-3", make_state("run-3", revision=revision)), 1
+        )
+
+    assert (await queue.get()).revision == 4
+    assert (await queue.get()).revision == 5
+    [stats] = streamer.subscriber_stats()
+    assert stats.dropped == 3
+    assert stats.max_lag == 2
+    assert stats.lag == 0
+    assert stats.delivered == 2
+
+
+@pytest.mark.asyncio
+async def test_streamer_keep_latest_holds_only_the_newest_state(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """The keep-latest policy should replace any unread state."""
+    streamer = StreamerService(overflow_policy="keep_latest")
+    queue = await streamer.add_subscriber("run-4")
+
+    for revision in range(1, 4):
+        await streamer.publish("run-4", make_state("run-4", revision=revision))
+
+    assert queue.lag == 1
+    assert (await queue.get()).revision == 3
+    assert queue.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_streamer_replays_only_buffered_gaps(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Replay should return missed states, or None once they were evicted."""
+    streamer = StreamerService(replay_buffer_size=3, replay_max_runs=1)
+    for revision in range(1, 6):
+        await streamer.publish("run-5", make_state("run-5", revision=revision))
+
+    replay = streamer.replay_since("run-5", 2)
+    assert replay is not None
+    assert [state.revision for state in replay] == [3, 4, 5]
+    assert streamer.replay_since("run-5", 5) == []
+    assert streamer.replay_since("run-5", 1) is None
+
+    await streamer.publish("run-6", make_state("run-6", revision=1))
+    assert streamer.replay_since("run-5", 4) is None
+
+
+@pytest.mark.asyncio
+async def test_streamer_encodes_each_event_kind_once(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Subscribers should share the same pre-encoded SSE wire bytes."""
+    streamer = StreamerService()
+    queues = [await streamer.add_subscriber("run-7") for _ in range(3)]
+
+    await streamer.publish("run-7", make_state("run-7", revision=2))
+
+    events = [await queue.get() for queue in queues]
+    wires = {id(event.wire("message")) for event in events}
+    assert len(wires) == 1
+    assert events[0].wire("message").startswith(b"id: 2\r\nevent: message\r\n")
+    assert b'"revision":2' in events[0].wire("message")
+
+
+@pytest.mark.asyncio
+async def test_streamer_registry_is_copy_on_write() -> None:
+    """Registering during a publish must not change the tuple being iterated."""
+    streamer = StreamerService()
+    first = await streamer.add_subscriber("run-8")
+    snapshot = streamer._queues["run-8"]
+
+    second = await streamer.add_subscriber("run-8")
+    await streamer.remove_subscriber("run-8", first)
+
+    assert snapshot == (first,)
+    assert streamer._queues["run-8"] == (second,)
+
+
+@pytest.mark.asyncio
+async def test_streamer_enforces_subscriber_caps() -> None:
+    """Per-run and global caps should reject excess subscribers."""
+    streamer = StreamerService(max_subscribers=3, max_subscribers_per_run=2)
+    first = await streamer.add_subscriber("run-9")
+    await streamer.add_subscriber("run-9")
+
+    with pytest.raises(SubscriberLimitError, match="per_run"):
+        await streamer.add_subscriber("run-9")
+    await streamer.add_subscriber("run-10")
+    with pytest.raises(SubscriberLimitError, match="global"):
+        await streamer.add_subscriber("run-11")
+
+    await streamer.remove_subscriber("run-9", first)
+    await streamer.add_subscriber("run-11")
+    counts = streamer.connection_counts()
+    assert (counts.subscribers, counts.runs, counts.rejected) == (3, 3, 2)
+
+
+@pytest.mark.asyncio
+async def test_streamer_reaps_stalled_subscribers(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Subscribers that leave events unread past the timeout are closed."""
+    streamer = StreamerService(stall_timeout_seconds=60)
+    stalled = await streamer.add_subscriber("run-12")
+    idle = await streamer.add_subscriber("run-12")
+    await streamer.publish("run-12", make_state("run-12", revision=1))
+    await idle.get()
+    assert stalled.unread_since is not None
+    stalled.unread_since -= 61
+
+    assert streamer.reap_stalled_subscribers() == 1
+
+    assert streamer._queues["run-12"] == (idle,)
+    assert streamer.connection_counts().reaped == 1
+    with pytest.raises(SubscriptionClosedError):
+        await stalled.get()
+    await streamer.close()
+
+
+@pytest.mark.asyncio
+async def test_streamer_does_not_reap_idle_subscribers(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """The stall clock starts when an event is queued, not at the last read."""
+    streamer = StreamerService(stall_timeout_seconds=60)
+    queue = await streamer.add_subscriber("run-15")
+    await streamer.publish("run-15", make_state("run-15", revision=1))
+    await queue.get()
+    assert queue.unread_since is None
+
+    # However long the subscriber idled, the clock starts with these events.
+    await streamer.publish("run-15", make_state("run-15", revision=2))
+    await streamer.publish("run-15", make_state("run-15", revision=3))
+    queued_at = queue.unread_since
+    assert queued_at is not None
+    assert not queue.is_stalled(queued_at + 59, 60)
+    assert queue.is_stalled(queued_at + 60, 60)
+
+    await queue.get()
+    read_at = queue.unread_since
+    assert read_at is not None
+    assert read_at >= queued_at
+    assert not queue.is_stalled(read_at + 59, 60)
+    assert streamer.reap_stalled_subscribers() == 0
+    await streamer.close()
+
+
+@pytest.mark.asyncio
+async def test_streamer_multiplexes_runs_onto_one_queue(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """A queue registered under several runs receives all of their events."""
+    streamer = StreamerService(max_subscribers_per_run=1)
+    queue = streamer.new_subscription("websocket")
+    await streamer.add_subscriber("run-13", queue)
+    await streamer.add_subscriber("run-14", queue)
+
+    await streamer.publish("run-13", make_state("run-13", revision=1))
+    await streamer.publish("run-14", make_state("run-14", revision=1))
+
+    event = await queue.get()
+    assert event.state.run_id == "run-13"
+    assert json.loads(event.frame("message", "json")) == {
+        "event": "message",
+        "id": "1",
+        "data": event.state.to_event_payload(),
+    }
+    assert (await queue.get()).state.run_id == "run-14"
+    assert streamer.connection_counts().subscribers == 2
+
+
+@pytest.mark.asyncio
+async def test_multiplexed_keep_latest_keeps_each_runs_terminal_event(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Keep-latest coalesces per run, so one run cannot evict another's end."""
+    streamer = StreamerService(overflow_policy="keep_latest")
+    queue = streamer.new_subscription("runs")
+    await streamer.add_subscriber("run-15", queue)
+    await streamer.add_subscriber("run-16", queue)
+
+    await streamer.publish("run-15", make_state("run-15", "Complete", 2))
+    await streamer.publish("run-16", make_state("run-16", "Outline", 1))
+    await streamer.publish("run-16", make_state("run-16", "Draft", 2))
+    await streamer.publish("run-15", make_state("run-15", "Draft", 3))
+
+    events = [await queue.get() for _ in range(queue.lag)]
+    assert [(event.state.run_id, event.state.step) for event in events] == [
+        ("run-15", "Complete"),
+        ("run-16", "Draft"),
+    ]
+    assert queue.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_multiplexed_drop_oldest_drops_only_superseded_events(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """A burst from a busy run evicts its own stale events, not a quiet run's."""
+    streamer = StreamerService(max_queue_size=2, overflow_policy="drop_oldest")
+    queue = streamer.new_subscription("runs")
+    await streamer.add_subscriber("run-17", queue)
+    await streamer.add_subscriber("run-18", queue)
+
+    await streamer.publish("run-17", make_state("run-17", "Complete", 1))
+    for revision in range(1, 6):
+        await streamer.publish("run-18", make_state("run-18", "Draft", revision))
+
+    events = [await queue.get() for _ in range(queue.lag)]
+    assert [(event.state.run_id, event.revision) for event in events] == [
+        ("run-17", 1),
+        ("run-18", 5),
+    ]
+    assert queue.dropped == 4
+    assert queue.max_lag == 2
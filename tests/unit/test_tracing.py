@@ -0,0 +1,120 @@
+"""Unit tests for OpenTelemetry tracing of runs."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from fastapi.testclient import TestClient
+
+from backend import tracing
+from backend.main import create_app
+from backend.settings import AppSettings
+
+CALLER_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+CALLER_SPAN_ID = "00f067aa0ba902b7"
+
+
+def _run_traced(settings: AppSettings, headers: dict[str, str] | None = None) -> str:
+    """Generate one fake run to completion and return its id."""
+    with TestClient(create_app(settings)) as client:
+        created = client.post(
+            "/api/v1/generate_prd",
+            json={"idea": "Tracing", "adapter": "fake"},
+            headers=headers,
+        )
+        run_id: str = created.json()["run_id"]
+        for _ in range(100):
+            if client.get(f"/api/v1/runs/{run_id}").json()["step"] == "Complete":
+                break
+    return run_id
+
+
+def _read_spans(path: Path) -> list[dict[str, Any]]:
+    """Read the spans written by the file exporter."""
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line]
+
+
+def test_run_is_traced_from_route_to_store(
+    test_settings: AppSettings, tmp_path: Path
+) -> None:
+    """Pipeline, step, LLM, store and publish spans share the caller's trace."""
+    trace_path = tmp_path / "traces.jsonl"
+    settings = test_settings.model_copy(
+        update={
+            "fake_adapter_enabled": True,
+            "tracing_exporter": "file",
+            "tracing_file_path": str(trace_path),
+        }
+    )
+    run_id = _run_traced(
+        settings,
+        {"traceparent": f"00-{CALLER_TRACE_ID}-{CALLER_SPAN_ID}-01"},
+    )
+
+    by_name: dict[str, list[dict[str, Any]]] = {}
+    for span in _read_spans(trace_path):
+        if span["context"]["trace_id"] == f"0x{CALLER_TRACE_ID}":
+            by_name.setdefault(span["name"], []).append(span)
+        else:
+            # Only the test's polling reads start traces of their own.
+            assert span["name"] == "state_store.get"
+
+    (root,) = by_name["generate_prd"]
+    assert root["parent_id"] == f"0x{CALLER_SPAN_ID}"
+    assert root["attributes"]["prd.run_id"] == run_id
+    (pipeline,) = by_name["run_pipeline"]
+    assert pipeline["parent_id"] == root["context"]["span_id"]
+    (outline,) = by_name["pipeline.outline"]
+    assert outline["parent_id"] == pipeline["context"]["span_id"]
+
+    step_ids = {
+        span["context"]["span_id"]
+        for name in ("pipeline.outline", "pipeline.draft", "pipeline.critique")
+        for span in by_name[name]
+    }
+    llm_calls = by_name["llm.call"]
+    assert {span["parent_id"] for span in llm_calls} <= step_ids
+    assert all(span["attributes"]["prd.prompt.chars"] > 0 for span in llm_calls)
+    assert all(span["attributes"]["prd.response.chars"] > 0 for span in llm_calls)
+    assert "prd.scheduler.wait_seconds" in llm_calls[0]["attributes"]
+
+    saves = [
+        span
+        for span in by_name["state_store.save"]
+        if span["parent_id"] == outline["context"]["span_id"]
+    ]
+    assert saves[0]["attributes"]["db.system"] == "memory"
+    assert any(
+        span["parent_id"] == outline["context"]["span_id"]
+        for span in by_name["stream.publish"]
+    )
+
+
+def test_sample_ratio_zero_records_no_spans(
+    test_settings: AppSettings, tmp_path: Path
+) -> None:
+    """Traces started here are sampled at their root and export nothing."""
+    trace_path = tmp_path / "traces.jsonl"
+    settings = test_settings.model_copy(
+        update={
+            "fake_adapter_enabled": True,
+            "tracing_exporter": "file",
+            "tracing_file_path": str(trace_path),
+            "tracing_sample_ratio": 0.0,
+        }
+    )
+    _run_traced(settings)
+
+    assert _read_spans(trace_path) == []
+
+
+def test_spans_are_no_ops_without_tracing() -> None:
+    """Hot paths can open spans unconditionally when tracing is off."""
+    tracing.shutdown_tracing()
+
+    with tracing.start_span("noop", {"prd.run_id": "run"}) as span:
+        tracing.set_span_attributes(span, {"prd.response.chars": 3})
+    assert span is None
+    assert tracing.extract_context({"traceparent": "ignored"}) is None
@@ -0,0 +1,117 @@
+"""Unit tests for the write-behind state store buffer."""
+
+import asyncio
+from collections.abc import Callable, Sequence
+import time
+
+import pytest
+from structlog.testing import capture_logs
+
+from backend.models import PRDState
+from backend.state.in_memory_store import InMemoryStore
+from backend.state.write_behind import WriteBehindStore
+
+
+class BatchRecordingStore(InMemoryStore):
+    """In-memory store that records each batch it is asked to write."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[list[str]] = []
+
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        self.batches.append([f"{state.run_id}@{state.revision}" for state in states])
+        await super().save_many(states)
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_saves_across_runs(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Buffered saves should reach the store as one batch of newest states."""
+    inner = BatchRecordingStore()
+    store = WriteBehindStore(inner, flush_interval_seconds=0.01)
+
+    for revision in range(3):
+        for run_id in ("run-1", "run-2"):
+            await store.save(make_state(run_id, "Draft", revision))
+
+    buffered = await store.get("run-1")
+    assert inner.batches == []
+    assert buffered is not None
+    assert buffered.revision == 2
+    await asyncio.sleep(0.05)
+
+    assert inner.batches == [["run-1@2", "run-2@2"]]
+    assert (await inner.get("run-2")).revision == 2  # type: ignore[union-attr]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_writes_terminal_states_through(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Terminal states must be durable before `save` returns."""
+    inner = BatchRecordingStore()
+    store = WriteBehindStore(inner, flush_interval_seconds=60)
+
+    await store.save(make_state("run-1", "Draft", 1))
+    await store.save(make_state("run-1", "Complete", 2))
+
+    stored = await inner.get("run-1")
+    assert stored is not None
+    assert stored.step == "Complete"
+    assert inner.batches == []
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flushes_buffer_on_close(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Closing the store must not lose buffered states."""
+    inner = BatchRecordingStore()
+    store = WriteBehindStore(inner, flush_interval_seconds=60)
+
+    await store.save(make_state("run-1", "Draft", 1))
+    await store.close()
+
+    assert inner.batches == [["run-1@1"]]
+
+
+class FlakyStore(InMemoryStore):
+    """In-memory store whose batch writes fail a given number of times."""
+
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+        self.attempts: list[float] = []
+
+    async def save_many(self, states: Sequence[PRDState]) -> None:
+        self.attempts.append(time.monotonic())
+        if len(self.attempts) <= self.failures:
+            raise ConnectionError("store is down")
+        await super().save_many(states)
+
+
+@pytest.mark.asyncio
+async def test_write_behind_backs_off_while_the_store_fails(
+    make_state: Callable[..., PRDState],
+) -> None:
+    """Failed flushes retry with growing delays and log the outage once."""
+    inner = FlakyStore(failures=5)
+    store = WriteBehindStore(
+        inner, flush_interval_seconds=0.001, max_retry_interval_seconds=0.05
+    )
+
+    with capture_logs() as logs:
+        await store.save(make_state("run-1", "Draft", 1))
+        async with asyncio.timeout(5):
+            while await inner.get("run-1") is None:
+                await asyncio.sleep(0.005)
+
+    assert len(inner.attempts) == 6
+    # The sixth attempt waited 2**5 base intervals after the fifth.
+    assert inner.attempts[-1] - inner.attempts[-2] >= 0.032
+    events = [log["event"] for log in logs]
+    assert events.count("state_write_behind_flush_failed") == 1
+    assert events.count("state_write_behind_flush_recovered") == 1
+    await store.close()